@@ -1,6 +1,35 @@
 import streamlit as st
 import sys
 import os
+import importlib
+
+# This script runs again on every rerun; add each folder to sys.path once.
+for folder in ('task2', 'task1'):
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from metrics import serve_metrics, timed
+
+# Prometheus endpoint, if METRICS_PORT is set; started once per process.
+serve_metrics()
+
+def load_dashboard(name):
+    # Imported on first visit and then reused from sys.modules on every rerun;
+    # Streamlit's file watcher drops the module when its source changes.
+    try:
+        return importlib.import_module(name)
+    except ModuleNotFoundError as e:
+        if e.name != name:
+            raise
+        return None
+
+def distribution_markdown(predictions, total):
+    lines = [f"- {star}★: {n} ({100 * n / total:.1f}%)" for star, n in predictions.items() if n]
+    never = [f"{star}★" for star, n in predictions.items() if not n]
+    if never:
+        lines.append(f"- Never predicted: {', '.join(never)}")
+    return "\n".join(lines)
 
 st.set_page_config(
     page_title="FYND AI Internship Assessment",
@@ -20,6 +49,13 @@ st.sidebar.markdown("---")
 st.sidebar.info("Navneet Shukla | FYND AI Internship")
 
 if page == "Task 1: Rating Prediction":
+    from rating_eval import APPROACHES, best_approach, common_findings, format_report, load_results, observations
+    
+    # Produced by `python task1/rating_eval.py`; read fresh on every run.
+    results = load_results()
+    scores = {a['key']: a for a in results['approaches']} if results else {}
+    notes = observations(results) if results else {}
+    
     st.title("Task 1: Yelp Rating Prediction via Prompting")
     
     st.markdown("""
@@ -34,172 +70,59 @@ if page == "Task 1: Rating Prediction":
     
     with col1:
         st.markdown("### Dataset Information")
-        st.markdown("""
+        st.markdown(f"""
         - **Source:** Yelp Reviews (Kaggle)
-        - **Sample Size:** 200 reviews
+        - **Sample Size:** {results['sample_size'] if results else '–'} reviews
         - **Evaluation Metrics:** Accuracy, MAE, JSON Validity Rate
         """)
     
     with col2:
         st.markdown("### Model Details")
-        st.markdown("""
-        - **Model:** TinyLlama 1.1B
-        - **Deployment:** Local inference
-        - **Device:** MPS (Apple Silicon)
+        st.markdown(f"""
+        - **Model:** {results['model'] if results else '–'}
+        - **Deployment:** {results['deployment'] if results else '–'}
+        - **Device:** {results['device'] if results else '–'}
         """)
     
+    if results is None:
+        st.info("No evaluation results yet. Run `python task1/rating_eval.py <reviews.csv>` to produce them.")
+    
     st.markdown("---")
     
     st.markdown("## Prompting Approaches")
     
-    with st.expander("Approach 1: Basic Direct Prompt", expanded=True):
-        st.markdown("""
-        #### Simple, minimal prompt asking directly for star rating. Tests baseline model capability without additional guidance or context.
-        """)
-        
-        st.code("""
-Analyze this Yelp review and predict the star rating (1-5).
-Return your response in JSON format:
-{
-  "predicted_stars": <number>,
-  "explanation": "<brief reasoning>"
-}
-
-Review: [REVIEW_TEXT]
-        """, language="text")
-        
-        st.markdown("### Results")
-        col1, col2, col3 = st.columns(3)
-        col1.metric("Accuracy", "31.0%")
-        col2.metric("MAE", "1.09")
-        col3.metric("JSON Validity", "91.0%")
-        
-        st.markdown("### Prediction Distribution")
-        st.markdown("""
-        - 3★: 20 (10.0%)
-        - 4★: 114 (57.0%)
-        - 5★: 66 (33.0%)
-        - Never predicted: 1★, 2★
-        """)
-        
-        st.markdown("### Key Observations")
-        st.markdown("""
-        - Highest accuracy among all approaches
-        - Strong positive bias (71% predicted 4-5 stars)
-        - Excellent JSON formatting compliance
-        - Fails to capture negative sentiment (never predicted 1-2 stars)
-        """)
-    
-    with st.expander("Approach 2: Keyword-Guided Prompt"):
-        st.markdown("""
-        #### Enhanced prompt with explicit sentiment keywords mapped to rating levels. Provides clearer signals for classification by associating specific words with star ratings.
-        """)
-        
-        st.code("""
-Analyze this Yelp review and predict the star rating (1-5).
-
-Rating Guide:
-- 1 star: terrible, awful, horrible, worst
-- 2 stars: bad, poor, disappointing, mediocre
-- 3 stars: okay, decent, average, fine
-- 4 stars: good, nice, pleasant, solid
-- 5 stars: excellent, amazing, outstanding, perfect
-
-Return JSON:
-{
-  "predicted_stars": <number>,
-  "explanation": "<brief reasoning>"
-}
-
-Review: [REVIEW_TEXT]
-        """, language="text")
-        
-        st.markdown("### Results")
-        col1, col2, col3 = st.columns(3)
-        col1.metric("Accuracy", "28.0%")
-        col2.metric("MAE", "1.10")
-        col3.metric("JSON Validity", "44.5%")
-        
-        st.markdown("### Prediction Distribution")
-        st.markdown("""
-        - 1★: 1 (0.5%)
-        - 3★: 111 (55.5%)
-        - 4★: 54 (27.0%)
-        - 5★: 34 (17.0%)
-        - Never predicted: 2★
-        """)
-        
-        st.markdown("### Key Observations")
-        st.markdown("""
-        - Slight decrease in accuracy compared to basic approach
-        - Strong neutral bias (55.5% predicted 3 stars)
-        - Significant drop in JSON validity (44.5%)
-        - Additional context may have confused the small model
-        """)
-    
-    with st.expander("Approach 3: Examples + Chain-of-Thought"):
-        st.markdown("""
-        #### Few-shot learning with example reviews and explicit reasoning steps. Guides model through analysis process to improve complex sentiment understanding.
-        """)
-        
-        st.code("""
-Analyze Yelp reviews and predict star ratings (1-5).
-
-Examples:
-Review: "Food was cold and service terrible"
-Reasoning: Negative words indicate poor experience
-Rating: 1 star
-
-Review: "Great food, friendly staff, will return"
-Reasoning: Positive sentiment throughout
-Rating: 5 stars
-
-Now analyze this review step by step:
-1. Identify key sentiment words
-2. Assess overall tone
-3. Assign rating
-
-Return JSON:
-{
-  "predicted_stars": <number>,
-  "explanation": "<brief reasoning>"
-}
-
-Review: [REVIEW_TEXT]
-        """, language="text")
-        
-        st.markdown("### Results")
-        col1, col2, col3 = st.columns(3)
-        col1.metric("Accuracy", "25.5%")
-        col2.metric("MAE", "1.35")
-        col3.metric("JSON Validity", "97.0%")
-        
-        st.markdown("### Prediction Distribution")
-        st.markdown("""
-        - 3★: 7 (3.5%)
-        - 4★: 2 (1.0%)
-        - 5★: 191 (95.5%)
-        - Never predicted: 1★, 2★
-        """)
-        
-        st.markdown("### Key Observations")
-        st.markdown("""
-        - Lowest accuracy but highest JSON validity
-        - Extreme positive bias (95.5% predicted 5 stars)
-        - Few-shot examples may have anchored model to positive sentiment
-        - Best format compliance but worst predictive performance
-        """)
+    for i, approach in enumerate(APPROACHES, 1):
+        with st.expander(f"Approach {i}: {approach['name']}", expanded=i == 1):
+            st.markdown(f"#### {approach['description']}")
+            
+            st.code(approach['template'], language="text")
+            
+            score = scores.get(approach['key'])
+            if score:
+                st.markdown("### Results")
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Accuracy", f"{score['accuracy']:.1f}%")
+                col2.metric("MAE", f"{score['mae']:.2f}" if score['mae'] is not None else "–")
+                col3.metric("JSON Validity", f"{score['json_validity']:.1f}%")
+                
+                st.markdown("### Prediction Distribution")
+                st.markdown(distribution_markdown(score['predictions'], results['sample_size']))
+            
+            if notes.get(approach['key']):
+                st.markdown("### Key Observations")
+                st.markdown("\n".join(f"- {note}" for note in notes[approach['key']]))
     
     st.markdown("---")
     
     st.markdown("## Comparative Analysis")
     
+    rows = results['approaches'] if results else []
     comparison_data = {
-        "Approach": ["Basic Direct", "Keyword-Guided", "Examples + CoT"],
-        "Accuracy": ["31.0%", "28.0%", "25.5%"],
-        "MAE": ["1.09", "1.10", "1.35"],
-        "JSON Validity": ["91.0%", "44.5%", "97.0%"],
-        "Primary Bias": ["Positive (4★)", "Neutral (3★)", "Extreme Positive (5★)"]
+        "Approach": [a['short_name'] for a in rows],
+        "Accuracy": [f"{a['accuracy']:.1f}%" for a in rows],
+        "MAE": [f"{a['mae']:.2f}" if a['mae'] is not None else "–" for a in rows],
+        "JSON Validity": [f"{a['json_validity']:.1f}%" for a in rows],
+        "Primary Bias": [a['primary_bias'] for a in rows]
     }
     
     st.table(comparison_data)
@@ -208,40 +131,41 @@ Review: [REVIEW_TEXT]
     
     st.markdown("## Key Findings & Discussion")
     
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("### Best Performing Approach")
-        st.success("**Approach 1: Basic Direct Prompt**")
-        st.markdown("""
-        **Reasons for Success:**
-        - Simplicity works best for small models (1.1B parameters)
-        - Clear, direct instructions without confusion
-        - Optimal balance between accuracy and JSON compliance
-        - Less prompt complexity = more consistent outputs
-        """)
-    
-    with col2:
-        st.markdown("### Common Challenges")
-        st.markdown("""
-        **All approaches struggled with:**
-        - Negative sentiment detection (rarely predicted 1-2 stars)
-        - Model size limitations affecting reasoning depth
-        - Inherent positive bias in predictions
-        - Difficulty maintaining JSON structure with complex prompts
-        """)
-    
-    st.markdown("### Why More Complex Prompts Underperformed")
-    st.markdown("""
-    1. **Keyword-Guided Approach:** Additional keywords introduced noise for the small model, 
-       causing it to default to middle ratings (3 stars) when uncertain.
-    
-    2. **Chain-of-Thought Approach:** Few-shot examples anchored the model toward extreme 
-       predictions, particularly 5-star ratings, reducing prediction diversity.
-    
-    3. **Model Capacity:** TinyLlama 1.1B has limited reasoning capacity. More complex 
-       instructions exceeded its ability to follow multi-step logic consistently.
-    """)
+    best = best_approach(results) if results else None
+    if best is None:
+        st.info("Findings appear here once an evaluation run has produced results.")
+    else:
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("### Best Performing Approach")
+            number = next(i for i, a in enumerate(APPROACHES, 1) if a['key'] == best['key'])
+            st.success(f"**Approach {number}: {best['name']}**")
+            mae = f"{best['mae']:.2f}" if best['mae'] is not None else "–"
+            st.markdown(f"- Accuracy {best['accuracy']:.1f}%, MAE {mae}, JSON validity {best['json_validity']:.1f}%")
+        
+        with col2:
+            st.markdown("### Common Challenges")
+            challenges = common_findings(results)
+            if challenges:
+                st.markdown("**All approaches struggled with:**\n" + "\n".join(f"- {line}" for line in challenges))
+            else:
+                st.markdown("No shortfall common to every approach.")
+        
+        # Written up from the TinyLlama run, where the plain prompt won;
+        # only shown while the results still say so.
+        if best['key'] == 'basic':
+            st.markdown("### Why More Complex Prompts Underperformed")
+            st.markdown(f"""
+            1. **Keyword-Guided Approach:** Additional keywords can introduce noise for a small model, 
+               pushing it towards middle ratings (3 stars) when uncertain.
+            
+            2. **Chain-of-Thought Approach:** Few-shot examples can anchor the model toward extreme 
+               predictions, particularly 5-star ratings, reducing prediction diversity.
+            
+            3. **Model Capacity:** A small model such as {results['model']} has limited reasoning capacity. More complex 
+               instructions can exceed its ability to follow multi-step logic consistently.
+            """)
     
     st.markdown("---")
     
@@ -274,109 +198,24 @@ Review: [REVIEW_TEXT]
     
     st.markdown("---")
     
-    with st.expander("View Complete Test Results"):
-        st.code("""
-YELP RATING PREDICTION - LOCAL MODEL (TinyLlama 1.1B)
-Sample Size: 200 reviews
-Device: MPS (Apple Silicon)
-
-============================================================
-APPROACH 1: BASIC DIRECT PROMPT
-============================================================
-Accuracy: 31.0%
-MAE: 1.09
-Valid JSON: 91.0%
-Failed: 18
-
-Predictions:
-  3★: 20 (10.0%)
-  4★: 114 (57.0%)
-  5★: 66 (33.0%)
-
-Actual Distribution:
-  1★: 18 (9.0%)
-  2★: 17 (8.5%)
-  3★: 33 (16.5%)
-  4★: 79 (39.5%)
-  5★: 53 (26.5%)
-
-============================================================
-APPROACH 2: KEYWORD-GUIDED PROMPT
-============================================================
-Accuracy: 28.0%
-MAE: 1.10
-Valid JSON: 44.5%
-Failed: 111
-
-Predictions:
-  1★: 1 (0.5%)
-  3★: 111 (55.5%)
-  4★: 54 (27.0%)
-  5★: 34 (17.0%)
-
-Actual Distribution:
-  1★: 18 (9.0%)
-  2★: 17 (8.5%)
-  3★: 33 (16.5%)
-  4★: 79 (39.5%)
-  5★: 53 (26.5%)
-
-============================================================
-APPROACH 3: EXAMPLES + CHAIN-OF-THOUGHT
-============================================================
-Accuracy: 25.5%
-MAE: 1.35
-Valid JSON: 97.0%
-Failed: 6
-
-Predictions:
-  3★: 7 (3.5%)
-  4★: 2 (1.0%)
-  5★: 191 (95.5%)
-
-Actual Distribution:
-  1★: 18 (9.0%)
-  2★: 17 (8.5%)
-  3★: 33 (16.5%)
-  4★: 79 (39.5%)
-  5★: 53 (26.5%)
-
-============================================================
-SUMMARY
-============================================================
-Best Overall: Approach 1 (Basic Direct Prompt)
-  - Highest Accuracy: 31.0%
-  - Lowest MAE: 1.09
-  - Strong JSON Validity: 91.0%
-
-Average Performance:
-  - Accuracy: 28.2%
-  - MAE: 1.18
-  - JSON Validity: 77.5%
-        """, language="text")
+    if results:
+        with st.expander("View Complete Test Results"):
+            st.code(format_report(results), language="text")
 
 elif page == "Task 2: User Dashboard":
-    import importlib.util
-    
-    user_path = os.path.join(os.path.dirname(__file__), 'task2', 'user_dashboard.py')
+    dashboard = load_dashboard("user_dashboard")
     
-    if os.path.exists(user_path):
-        spec = importlib.util.spec_from_file_location("user_dashboard", user_path)
-        user_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(user_module)
-        user_module.main()
+    if dashboard is not None:
+        with timed("user.render"):
+            dashboard.main()
     else:
         st.error("user_dashboard.py not found in task2 folder")
 
 elif page == "Task 2: Admin Dashboard":
-    import importlib.util
-    
-    admin_path = os.path.join(os.path.dirname(__file__), 'task2', 'admin_dashboard.py')
+    dashboard = load_dashboard("admin_dashboard")
     
-    if os.path.exists(admin_path):
-        spec = importlib.util.spec_from_file_location("admin_dashboard", admin_path)
-        admin_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(admin_module)
-        admin_module.main()
+    if dashboard is not None:
+        with timed("admin.render"):
+            dashboard.main()
     else:
-        st.error("admin_dashboard.py not found in task2 folder")
\ No newline at end of file
+        st.error("admin_dashboard.py not found in task2 folder")
@@ -0,0 +1,82 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'task2'))
+
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+import storage
+
+
+def make_frame(rows):
+    start = datetime(2024, 1, 1)
+    return pd.DataFrame({
+        'id': range(1_700_000_000_000, 1_700_000_000_000 + rows),
+        'timestamp': [(start + timedelta(minutes=5 * i)).isoformat() for i in range(rows)],
+        'rating': [i % 5 + 1 for i in range(rows)],
+        'review': [f"Review {i}: the product was not quite as shown and delivery was slow." for i in range(rows)],
+        'ai_response': "Thank you for your feedback.",
+        'summary': ["Customer is unhappy with delivery times." if i % 2 else '' for i in range(rows)],
+        'actions': ['["Contact the customer", "Review courier SLAs"]' if i % 2 else '' for i in range(rows)],
+    })
+
+
+def build(backend, rows, workdir):
+    path = os.path.join(workdir, f"feedback-{rows}.{backend}")
+    df = make_frame(rows)
+    if backend == 'sqlite':
+        store = storage.SQLiteStore(path)
+        with store._conn() as conn:
+            conn.executemany(
+                f"INSERT INTO feedback ({', '.join(storage.COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                df.itertuples(index=False, name=None)
+            )
+    elif backend == 'parquet':
+        storage.ParquetStore(path)._write_part(df)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def timed_run(at):
+    started = time.perf_counter()
+    at.run()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Admin dashboard rerun time vs number of stored reviews")
+    parser.add_argument("--rows", type=int, action="append")
+    parser.add_argument("--backend", choices=sorted(storage.BACKENDS), default="sqlite")
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args()
+
+    # Run from an empty directory so get_store() finds no legacy CSV to import.
+    workdir = tempfile.mkdtemp(prefix="admin-render-bench-")
+    os.chdir(workdir)
+    os.environ["FEEDBACK_BACKEND"] = args.backend
+    for rows in args.rows or [1_000, 10_000, 100_000]:
+        os.environ["FEEDBACK_PATH"] = build(args.backend, rows, workdir)
+        at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600)
+        at.secrets["HF_TOKEN"] = ""
+        at.run()
+        at.sidebar.radio[0].set_value("Task 2: Admin Dashboard")
+        first = timed_run(at)
+        line = f"{args.backend:>7} {rows:>9,} rows | first render {first:7.1f} ms"
+        for page_size in (10, 100):
+            [box for box in at.selectbox if box.label == "Per page"][0].set_value(page_size)
+            at.run()
+            rerun = min(timed_run(at) for _ in range(args.reruns))
+            assert not at.exception, at.exception
+            line += f" | rerun at {page_size:>3} per page {rerun:6.1f} ms ({len(at.markdown)} elements)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
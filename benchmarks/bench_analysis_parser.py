@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'task2'))
+
+from analysis import parse_analysis
+
+CORPUS = os.path.join(HERE, "analysis_outputs.jsonl")
+
+
+def split_parse(text):
+    # The parser this replaced: a split() per label, kept for comparison.
+    summary = ""
+    actions = []
+    if "SUMMARY:" in text:
+        summary = text.split("SUMMARY:")[1].split("ACTION")[0].strip().split("\n")[0].strip()
+    for i in range(1, 4):
+        if f"ACTION {i}:" in text:
+            action_text = text.split(f"ACTION {i}:")[1]
+            if f"ACTION {i+1}:" in action_text:
+                action_text = action_text.split(f"ACTION {i+1}:")[0]
+            action = action_text.strip().split("\n")[0].strip()
+            if action and len(action) > 10:
+                actions.append(action)
+    if summary and len(summary) > 20 and len(actions) >= 2:
+        return summary, actions
+    return None
+
+
+# Formatting changes a model makes without changing the content; every
+# variant of a usable output should still parse.
+MUTATIONS = [
+    lambda text, rng: text.lower(),
+    lambda text, rng: text.title(),
+    lambda text, rng: text.replace("\n", "\n\n"),
+    lambda text, rng: text.replace("\n", "\r\n"),
+    lambda text, rng: "\n".join(" " * rng.randint(0, 4) + line for line in text.split("\n")),
+    lambda text, rng: "\n".join(line + " " * rng.randint(0, 3) for line in text.split("\n")),
+    lambda text, rng: text.replace("SUMMARY:", "**SUMMARY:**").replace("ACTION 1:", "**ACTION 1:**"),
+    lambda text, rng: text.replace(": ", ":\n", 1),
+    lambda text, rng: "Here is my analysis.\n\n" + text,
+    lambda text, rng: text + "\n\nI hope this helps!",
+]
+
+
+def fuzz(corpus, variants, seed=0):
+    rng = random.Random(seed)
+    usable = [row['text'] for row in corpus if row['usable'] and "SUMMARY:" in row['text']]
+    cases = []
+    for _ in range(variants):
+        text = rng.choice(usable)
+        for mutation in rng.sample(MUTATIONS, rng.randint(1, 3)):
+            text = mutation(text, rng)
+        cases.append(text)
+    return cases
+
+
+def garbage(count, seed=0):
+    # Random fragments of the label vocabulary; must never raise and should
+    # almost never produce an analysis.
+    rng = random.Random(seed)
+    tokens = ["SUMMARY", "ACTION", "1", "2", ":", "-", "*", "\n", " ", "{", "}", "[", "]", '"', "ok", "#"]
+    return ["".join(rng.choice(tokens) for _ in range(rng.randint(0, 80))) for _ in range(count)]
+
+
+def time_parser(parser, texts, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            parser(text)
+    return (time.perf_counter() - started) / (repeat * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analysis parser: success rate on real and malformed outputs, and parse time")
+    parser.add_argument("--variants", type=int, default=2_000, help="fuzzed variants of the usable outputs")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--verbose", action="store_true", help="list every corpus entry")
+    args = parser.parse_args()
+
+    with open(CORPUS) as f:
+        corpus = [json.loads(line) for line in f]
+    usable = [row for row in corpus if row['usable']]
+    unusable = [row for row in corpus if not row['usable']]
+    variants = fuzz(corpus, args.variants)
+    noise = garbage(args.variants)
+
+    for name, parse in [("split", split_parse), ("single-pass", parse_analysis)]:
+        accepted = sum(parse(row['text']) is not None for row in usable)
+        rejected = sum(parse(row['text']) is None for row in unusable)
+        fuzzed = sum(parse(text) is not None for text in variants)
+        false_accepts = sum(parse(text) is not None for text in noise)
+        texts = [row['text'] for row in corpus] + variants
+        print(f"{name:>11}: corpus usable {accepted}/{len(usable)} parsed | malformed {rejected}/{len(unusable)} rejected | "
+              f"fuzzed {fuzzed / len(variants):6.1%} parsed | noise {false_accepts} accepted | "
+              f"{time_parser(parse, texts, args.repeat):5.1f} us/parse")
+        if args.verbose:
+            for row in corpus:
+                ok = (parse(row['text']) is not None) == row['usable']
+                print(f"    {'ok ' if ok else 'BAD'} {row['note']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+
+import pandas as pd
+
+import storage
+
+
+def make_frame(rows, review_chars):
+    start = datetime(2024, 1, 1)
+    filler = ("The product was not quite as shown in the image and delivery was slow. " * 64)[:review_chars]
+    return pd.DataFrame({
+        'id': range(1_700_000_000_000, 1_700_000_000_000 + rows),
+        'timestamp': [(start + timedelta(minutes=5 * i)).isoformat() for i in range(rows)],
+        'rating': [i % 5 + 1 for i in range(rows)],
+        'review': [f"{i}: {filler}" for i in range(rows)],
+        'ai_response': "Thank you for your feedback.",
+        'summary': '',
+        'actions': '',
+    })
+
+
+def build(backend, df):
+    workdir = tempfile.mkdtemp(prefix="feedback-bench-")
+    path = os.path.join(workdir, "feedback." + backend)
+    if backend == 'sqlite':
+        store = storage.SQLiteStore(path)
+        conn = store._conn()
+        with conn:
+            conn.executemany(
+                f"INSERT INTO feedback ({', '.join(storage.COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                df.itertuples(index=False, name=None)
+            )
+    elif backend == 'parquet':
+        store = storage.ParquetStore(path)
+        store._write_part(df)
+    else:
+        df.to_csv(path, index=False)
+        store = storage.CSVStore(path)
+    return store
+
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics read cost (rating + timestamp) vs amount of review text")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--review-chars", type=int, action="append")
+    parser.add_argument("--backend", choices=sorted(storage.BACKENDS), action="append")
+    args = parser.parse_args()
+
+    for chars in args.review_chars or [100, 2000]:
+        df = make_frame(args.rows, chars)
+        week_start = pd.Timestamp(df['timestamp'].iloc[len(df) // 2])
+        week_end = week_start + pd.Timedelta(days=7)
+        for backend in args.backend or sorted(storage.BACKENDS):
+            store = build(backend, df)
+            full = timed(store.load, 1)
+            columns = timed(lambda: store.load_columns(['timestamp', 'rating']))
+            week = timed(lambda: store.load_columns(['timestamp', 'rating'], week_start, week_end))
+            print(f"{backend:>7} {args.rows:,} rows x {chars:>4} chars: full load {full:8.1f} ms | "
+                  f"rating+timestamp {columns:7.1f} ms | one week {week:6.1f} ms")
+    print("(csv has no columnar path: its reads are served from the in-process load_cached() frame)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'task2'))
+
+from bench_admin_render import build
+
+PAGES = ["Task 2: User Dashboard", "Task 2: Admin Dashboard"]
+LOADERS = ["exec", "import"]
+
+# The old app.py loader: every run re-executes the dashboard module from its
+# file instead of reusing the imported module. It is swapped into a copy of
+# app.py so everything else in the script stays the same.
+EXEC_LOADER = """import importlib.util
+import os
+__file__ = {app!r}
+
+
+def exec_dashboard(name):
+    path = os.path.join(os.path.dirname(__file__), "task2", name + ".py")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+"""
+
+
+def timed_run(at):
+    started = time.perf_counter()
+    at.run()
+    return (time.perf_counter() - started) * 1000
+
+
+def measure(page, reruns, loader):
+    # Runs in a fresh interpreter so the first render pays every import.
+    from streamlit.testing.v1 import AppTest
+
+    script = os.path.join(ROOT, "app.py")
+    if loader == "exec":
+        with open(script) as f:
+            source = f.read()
+        assert "importlib.import_module(name)" in source
+        source = source.replace("importlib.import_module(name)", "exec_dashboard(name)")
+        script = os.path.abspath("exec_app.py")
+        with open(script, "w") as f:
+            f.write(EXEC_LOADER.format(app=os.path.abspath(os.path.join(ROOT, "app.py"))) + source)
+    at = AppTest.from_file(script, default_timeout=600)
+    at.secrets["HF_TOKEN"] = ""
+    home = timed_run(at)
+    at.sidebar.radio[0].set_value(page)
+    first = timed_run(at)
+    # Widget interactions: each one reruns the whole script.
+    if page == PAGES[0]:
+        interact = lambda i: at.select_slider[0].set_value(i % 5 + 1)
+    else:
+        interact = lambda i: at.toggle[0].set_value(i % 2 == 0)
+    samples = []
+    for i in range(reruns):
+        interact(i)
+        samples.append(timed_run(at))
+    assert not at.exception, at.exception
+    samples.sort()
+    return {
+        'page': page,
+        'loader': loader,
+        'home_ms': home,
+        'first_render_ms': first,
+        'rerun_median_ms': samples[len(samples) // 2],
+        'rerun_min_ms': samples[0],
+        # Streamlit itself loads plotly.graph_objects; plotly.express is the slow extra.
+        'plotly_express_loaded': 'plotly.express' in sys.modules,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="App cold start and per-interaction rerun overhead")
+    parser.add_argument("--rows", type=int, default=1_000)
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--loader", choices=LOADERS, action="append",
+                        help="exec: re-execute the dashboard file every run (the old app.py); "
+                             "import: import it once (default: both)")
+    parser.add_argument("--page", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.page:
+        print(json.dumps(measure(args.page, args.reruns, args.loader[0])))
+        return
+
+    workdir = tempfile.mkdtemp(prefix="app-startup-bench-")
+    env = dict(os.environ, FEEDBACK_BACKEND="sqlite", FEEDBACK_PATH=build("sqlite", args.rows, workdir))
+    for page in PAGES:
+        for loader in args.loader or LOADERS:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--page", page, "--reruns", str(args.reruns),
+                 "--loader", loader],
+                cwd=workdir, env=env, capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            print(f"{page:<24} | {loader:<6} | home {result['home_ms']:6.0f} ms | first render {result['first_render_ms']:6.0f} ms | "
+                  f"rerun median {result['rerun_median_ms']:6.1f} ms (min {result['rerun_min_ms']:5.1f}) | "
+                  f"plotly.express loaded: {result['plotly_express_loaded']}")
+
+
+if __name__ == "__main__":
+    main()
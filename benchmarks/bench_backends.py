@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+os.environ["LLM_CACHE"] = "0"
+
+import inference
+from analysis import generate_admin_analysis, parse_analysis
+from bench_inference_client import PARAMETERS, percentiles
+from bench_rollup import build, make_frame
+from stub_server import start_stub
+
+
+def time_calls(client, calls):
+    replies, analyses = [], []
+    for i in range(calls):
+        started = time.perf_counter()
+        client.generate(f"Customer gave {i % 5 + 1}/5 stars: \"Order {i}\"\n\nYour response:", PARAMETERS)
+        replies.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        client.generate(f"Review: \"Order {i}\"\nSUMMARY: [one sentence]", PARAMETERS, validate=parse_analysis)
+        analyses.append(time.perf_counter() - started)
+    return replies, analyses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call latency for each inference backend, and an offline batch run")
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="model time per call for the http and stub backends")
+    parser.add_argument("--local-model", help="model for the local backend (.gguf file or transformers id)")
+    parser.add_argument("--batch-rows", type=int, default=2_000)
+    args = parser.parse_args()
+
+    server, url = start_stub(latency=args.latency)
+    clients = {
+        'http': inference.InferenceClient(url=url),
+        'stub': inference.StubClient(latency=args.latency),
+    }
+    if args.local_model:
+        clients['local'] = inference.LocalClient(args.local_model)
+    for name, client in clients.items():
+        try:
+            replies, analyses = time_calls(client, args.calls)
+        except inference.InferenceError as e:
+            print(f"{name:>5}: skipped ({e})")
+            continue
+        print(f"{name:>5}: reply {percentiles(replies)}")
+        print(f"       analysis {percentiles(analyses)}")
+    server.shutdown()
+
+    # The whole admin batch job with no network and no model. Against a
+    # zero-latency stub the 20 ms batching window would be all that gets
+    # measured, so it is off unless set.
+    os.environ["INFERENCE_BACKEND"] = "stub"
+    os.environ.setdefault("INFERENCE_BATCH_WINDOW_MS", "0")
+    from batch_analysis import analyze_pending
+    store = build('sqlite', make_frame(args.batch_rows))
+    stats = analyze_pending(store, rate=0)
+    analyzed = store.search(analyzed=True, limit=0)[1]
+    print(f"offline batch (stub backend): {stats['total']:,} rows in {stats['elapsed']:.2f}s, "
+          f"{stats['rows_per_sec']:,.0f} rows/s | {analyzed:,} rows now analyzed")
+    assert generate_admin_analysis(2, "Arrived broken.")[0].startswith("Customer shared feedback")
+
+
+if __name__ == "__main__":
+    main()
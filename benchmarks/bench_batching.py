@@ -0,0 +1,71 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+os.environ["LLM_CACHE"] = "0"
+
+from batching import MicroBatcher, format_histogram
+from inference import InferenceClient
+from bench_inference_client import PARAMETERS
+from stub_server import start_stub
+
+MODES = ["direct", "fan-out", "batched"]
+
+
+def run_load(client, concurrency, per_caller):
+    # `concurrency` callers, like that many Streamlit sessions, each asking
+    # for per_caller replies one after another.
+    def caller(n):
+        latencies = []
+        for i in range(per_caller):
+            started = time.perf_counter()
+            client.generate(f"Customer {n} review {i}\n\nYour response:", PARAMETERS)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(sum(pool.map(caller, range(concurrency)), []))
+    elapsed = time.perf_counter() - started
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    return len(latencies) / elapsed, pick(0.5), pick(0.95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput vs concurrency: one call per prompt vs micro-batching")
+    parser.add_argument("--concurrency", type=int, action="append")
+    parser.add_argument("--per-caller", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub model time per request")
+    parser.add_argument("--slots", type=int, default=4, help="requests the stub works on at once")
+    parser.add_argument("--window-ms", type=float, default=20)
+    parser.add_argument("--max-batch", type=int, default=8)
+    args = parser.parse_args()
+
+    server, url = start_stub(latency=args.latency, max_concurrency=args.slots)
+    print(f"stub: {args.latency * 1000:.0f} ms per request, {args.slots} slots | "
+          f"window {args.window_ms:.0f} ms, max batch {args.max_batch}")
+    for concurrency in args.concurrency or [1, 4, 16, 64]:
+        for mode in MODES:
+            client = InferenceClient(url=url, pool_size=64, batch_inputs=mode == "batched")
+            if mode != "direct":
+                client.batcher = MicroBatcher(args.window_ms / 1000, args.max_batch, workers=args.slots)
+            before = dict(server.stats)
+            throughput, p50, p95 = run_load(client, concurrency, args.per_caller)
+            requests_sent = server.stats['requests'] - before['requests']
+            print(f"{concurrency:>3} callers | {mode:<7} | {throughput:7.1f} replies/s | p50 {p50:7.1f} ms | "
+                  f"p95 {p95:7.1f} ms | {requests_sent:>4} HTTP requests")
+            last = client.batcher
+    stats = last.stats()
+    print(f"\nbatched, {concurrency} callers: {stats['prompts']} prompts in {stats['batches']} batches")
+    print("batch size:")
+    print(format_histogram(stats['batch_sizes']))
+    print("queue wait:")
+    print(format_histogram(stats['queue_wait']))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
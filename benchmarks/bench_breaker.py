@@ -0,0 +1,73 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+os.environ["LLM_CACHE"] = "0"
+os.environ["INFERENCE_BATCH_WINDOW_MS"] = "0"
+os.environ["INFERENCE_BACKEND"] = "http"
+
+from analysis import generate_admin_analysis
+from inference import get_client
+from stub_server import start_stub
+
+
+def analyze(calls):
+    # Latencies of admin analyses, and how many came from the model rather
+    # than the rating template.
+    latencies, answered = [], 0
+    for i in range(calls):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            summary, _ = generate_admin_analysis(i % 5 + 1, f"Order {i} never arrived.")
+        latencies.append(time.perf_counter() - started)
+        answered += "(rated " not in summary
+    return latencies, answered
+
+
+def report(phase, latencies, answered):
+    latencies = sorted(latencies)
+    print(f"  {phase:<9} {answered:>3}/{len(latencies)} from the model | median {latencies[len(latencies) // 2] * 1000:8.2f} ms | "
+          f"max {latencies[-1] * 1000:8.1f} ms | total {sum(latencies):6.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Admin analysis latency through an endpoint outage, with and without the circuit breaker")
+    parser.add_argument("--timeout", type=float, default=2.0, help="client read timeout; the app default is 30")
+    parser.add_argument("--calls", type=int, default=20, help="analyses during the outage")
+    parser.add_argument("--failures", type=int, default=5, help="failures in a row that open the circuit")
+    parser.add_argument("--cooldown", type=float, default=1.0, help="seconds before the half-open probe")
+    args = parser.parse_args()
+
+    os.environ["INFERENCE_READ_TIMEOUT"] = str(args.timeout)
+    os.environ["INFERENCE_BREAKER_COOLDOWN"] = str(args.cooldown)
+    server, url = start_stub()
+    server.hang = args.timeout + 1
+    print(f"outage: requests hang past the {args.timeout:.0f}s read timeout")
+
+    for mode, failures in [("no breaker", 0), ("breaker", args.failures)]:
+        # A separate endpoint URL per mode, so each gets a fresh client.
+        os.environ["INFERENCE_URL"] = f"{url}?mode={failures}"
+        os.environ["INFERENCE_BREAKER_FAILURES"] = str(failures)
+        get_client()
+        print(f"{mode}:")
+        server.down = False
+        report("healthy", *analyze(5))
+        server.down = True
+        report("outage", *analyze(args.calls))
+        server.down = False
+        time.sleep(args.cooldown)
+        report("recovered", *analyze(5))
+        breaker = get_client().breaker
+        if breaker is not None:
+            status = breaker.status()
+            print(f"  breaker: {status['state']}, opened {status['opened']}x, "
+                  f"{status['rejected']} calls refused, {status['failures']} failures")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+
+import storage
+
+
+def make_entry(rating, review):
+    return {
+        'id': int(datetime.now().timestamp() * 1000),
+        'timestamp': datetime.now().isoformat(),
+        'rating': rating,
+        'review': review,
+        'ai_response': 'Thank you for your feedback.',
+        'summary': '',
+        'actions': ''
+    }
+
+
+def run(backend, writers, per_writer):
+    workdir = tempfile.mkdtemp(prefix="feedback-bench-")
+    path = os.path.join(workdir, "feedback." + ("db" if backend == "sqlite" else "csv"))
+    store = storage.BACKENDS[backend](path)
+
+    inserted = []
+    updated = {}
+    errors = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(writers)
+
+    def customer(n):
+        start_barrier.wait()
+        for i in range(per_writer):
+            try:
+                feedback_id = store.append(make_entry(random.randint(1, 5), f"writer {n} review {i}"))
+                with lock:
+                    inserted.append(feedback_id)
+            except Exception as e:
+                errors.append(e)
+
+    def admin(n):
+        start_barrier.wait()
+        for i in range(per_writer):
+            with lock:
+                targets = list(inserted)
+            if not targets:
+                time.sleep(0.001)
+                continue
+            feedback_id = random.choice(targets)
+            summary = f"admin {n} pass {i}"
+            try:
+                if store.update_row(feedback_id, summary=summary):
+                    with lock:
+                        updated[feedback_id] = summary
+            except Exception as e:
+                errors.append(e)
+
+    # Three customers for every admin, like several open user sessions and
+    # one admin clicking "Regenerate".
+    threads = [
+        threading.Thread(target=admin if n % 4 == 3 else customer, args=(n,))
+        for n in range(writers)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    df = store.load()
+    expected = len(inserted)
+    lost_rows = expected - len(set(df['id']) & set(inserted))
+    by_id = df.set_index('id')['summary']
+    # An update can only be lost if the row no longer carries *some* admin
+    # summary; which admin wins a race on the same id is not defined.
+    lost_updates = sum(1 for feedback_id in updated if not str(by_id.get(feedback_id, '')).startswith('admin'))
+    writes = expected + len(updated)
+
+    print(f"{backend:>6}: {writers} writers, {expected} inserts, {len(updated)} updated ids, "
+          f"{elapsed:.2f}s, {writes / elapsed:,.0f} writes/s, "
+          f"duplicate ids={len(inserted) - len(set(inserted))}, lost rows={lost_rows}, "
+          f"lost updates={lost_updates}, errors={len(errors)}")
+    return lost_rows == 0 and lost_updates == 0 and not errors and len(set(inserted)) == len(inserted)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent writer stress test for the feedback store")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--per-writer", type=int, default=200)
+    parser.add_argument("--backend", choices=sorted(storage.BACKENDS), action="append")
+    args = parser.parse_args()
+
+    ok = True
+    for backend in args.backend or sorted(storage.BACKENDS):
+        ok = run(backend, args.writers, args.per_writer) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+
+import numpy as np
+import pandas as pd
+
+import dedupe
+from bench_rollup import build
+
+OPENERS = ["I ordered", "We bought", "My husband got", "Picked up", "I received", "Got", "Finally tried",
+           "Second time buying", "My order of", "Just got"]
+PRODUCTS = ["the blue running shoes", "a coffee grinder", "the standing desk", "two phone cases", "the garden hose",
+            "a winter jacket", "the wireless earbuds", "a set of pans", "the kids' bike", "a yoga mat",
+            "the desk lamp", "a rice cooker", "the backpack", "a pack of batteries", "the office chair",
+            "a water bottle", "the electric kettle", "a board game", "the bed sheets", "a laptop stand"]
+EXPERIENCES = [
+    "and it arrived two days late with the box crushed", "and it works exactly as described",
+    "but the colour is nothing like the photos", "and the quality is far better than expected",
+    "but one part was missing from the package", "and setup took less than five minutes",
+    "but it stopped working after a week", "and the delivery driver was really friendly",
+    "but the size runs small so order one up", "and customer support sorted my question in minutes",
+    "but the refund took three weeks to come through", "and it was cheaper than in the shops",
+    "but the instructions were only in German", "and it feels sturdy and well made",
+    "but it smells of plastic even after airing it out", "and it came in recyclable packaging",
+]
+CLOSERS = ["Would buy again.", "Not impressed.", "Five stars from me.", "Please fix this.", "Thanks a lot!",
+           "Will not order here again.", "Happy overall.", "Mixed feelings.", "Highly recommended.", ""]
+
+
+def distinct_review(rng):
+    return f"{rng.choice(OPENERS)} {rng.choice(PRODUCTS)} {rng.choice(EXPERIENCES)}. {rng.choice(CLOSERS)}".strip()
+
+
+EDITS = ["case", "punctuation", "spacing", "appended word", "typo"]
+
+
+def variant(rng, review, edit):
+    # What copy-paste and spam bursts look like: the same text with a
+    # different case, punctuation or spacing, a word tacked on, or a typo.
+    if edit == "case":
+        return review.upper() if rng.random() < 0.5 else review.lower()
+    if edit == "punctuation":
+        return review.replace(".", rng.choice(["!!!", "...", ""])).replace(",", "") + rng.choice(["", " :(", " !!"])
+    if edit == "spacing":
+        return "  ".join(review.split()) + rng.choice(["", "\n", " "])
+    if edit == "appended word":
+        return review + " " + rng.choice(["Thanks", "ok", "Seriously.", "Again."])
+    i = rng.randrange(1, len(review) - 2)
+    return review[:i] + review[i + 1] + review[i] + review[i + 2:]
+
+
+def make_stream(rows, duplicate_share, seed=0):
+    # Reviews in arrival order, with the index of the review each
+    # near-duplicate was made from (-1 for an original) and its edit.
+    rng = random.Random(seed)
+    reviews, ratings, sources, edits = [], [], [], []
+    for i in range(rows):
+        if reviews and rng.random() < duplicate_share:
+            # Bursts: mostly copies of something recent.
+            source = rng.randrange(max(0, i - 50), i) if rng.random() < 0.7 else rng.randrange(i)
+            while sources[source] >= 0:
+                source = sources[source]
+            edits.append(rng.choice(EDITS))
+            reviews.append(variant(rng, reviews[source], edits[-1]))
+            ratings.append(ratings[source])
+            sources.append(source)
+        else:
+            reviews.append(distinct_review(rng))
+            ratings.append(rng.randint(1, 5))
+            sources.append(-1)
+            edits.append(None)
+    return reviews, ratings, sources, edits
+
+
+def score(index, reviews, sources, edits):
+    # Share of the copies of each edit kind that landed in the group of the
+    # review they were made from, and share of the originals put in a group
+    # with a different text (identical originals are real duplicates). Ids
+    # are 1..n in stream order.
+    found, made = Counter(), Counter()
+    false_positives = 0
+    for feedback_id, (review, source, edit) in enumerate(zip(reviews, sources, edits), 1):
+        group = index.group_of(feedback_id)
+        if source >= 0:
+            made[edit] += 1
+            found[edit] += group == index.group_of(source + 1)
+        elif group != feedback_id and reviews[group - 1] != review:
+            false_positives += 1
+    originals = len(reviews) - sum(made.values())
+    return {edit: found[edit] / made[edit] for edit in EDITS if made[edit]}, false_positives / max(originals, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate detection: hit rate, model calls saved and lookup cost")
+    parser.add_argument("--rows", type=int, default=20_000, help="reviews in the synthetic stream")
+    parser.add_argument("--duplicate-share", type=float, default=0.3)
+    parser.add_argument("--build-rows", type=int, default=1_000_000, help="store size for the build and sync timing")
+    args = parser.parse_args()
+
+    reviews, ratings, sources, edits = make_stream(args.rows, args.duplicate_share)
+    print(f"{args.rows:,} reviews, {sum(s >= 0 for s in sources):,} made as near-duplicates")
+    for max_distance in [2, 3, 4, 6]:
+        path = os.path.join(tempfile.mkdtemp(prefix="feedback-bench-"), "dedupe")
+        index = dedupe.DuplicateIndex(path, max_distance)
+        index.ready.set()  # nothing stored yet to sync with
+        latencies = []
+        for feedback_id, (rating, review) in enumerate(zip(ratings, reviews), 1):
+            started = time.perf_counter()
+            index.add(feedback_id, rating, review)
+            latencies.append(time.perf_counter() - started)
+        recall, false_positives = score(index, reviews, sources, edits)
+        saved = args.rows - index.stats()['groups']
+        latencies.sort()
+        print(f"max distance {max_distance} | model calls saved {saved:,} ({saved / args.rows:.1%}) | "
+              f"false positives {false_positives:.2%} | add() p50 {latencies[len(latencies) // 2] * 1000:.3f} ms "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.3f} ms")
+        print("    copies found: " + ", ".join(f"{edit} {share:.0%}" for edit, share in recall.items()))
+
+    # Indexing an existing store from scratch, then reopening it from the sidecar.
+    rng = random.Random(1)
+    rows = args.build_rows
+    reviews, ratings, _, _ = make_stream(rows, args.duplicate_share, seed=1)
+    frame = pd.DataFrame({
+        'id': np.arange(1, rows + 1),
+        'timestamp': pd.Timestamp("2024-01-01").isoformat(),
+        'rating': ratings,
+        'review': reviews,
+        'ai_response': "Thank you for your feedback.",
+        'summary': '',
+        'actions': '',
+    })
+    store = build('sqlite', frame)
+    del frame, reviews, ratings
+    started = time.perf_counter()
+    index = dedupe.DuplicateIndex(store.path + ".dedupe")
+    index.sync(store)
+    built = time.perf_counter() - started
+    started = time.perf_counter()
+    reopened = dedupe.DuplicateIndex(store.path + ".dedupe")
+    reopened.sync(store)
+    loaded = time.perf_counter() - started
+    latencies = []
+    for i in range(2_000):
+        started = time.perf_counter()
+        reopened.add(rows + 1 + i, rng.randint(1, 5), distinct_review(rng))
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    print(f"{rows:,} stored reviews: index built in {built:.1f}s, reopened from the sidecar in {loaded:.1f}s "
+          f"({os.path.getsize(store.path + '.dedupe') / 2**20:.0f} MB), {reopened.stats()['groups']:,} groups; "
+          f"add() then p50 {latencies[len(latencies) // 2] * 1000:.3f} ms p99 {latencies[int(len(latencies) * 0.99)] * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+
+import requests
+
+from inference import InferenceClient
+from stub_server import start_stub
+
+PARAMETERS = {"max_new_tokens": 100, "temperature": 0.7, "top_p": 0.9, "return_full_text": False}
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    return f"p50 {pick(0.5):6.2f} ms | p95 {pick(0.95):6.2f} ms | mean {statistics.mean(samples) * 1000:6.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call latency: cold requests.post vs pooled keep-alive client")
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.0, help="stub server latency in seconds")
+    args = parser.parse_args()
+
+    server, url = start_stub(latency=args.latency)
+    payload = {"inputs": "Customer gave 5/5 stars", "parameters": PARAMETERS}
+
+    cold = []
+    before = server.stats['connections']
+    for _ in range(args.calls):
+        started = time.perf_counter()
+        with requests.Session() as session:
+            # What a bare requests.post does: new session, new connection.
+            session.post(url, json=payload, timeout=30).json()
+        cold.append(time.perf_counter() - started)
+    cold_connections = server.stats['connections'] - before
+
+    client = InferenceClient(url=url)
+    warm = []
+    before = server.stats['connections']
+    for _ in range(args.calls):
+        started = time.perf_counter()
+        client.generate(payload["inputs"], PARAMETERS)
+        warm.append(time.perf_counter() - started)
+    warm_connections = server.stats['connections'] - before
+
+    print(f"cold (new connection per call): {percentiles(cold)} | {cold_connections} connections")
+    print(f"warm (pooled keep-alive):       {percentiles(warm)} | {warm_connections} connections")
+    print("(plain HTTP against a local stub; TLS handshakes to the hosted API widen the gap)")
+    server.shutdown()
+
+    # Retry policy: the first two calls get 503 + Retry-After, the client
+    # should still succeed without the caller noticing.
+    server, url = start_stub(fail_first=2)
+    client = InferenceClient(url=url, backoff=0.05)
+    text = client.generate("Customer gave 2/5 stars", PARAMETERS)
+    print(f"retry on 503: ok={bool(text)} requests={client.stats['requests']} retries={client.stats['retries']}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+
+import llm_cache
+from inference import InferenceClient
+from llm_cache import LLMCache
+from stub_server import start_stub
+
+PARAMETERS = {"max_new_tokens": 100, "temperature": 0.7, "top_p": 0.9, "return_full_text": False}
+
+
+def run(url, prompts, cache):
+    llm_cache._cache = cache
+    os.environ["LLM_CACHE"] = "1" if cache else "0"
+    client = InferenceClient(url=url)
+    started = time.perf_counter()
+    for prompt in prompts:
+        client.generate(prompt, PARAMETERS)
+    return time.perf_counter() - started, client.stats['requests']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API calls and wall time with and without the LLM response cache")
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--distinct", type=int, default=100, help="distinct prompts in the traffic")
+    parser.add_argument("--latency", type=float, default=0.02, help="stub server latency in seconds")
+    args = parser.parse_args()
+
+    server, url = start_stub(latency=args.latency)
+    random.seed(0)
+    prompts = [f"Customer gave {i % 5 + 1}/5 stars: \"review number {i}\"" for i in range(args.distinct)]
+    traffic = [random.choice(prompts) for _ in range(args.calls)]
+
+    elapsed, calls = run(url, traffic, None)
+    print(f"no cache: {args.calls} generations, {calls} API calls, {elapsed:.2f}s")
+
+    workdir = tempfile.mkdtemp(prefix="llm-cache-bench-")
+    cache = LLMCache(os.path.join(workdir, "llm_cache.db"))
+    elapsed, calls = run(url, traffic, cache)
+    print(f"cold cache: {args.calls} generations, {calls} API calls, {elapsed:.2f}s | {cache.stats}")
+    elapsed, calls = run(url, traffic, cache)
+    print(f"warm cache: {args.calls} generations, {calls} API calls, {elapsed:.2f}s")
+
+    # LRU bound: with room for half the prompts, the oldest entries go.
+    small = LLMCache(os.path.join(workdir, "small.db"), max_entries=args.distinct // 2)
+    small.evict_every = 10
+    run(url, prompts, small)
+    count = small._conn().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+    print(f"bounded cache (max {small.max_entries}): {count} entries kept, {small.stats['evicted']} evicted")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+
+import storage
+
+
+def fill(store, rows):
+    start = datetime(2025, 1, 1)
+    for i in range(rows):
+        store.append({
+            'id': 0,
+            'timestamp': (start + timedelta(minutes=i)).isoformat(),
+            'rating': i % 5 + 1,
+            'review': f"Review number {i}: the product was mostly as described, delivery took a while.",
+            'ai_response': "Thank you for your feedback. We appreciate you taking the time to share your experience.",
+            'summary': '',
+            'actions': ''
+        })
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def run(backend, rows):
+    workdir = tempfile.mkdtemp(prefix="feedback-bench-")
+    store = storage.BACKENDS[backend](os.path.join(workdir, "feedback." + backend))
+    fill(store, rows)
+
+    full = timed(store.load, 3)
+    store.load_cached()
+    hit = timed(store.load_cached, 1000)
+
+    def append_then_load():
+        fill(store, 1)
+        store.load_cached()
+    tail = timed(append_then_load, 20)
+
+    print(f"{backend:>6} {rows:>8,} rows: full load {full * 1000:8.2f} ms | "
+          f"cached, unchanged {hit * 1e6:7.1f} us | cached, one new row {tail * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="load_data cost: full parse vs cached/incremental refresh")
+    parser.add_argument("--rows", type=int, action="append")
+    parser.add_argument("--backend", choices=sorted(storage.BACKENDS), action="append")
+    args = parser.parse_args()
+
+    for backend in args.backend or sorted(storage.BACKENDS):
+        for rows in args.rows or [1000, 10000, 50000]:
+            run(backend, rows)
+
+
+if __name__ == "__main__":
+    main()
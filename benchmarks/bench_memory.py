@@ -0,0 +1,85 @@
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+
+import pandas as pd
+
+import storage
+
+RESPONSES = [
+    "Thank you so much for your wonderful feedback! We're thrilled to hear you had a great experience with us. We look forward to serving you again!",
+    "Thank you for your feedback. We appreciate you taking the time to share your experience. We're always working to improve!",
+    "We sincerely apologize for not meeting your expectations. Your feedback is invaluable to us, and we're committed to making things right.",
+]
+ACTIONS = json.dumps([
+    "Reach out immediately to apologize and resolve issue",
+    "Conduct internal investigation into problems raised",
+    "Offer compensation to recover customer relationship"
+])
+
+
+def make_csv(rows):
+    start = datetime(2025, 1, 1)
+    buf = io.StringIO()
+    pd.DataFrame({
+        'id': range(1_700_000_000_000, 1_700_000_000_000 + rows),
+        'timestamp': [(start + timedelta(seconds=30 * i)).isoformat() for i in range(rows)],
+        'rating': [i % 5 + 1 for i in range(rows)],
+        'review': [f"Review {i}: product was not quite as shown in the image, delivery was slow" for i in range(rows)],
+        'ai_response': [RESPONSES[i % 3] for i in range(rows)],
+        'summary': ['' if i % 2 else f"Customer expressed dissatisfaction (rated {i % 5 + 1}/5)" for i in range(rows)],
+        'actions': ['' if i % 2 else ACTIONS for i in range(rows)],
+    }).to_csv(buf, index=False)
+    return buf.getvalue()
+
+
+def frame_bytes(df):
+    # pandas' deep memory_usage counts a shared Python object once per row;
+    # count each distinct object once (one level into tuples) instead.
+    total = 0
+    for col in df.columns:
+        series = df[col]
+        if series.dtype != object:
+            total += int(series.memory_usage(index=False, deep=True))
+            continue
+        total += 8 * len(series)
+        seen = set()
+        for value in series:
+            for obj in (value, *value) if isinstance(value, tuple) else (value,):
+                if id(obj) not in seen:
+                    seen.add(id(obj))
+                    total += sys.getsizeof(obj)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-row memory of the feedback frame: inferred vs typed schema")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    text = make_csv(args.rows)
+
+    started = time.perf_counter()
+    inferred = pd.read_csv(io.StringIO(text))
+    inferred_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    typed = storage.to_typed(pd.read_csv(io.StringIO(text)))
+    typed_s = time.perf_counter() - started
+
+    before = frame_bytes(inferred)
+    after = frame_bytes(typed)
+    print(f"{args.rows:,} rows")
+    print(f"  inferred dtypes: {before / args.rows:7.1f} bytes/row ({before / 2**20:,.0f} MiB), load {inferred_s:.2f}s")
+    print(f"  typed schema:    {after / args.rows:7.1f} bytes/row ({after / 2**20:,.0f} MiB), load {typed_s:.2f}s")
+    print(f"  dtypes: {', '.join(f'{c}={t}' for c, t in typed.dtypes.items())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+os.environ["LLM_CACHE"] = "0"
+os.environ["INFERENCE_BATCH_WINDOW_MS"] = "0"
+
+import metrics
+from inference import StubClient
+from bench_inference_client import PARAMETERS
+
+
+def per_call(fn, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def timed_block():
+    with metrics.timed("bench.block"):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of the metrics layer, recording and switched off")
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    client = StubClient()
+    generate = lambda: client.generate("Customer gave 5/5 stars\n\nYour response:", PARAMETERS)
+    for enabled in [True, False]:
+        metrics.ENABLED = enabled
+        label = "recording" if enabled else "off (APP_METRICS=0)"
+        print(f"{label:<20} | timed() {per_call(timed_block, args.calls):5.2f} us | "
+              f"count() {per_call(lambda: metrics.count('bench', outcome='ok'), args.calls):5.2f} us | "
+              f"stub generate() {per_call(generate, args.calls // 10):6.2f} us")
+    metrics.ENABLED = True
+    started = time.perf_counter()
+    text = metrics.prometheus_text()
+    print(f"prometheus_text(): {len(text.splitlines())} lines in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'task1'))
+os.environ["LLM_CACHE"] = "0"
+os.environ["INFERENCE_BATCH_WINDOW_MS"] = "0"
+
+import pandas as pd
+
+import rating_eval
+from inference import InferenceClient
+from stub_server import start_stub
+
+WORDS = {1: "awful", 2: "disappointing", 3: "okay", 4: "good", 5: "amazing"}
+
+
+def make_dataset(path, rows):
+    pd.DataFrame({
+        'text': [f"Review {i}: the food was {WORDS[i % 5 + 1]} and the service was fine." for i in range(rows)],
+        'stars': [i % 5 + 1 for i in range(rows)],
+    }).to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Task 1 evaluation: parallel speedup and checkpoint resume")
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub model time per prediction")
+    parser.add_argument("--workers", type=int, action="append")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="rating-eval-bench-")
+    data = os.path.join(workdir, "reviews.csv")
+    make_dataset(data, args.rows)
+    dataset = rating_eval.load_dataset(data, sample=0)
+    server, url = start_stub(latency=args.latency)
+    client = InferenceClient(url=url, pool_size=64)
+    header = {'data': data, 'sample': len(dataset)}
+    pairs = len(dataset) * len(rating_eval.APPROACHES)
+
+    for workers in args.workers or [1, 8, 32]:
+        started = time.perf_counter()
+        records = rating_eval.evaluate(dataset, client=client, workers=workers)
+        elapsed = time.perf_counter() - started
+        print(f"{workers:>3} workers: {len(records)} predictions in {elapsed:6.2f}s ({len(records) / elapsed:6.1f}/s)")
+
+    # Interrupt a checkpointed run halfway, then resume it.
+    checkpoint = os.path.join(workdir, "run.checkpoint.jsonl")
+
+    def interrupt(done, total, elapsed):
+        if done >= total // 2:
+            raise KeyboardInterrupt
+
+    before = server.stats['requests']
+    try:
+        rating_eval.evaluate(dataset, client=client, workers=8, checkpoint=checkpoint, header=header, progress=interrupt)
+    except KeyboardInterrupt:
+        pass
+    first = server.stats['requests'] - before
+    saved = len(rating_eval.read_checkpoint(checkpoint, header))
+    before = server.stats['requests']
+    records = rating_eval.evaluate(dataset, client=client, workers=8, checkpoint=checkpoint, header=header)
+    resumed = server.stats['requests'] - before
+    print(f"interrupted after {first} calls ({saved} checkpointed), resumed with {resumed} calls -> "
+          f"{len(records)}/{pairs} predictions")
+
+    results = rating_eval.build_results(dataset, records, "stub", "Stub (no model)", "CPU")
+    for approach in results['approaches']:
+        print(f"  {approach['short_name']:<15} accuracy {approach['accuracy']:5.1f}% | MAE {approach['mae']} | "
+              f"JSON validity {approach['json_validity']:5.1f}%")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+
+import pandas as pd
+
+import storage
+
+
+def make_frame(rows):
+    start = datetime(2023, 1, 1)
+    return pd.DataFrame({
+        'id': range(1_700_000_000_000, 1_700_000_000_000 + rows),
+        'timestamp': [(start + timedelta(minutes=3 * i)).isoformat() for i in range(rows)],
+        'rating': [i * 7 % 5 + 1 for i in range(rows)],
+        'review': "The product was not quite as shown in the image and delivery was slow.",
+        'ai_response': "Thank you for your feedback.",
+        'summary': '',
+        'actions': '',
+    })
+
+
+def build(backend, df):
+    workdir = tempfile.mkdtemp(prefix="feedback-bench-")
+    path = os.path.join(workdir, "feedback." + backend)
+    if backend == 'sqlite':
+        store = storage.SQLiteStore(path)
+        with store._conn() as conn:
+            conn.executemany(
+                f"INSERT INTO feedback ({', '.join(storage.COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                df.itertuples(index=False, name=None)
+            )
+    elif backend == 'parquet':
+        store = storage.ParquetStore(path)
+        store._write_part(df)
+    else:
+        df.to_csv(path, index=False)
+        store = storage.CSVStore(path)
+    return store
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def overview_from_rollup(store):
+    counts = store.rollup().sum()
+    return int(counts.sum()), (counts * counts.index).sum(), counts
+
+
+def overview_from_scan(store):
+    ratings = store.load_columns(['timestamp', 'rating'])['rating']
+    return len(ratings), ratings.mean(), ratings.value_counts()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics overview: stored rollup vs scanning every review")
+    parser.add_argument("--rows", type=int, action="append")
+    parser.add_argument("--backend", choices=sorted(storage.BACKENDS), action="append")
+    args = parser.parse_args()
+
+    entry = {'id': 0, 'timestamp': datetime(2024, 6, 1).isoformat(), 'rating': 4,
+             'review': "Arrived on time.", 'ai_response': "Thanks!", 'summary': '', 'actions': ''}
+    for rows in args.rows or [10_000, 100_000, 1_000_000]:
+        df = make_frame(rows)
+        for backend in args.backend or sorted(storage.BACKENDS):
+            store = build(backend, df)
+            build_ms = timed(store.rollup, 1)  # file backends build it once here
+            rollup = timed(lambda: overview_from_rollup(store))
+            scan = timed(lambda: overview_from_scan(store), 1)
+            append = timed(lambda: store.append(dict(entry)), 20)
+            mismatched = store.check_rollup()
+            print(f"{backend:>7} {rows:>9,} rows: overview from rollup {rollup:6.2f} ms | full scan {scan:8.1f} ms | "
+                  f"first build {build_ms:7.1f} ms | append {append:5.2f} ms | "
+                  f"check {'ok' if not mismatched else f'{len(mismatched)} days differ'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+
+import pandas as pd
+
+import storage
+from bench_rollup import build
+
+PHRASES = [
+    "The product was not quite as shown in the image and delivery was slow.",
+    "Great quality, arrived early and works perfectly.",
+    "Packaging was damaged but the item itself is fine.",
+    "Customer support never answered my refund request.",
+    "Decent value for the price, would buy again.",
+]
+QUERIES = [
+    ("keyword", dict(query="refund")),
+    ("rare keyword", dict(query="zeppelin")),
+    ("two keywords", dict(query="delivery slow")),
+    ("rating 1-2", dict(ratings=[1, 2])),
+    ("one week", dict(start="2024-03-01", end="2024-03-08")),
+    ("not analyzed", dict(analyzed=False)),
+    ("keyword + rating + week", dict(query="damaged", ratings=[2, 3], start="2024-03-01", end="2024-03-08")),
+    ("keyword + not analyzed", dict(query="refund", analyzed=False)),
+]
+
+
+def make_frame(rows):
+    start = pd.Timestamp("2023-01-01")
+    df = pd.DataFrame({
+        'id': range(1_700_000_000_000, 1_700_000_000_000 + rows),
+        'timestamp': (start + pd.to_timedelta(pd.RangeIndex(rows) * 3, unit='min')).strftime('%Y-%m-%dT%H:%M:%S'),
+        'rating': [i // 5 % 5 + 1 for i in range(rows)],
+        'review': [f"{PHRASES[i % 5]} Order {i}." + (" The zeppelin toy was missing." if i % 50_000 == 7 else "")
+                   for i in range(rows)],
+        'ai_response': "Thank you for your feedback.",
+        'summary': ["Customer reports an issue with the order." if i // 25 % 10 else '' for i in range(rows)],
+        'actions': '',
+    })
+    return df
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filtered/full-text feedback search latency")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--backend", choices=sorted(storage.BACKENDS), action="append")
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    for backend in args.backend or ['sqlite']:
+        started = time.perf_counter()
+        store = build(backend, df)
+        print(f"{backend} {args.rows:,} rows: built in {time.perf_counter() - started:.1f}s")
+        if backend != 'sqlite':
+            # The first keyword search also loads the frame and indexes it.
+            started = time.perf_counter()
+            store.search(query='refund')
+            print(f"  first keyword search    {(time.perf_counter() - started) * 1000:9.1f} ms (loads and indexes)")
+        for label, filters in QUERIES:
+            ms, (page, total) = timed(lambda: store.search(limit=10, **filters))
+            print(f"  {label:<26} {ms:7.1f} ms | {total:>9,} matches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+os.environ["LLM_CACHE"] = "0"
+
+from inference import InferenceClient, InferenceError
+from stub_server import start_stub
+
+PARAMETERS = {"max_new_tokens": 100, "temperature": 0.7, "top_p": 0.9, "return_full_text": False}
+
+
+def is_valid(text):
+    return len(text) > 20
+
+
+def time_generate(client):
+    started = time.perf_counter()
+    client.generate("Customer gave 5/5 stars", PARAMETERS, validate=is_valid)
+    total = time.perf_counter() - started
+    return total, total
+
+
+def time_stream(client):
+    started = time.perf_counter()
+    first = None
+    for _ in client.stream("Customer gave 5/5 stars", PARAMETERS, validate=is_valid):
+        if first is None:
+            first = time.perf_counter() - started
+    return first, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time to first visible text: whole reply vs token stream")
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, action="append", help="seconds between tokens")
+    parser.add_argument("--requests", type=int, default=5)
+    args = parser.parse_args()
+
+    for token_delay in args.token_delay or [0.02, 0.05]:
+        server, url = start_stub(latency=args.latency, token_delay=token_delay)
+        client = InferenceClient(url)
+        for label, fn in (("generate", time_generate), ("stream", time_stream)):
+            runs = [fn(client) for _ in range(args.requests)]
+            first = sorted(r[0] for r in runs)[len(runs) // 2]
+            total = sorted(r[1] for r in runs)[len(runs) // 2]
+            print(f"token delay {token_delay * 1000:3.0f} ms | {label:<8} | first text {first * 1000:7.1f} ms | "
+                  f"complete {total * 1000:7.1f} ms")
+        server.shutdown()
+
+    # A stream cut off mid-reply must raise, so callers fall back to the templated reply.
+    server, url = start_stub(break_after=3)
+    client = InferenceClient(url)
+    seen = []
+    try:
+        for token in client.stream("Customer gave 1/5 stars", PARAMETERS, validate=is_valid):
+            seen.append(token)
+        outcome = "completed (unexpected)"
+    except Exception as e:
+        outcome = f"raised {type(e).__name__} after {len(seen)} tokens"
+    print(f"broken stream: {outcome}")
+    server.shutdown()
+
+    # So must a complete reply that fails validation.
+    server, url = start_stub()
+    client = InferenceClient(url)
+    try:
+        list(client.stream("Customer gave 3/5 stars", PARAMETERS, validate=lambda text: len(text) > 1000))
+        outcome = "accepted (unexpected)"
+    except InferenceError as e:
+        outcome = f"raised InferenceError({e})"
+    print(f"reply failing validation: {outcome}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
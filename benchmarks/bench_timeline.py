@@ -0,0 +1,45 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+
+import storage
+import timeline
+from bench_rollup import build, make_frame
+
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Timeline aggregation: per-row date objects vs bucket arithmetic")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--backend", choices=sorted(storage.BACKENDS), action="append")
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    for backend in args.backend or sorted(storage.BACKENDS):
+        store = build(backend, df)
+        frame = store.load_cached()
+        store.rollup()  # built once per store; day/week/month read from it
+        # What create_timeline_chart used to do on every render.
+        old = timed(lambda: frame.groupby(frame['timestamp'].dt.date.rename('date')).size(), 1)
+        print(f"{backend:>7} {args.rows:,} rows: groupby(dt.date) {old:8.1f} ms")
+        for granularity in timeline.GRANULARITIES:
+            timeline._cache.clear()
+            cold = timed(lambda: timeline.timeline(store, granularity), 1)
+            warm = timed(lambda: timeline.timeline(store, granularity), 100)
+            buckets = len(timeline.timeline(store, granularity))
+            print(f"        {granularity:>5}: {buckets:>6,} buckets | computed {cold:7.1f} ms | cached {warm:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+
+import numpy as np
+import pandas as pd
+
+import topics
+from bench_dedupe import EXPERIENCES, make_stream
+
+
+def purity(labels, truth):
+    # Share of reviews whose topic's most common true issue is their own.
+    frame = pd.DataFrame({'topic': labels, 'truth': truth})
+    return frame.groupby('topic')['truth'].agg(lambda t: t.value_counts().iloc[0]).sum() / len(frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Topic clustering: full re-cluster and incremental update times")
+    parser.add_argument("--rows", type=int, action="append", help="reviews to cluster (default 10k, 100k, 1M)")
+    parser.add_argument("--topics", type=int, action="append", help="topics to find (default 8 and 16)")
+    parser.add_argument("--new", type=int, default=1_000, help="reviews added for the incremental update")
+    args = parser.parse_args()
+
+    for rows in args.rows or [10_000, 100_000, 1_000_000]:
+        reviews, _, _, _ = make_stream(rows + args.new, 0.3)
+        reviews, new = reviews[:rows], reviews[rows:]
+        # Each synthetic review states one of the EXPERIENCES; copies with a
+        # typo in it are left out of the purity score.
+        truth = np.array([next((i for i, e in enumerate(EXPERIENCES) if e in r.lower()), -1) for r in reviews])
+        for k in args.topics or [8, 16]:
+            model = topics.TopicModel(k)
+            started = time.perf_counter()
+            labels, _ = model.fit(reviews)
+            fitted = time.perf_counter() - started
+            started = time.perf_counter()
+            model.partial_fit(new)
+            updated = time.perf_counter() - started
+            known = truth >= 0
+            print(f"{rows:>9,} reviews, {k:>2} topics | re-cluster {fitted:6.2f}s | "
+                  f"+{len(new):,} new in {updated * 1000:6.1f} ms | vocabulary {len(model.terms):,} terms | "
+                  f"purity {purity(labels[known], truth[known]):.0%} of {len(EXPERIENCES)} issues")
+    print("largest topics of the last run:", "; ".join(model.label(t) for t in np.argsort(-model.counts)[:5]))
+
+
+if __name__ == "__main__":
+    main()
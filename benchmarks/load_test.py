@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'task2'))
+
+import storage
+from bench_rollup import build, make_frame
+from stub_server import start_stub
+
+OPS = ["submit", "admin_search", "admin_analysis"]
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    if not samples:
+        return None
+    pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 2)
+    return {'count': len(samples), 'mean': round(sum(samples) / len(samples) * 1000, 2),
+            'p50': pick(0.5), 'p95': pick(0.95), 'p99': pick(0.99), 'max': pick(1.0)}
+
+
+def peak_rss_mb():
+    # VmHWM is this process's own high-water mark. ru_maxrss would do on
+    # most systems, but Linux carries the parent's over a fork+exec, and
+    # the parent just held the whole generated dataset.
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmHWM:")) / 1024
+    except OSError:
+        scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def describe(run):
+    return " | ".join(f"{op} {run['throughput_per_s'][op]:.1f}/s p95 {stats['p95']:.1f} ms"
+                      for op, stats in run['latency_ms'].items() if stats)
+
+
+def serve(args):
+    # One run against an already built store, in its own process so peak
+    # RSS covers only the app code under load.
+    server, url = start_stub(latency=args.latency, error_rate=args.error_rate)
+    os.environ.update(INFERENCE_BACKEND="http", INFERENCE_URL=url, LLM_CACHE="0",
+                      FEEDBACK_BACKEND=args.backend, FEEDBACK_PATH=args.store)
+    import metrics
+    import user_dashboard
+    import admin_dashboard
+    from storage import get_store
+
+    get_store()
+    rss_start = peak_rss_mb()
+    latencies = {op: [] for op in OPS}
+    finished = {}
+    lock = threading.Lock()
+
+    def record(op, started):
+        now = time.perf_counter()
+        with lock:
+            latencies[op].append(now - started)
+            finished[op] = now
+
+    def customer(n):
+        # What one Submit does: store the review with the templated reply,
+        # generate the real one, write it back.
+        for i in range(args.ops):
+            rating = (n + i) % 5 + 1
+            review = f"Customer {n}, order {i}: the parcel arrived late and the box was damaged."
+            started = time.perf_counter()
+            feedback_id = user_dashboard.save_feedback(rating, review, user_dashboard.fallback_response(rating))
+            user_dashboard.attach_ai_response(feedback_id, rating, review)
+            record("submit", started)
+
+    def admin(n):
+        # Open a page of unanalyzed reviews and analyze one of them.
+        for i in range(args.ops):
+            started = time.perf_counter()
+            df, _ = admin_dashboard.search_feedback(n + 1, 10, analyzed=False)
+            record("admin_search", started)
+            if not len(df):
+                continue
+            row = df.iloc[i % len(df)]
+            started = time.perf_counter()
+            admin_dashboard.update_analysis(row['id'], int(row['rating']), row['review'])
+            record("admin_analysis", started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.customers + args.admins) as pool:
+        futures = [pool.submit(customer, n) for n in range(args.customers)]
+        futures += [pool.submit(admin, n) for n in range(args.admins)]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    snapshot = metrics.snapshot()
+    result = {
+        'rows': args.rows[0],
+        'backend': args.backend,
+        'customers': args.customers,
+        'admins': args.admins,
+        'elapsed_s': round(elapsed, 3),
+        # Each over the time until that kind of user was done, so slow admins
+        # do not drag down the customers' figure.
+        'throughput_per_s': {op: round(len(samples) / (finished[op] - started), 2) if samples else 0.0
+                             for op, samples in latencies.items()},
+        'latency_ms': {op: summarize(samples) for op, samples in latencies.items()},
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'rss_at_start_mb': round(rss_start, 1),
+        'stages_ms': {stage: {key: round(value * 1000, 2) for key, value in timings.items() if key != 'count'}
+                      for stage, timings in snapshot['stages'].items()},
+        'llm_calls': {f"{name}:{dict(labels).get('outcome') or dict(labels).get('kind')}": n
+                      for (name, labels), n in snapshot['counters'].items()},
+        'stub': dict(server.stats),
+    }
+    print("RESULT " + json.dumps(result))
+
+
+def regressions(runs, baseline, tolerance):
+    # Throughput more than `tolerance` below the baseline, or p95 latency
+    # more than `tolerance` above it, for the same rows and backend.
+    previous = {(run['rows'], run['backend']): run for run in baseline['runs']}
+    found = []
+    for run in runs:
+        base = previous.get((run['rows'], run['backend']))
+        if base is None:
+            continue
+        for op in OPS:
+            now, before = run['throughput_per_s'][op], base['throughput_per_s'].get(op)
+            if before and now < before * (1 - tolerance):
+                found.append(f"{run['rows']:,} rows {op}: throughput {now}/s vs {before}/s")
+            now, before = (run['latency_ms'][op] or {}).get('p95'), (base['latency_ms'].get(op) or {}).get('p95')
+            if now and before and now > before * (1 + tolerance):
+                found.append(f"{run['rows']:,} rows {op}: p95 {now} ms vs {before} ms")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless load test of the submit and analysis paths against a stub model")
+    parser.add_argument("--rows", type=int, action="append", help="existing reviews (default 1k, 100k, 1M)")
+    parser.add_argument("--backend", choices=sorted(storage.BACKENDS), default="sqlite")
+    parser.add_argument("--customers", type=int, default=8, help="concurrent customers submitting")
+    parser.add_argument("--admins", type=int, default=2, help="concurrent admins analyzing")
+    parser.add_argument("--ops", type=int, default=25, help="submits or analyses per user")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub model time per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of stub requests that fail")
+    parser.add_argument("--output", default="load_test_results.json")
+    parser.add_argument("--baseline", help="earlier output to compare with; exits 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--store", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.store:
+        serve(args)
+        return
+
+    runs = []
+    for rows in args.rows or [1_000, 100_000, 1_000_000]:
+        store = build(args.backend, make_frame(rows))
+        if args.backend == 'sqlite':
+            # Fold the bulk load's write-ahead log into the database first.
+            store._conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        command = [sys.executable, os.path.abspath(__file__), "--store", store.path, "--rows", str(rows)]
+        for option in ["backend", "customers", "admins", "ops", "latency", "error_rate"]:
+            command += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        run = json.loads(next(line for line in reversed(output.splitlines()) if line.startswith("RESULT "))[7:])
+        runs.append(run)
+        print(f"{rows:>9,} rows | {describe(run)} | peak RSS {run['peak_rss_mb']:.1f} MB")
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'config': {key: value for key, value in vars(args).items() if key not in ("store", "output", "baseline")},
+        'runs': runs,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(runs, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
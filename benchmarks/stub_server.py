@@ -0,0 +1,170 @@
+import argparse
+import contextlib
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = ("Thank you for sharing your experience with us. We have passed your comments on to the team "
+         "and will use them to keep improving.")
+ANALYSIS = """SUMMARY: Customer reports the product did not match the listing photos and is disappointed.
+ACTION 1: Contact the customer to apologize and offer a replacement or refund
+ACTION 2: Review product photos and descriptions for accuracy
+ACTION 3: Add a quality check before dispatch for this product line"""
+
+
+
+def reply_for(prompt):
+    if "predicted_stars" in prompt:
+        # Task 1 rating prompts: a prediction that depends only on the prompt.
+        return json.dumps({"predicted_stars": zlib.crc32(prompt.encode()) % 5 + 1, "explanation": "Stub prediction."})
+    return ANALYSIS if "SUMMARY:" in prompt else REPLY
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Mimics the Hugging Face text-generation endpoint closely enough for the
+    # dashboards: POST {"inputs", "parameters"} -> [{"generated_text"}], or
+    # with "stream": true, TGI-style server-sent events, one per token.
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY a
+    # kept-alive connection stalls on delayed ACKs.
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.stats['connections'] += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _send_stream(self, text):
+        server = self.server
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        tokens = re.findall(r"\s*\S+", text)
+        for i, token in enumerate(tokens):
+            if server.break_after is not None and i == server.break_after:
+                # Drop the connection mid-stream, without the final chunk.
+                self.close_connection = True
+                return
+            if i and server.token_delay:
+                time.sleep(server.token_delay)
+            event = {"token": {"id": i, "text": token, "logprob": 0.0, "special": False},
+                     "generated_text": text if i == len(tokens) - 1 else None, "details": None}
+            self._send_chunk(b"data:" + json.dumps(event).encode() + b"\n\n")
+        self._send_chunk(b"")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        with server.lock:
+            server.stats['requests'] += 1
+            n = server.stats['requests']
+        with server.slots:
+            self._respond(payload, n)
+
+    def _respond(self, payload, n):
+        server = self.server
+        if server.down:
+            # An outage: the request hangs, then fails.
+            time.sleep(server.hang)
+            with server.lock:
+                server.stats['errors'] += 1
+            # The client has usually timed out and hung up by now.
+            with contextlib.suppress(ConnectionError):
+                self._send_json(503, {"error": "Service unavailable"})
+            return
+        if server.latency:
+            time.sleep(server.latency)
+        if n <= server.fail_first or random.random() < server.error_rate:
+            with server.lock:
+                server.stats['errors'] += 1
+            self._send_json(server.error_status, {"error": "Model is currently loading"},
+                            {"Retry-After": "0"} if server.error_status in (429, 503) else None)
+            return
+
+        prompt = payload.get("inputs", "")
+        if payload.get("stream"):
+            self._send_stream(reply_for(prompt))
+            return
+        prompts = prompt if isinstance(prompt, list) else [prompt]
+        with server.lock:
+            server.stats['prompts'] += len(prompts)
+        results = [{"generated_text": reply_for(p)} for p in prompts]
+        if server.token_delay:
+            # Same generation time as the streamed reply, all before the first byte.
+            time.sleep(server.token_delay * (len(re.findall(r"\S+", results[0]["generated_text"])) - 1))
+        self._send_json(200, results)
+
+
+def start_stub(latency=0.0, error_rate=0.0, fail_first=0, error_status=503, port=0,
+               token_delay=0.0, break_after=None, max_concurrency=None):
+    # Runs on a daemon thread; returns (server, url). Stop with
+    # server.shutdown(). Counters are in server.stats. latency is the wait
+    # before the first byte; streamed replies then send a token every
+    # token_delay seconds, and drop the connection after break_after tokens.
+    # max_concurrency caps how many requests are worked on at once, like a
+    # model server with a fixed number of slots; a request with a list of
+    # inputs takes one slot for as long as a single prompt would. Setting
+    # server.down = True makes every request hang for server.hang seconds
+    # and then fail, until it is set back.
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.error_rate = error_rate
+    server.fail_first = fail_first
+    server.error_status = error_status
+    server.token_delay = token_delay
+    server.break_after = break_after
+    server.down = False
+    server.hang = 60.0
+    server.slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else contextlib.nullcontext()
+    server.lock = threading.Lock()
+    server.stats = {'connections': 0, 'requests': 0, 'prompts': 0, 'errors': 0}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/generate"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub of the text-generation inference endpoint")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between streamed tokens")
+    parser.add_argument("--max-concurrency", type=int, help="requests worked on at once")
+    args = parser.parse_args()
+
+    server, url = start_stub(args.latency, args.error_rate, error_status=args.error_status, port=args.port,
+                             token_delay=args.token_delay, max_concurrency=args.max_concurrency)
+    print(f"Stub inference endpoint on {url} (set INFERENCE_URL to use it)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+TASK2 = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'task2'))
+if TASK2 not in sys.path:
+    sys.path.insert(0, TASK2)
+
+from breaker import CircuitOpenError
+from inference import get_client
+
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.json")
+STARS = [1, 2, 3, 4, 5]
+PARAMETERS = {
+    "max_new_tokens": 150,
+    "temperature": 0.1,
+    "top_p": 0.9,
+    "return_full_text": False
+}
+
+APPROACHES = [
+    {
+        'key': 'basic',
+        'name': "Basic Direct Prompt",
+        'short_name': "Basic Direct",
+        'description': "Simple, minimal prompt asking directly for star rating. Tests baseline model capability without additional guidance or context.",
+        'template': """Analyze this Yelp review and predict the star rating (1-5).
+Return your response in JSON format:
+{
+  "predicted_stars": <number>,
+  "explanation": "<brief reasoning>"
+}
+
+Review: [REVIEW_TEXT]""",
+    },
+    {
+        'key': 'keywords',
+        'name': "Keyword-Guided Prompt",
+        'short_name': "Keyword-Guided",
+        'description': "Enhanced prompt with explicit sentiment keywords mapped to rating levels. Provides clearer signals for classification by associating specific words with star ratings.",
+        'template': """Analyze this Yelp review and predict the star rating (1-5).
+
+Rating Guide:
+- 1 star: terrible, awful, horrible, worst
+- 2 stars: bad, poor, disappointing, mediocre
+- 3 stars: okay, decent, average, fine
+- 4 stars: good, nice, pleasant, solid
+- 5 stars: excellent, amazing, outstanding, perfect
+
+Return JSON:
+{
+  "predicted_stars": <number>,
+  "explanation": "<brief reasoning>"
+}
+
+Review: [REVIEW_TEXT]""",
+    },
+    {
+        'key': 'cot',
+        'name': "Examples + Chain-of-Thought",
+        'short_name': "Examples + CoT",
+        'description': "Few-shot learning with example reviews and explicit reasoning steps. Guides model through analysis process to improve complex sentiment understanding.",
+        'template': """Analyze Yelp reviews and predict star ratings (1-5).
+
+Examples:
+Review: "Food was cold and service terrible"
+Reasoning: Negative words indicate poor experience
+Rating: 1 star
+
+Review: "Great food, friendly staff, will return"
+Reasoning: Positive sentiment throughout
+Rating: 5 stars
+
+Now analyze this review step by step:
+1. Identify key sentiment words
+2. Assess overall tone
+3. Assign rating
+
+Return JSON:
+{
+  "predicted_stars": <number>,
+  "explanation": "<brief reasoning>"
+}
+
+Review: [REVIEW_TEXT]""",
+    },
+]
+
+_JSON_OBJECT = re.compile(r"\{.*?\}", re.DOTALL)
+_STARS = re.compile(r"\b([1-5])\s*(?:stars?|★)|\"predicted_stars\"\s*:\s*\"?([1-5])", re.IGNORECASE)
+
+
+def parse_prediction(text):
+    # (stars, valid_json). A reply only counts as valid JSON if an object in
+    # it parses and holds predicted_stars 1-5; otherwise the stars are
+    # recovered from the text where possible, and are None if not.
+    for match in _JSON_OBJECT.finditer(text):
+        try:
+            data = json.loads(match.group())
+        except ValueError:
+            continue
+        stars = data.get("predicted_stars") if isinstance(data, dict) else None
+        try:
+            stars = int(stars)
+        except (TypeError, ValueError):
+            continue
+        if stars in STARS:
+            return stars, True
+    match = _STARS.search(text)
+    if match:
+        return int(match.group(1) or match.group(2)), False
+    return None, False
+
+
+def load_dataset(path, sample=200, seed=42, text_column="text", label_column="stars"):
+    # Labeled reviews from a CSV or JSON-lines file (the Kaggle Yelp export
+    # has "text" and "stars"), as a frame of review/stars with a stable
+    # 0..n-1 index that checkpoints refer to.
+    if path.endswith((".json", ".jsonl")):
+        df = pd.read_json(path, lines=True)
+    else:
+        df = pd.read_csv(path)
+    df = df[[text_column, label_column]].dropna()
+    df.columns = ['review', 'stars']
+    df['stars'] = df['stars'].astype(int)
+    df = df[df['stars'].isin(STARS)]
+    if sample and sample < len(df):
+        df = df.sample(n=sample, random_state=seed)
+    return df.reset_index(drop=True)
+
+
+def read_checkpoint(path, header):
+    # Records already evaluated, keyed by (approach, row). The first line
+    # describes the run; resuming a different run is refused.
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    if lines and json.loads(lines[0]) != header:
+        raise ValueError(f"{path} belongs to a different run; remove it or pass --restart")
+    for line in lines[1:]:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # torn line from an interrupted run; that pair is redone
+        done[(record['approach'], record['row'])] = record
+    return done
+
+
+def evaluate(dataset, approaches=APPROACHES, client=None, workers=8, checkpoint=None, header=None,
+             progress=None):
+    # Predicts every (approach, review) pair on a thread pool and returns the
+    # records. Each finished pair is appended to `checkpoint` (JSON lines),
+    # so an interrupted run picks up where it stopped. `progress(done,
+    # total, elapsed)` is called after each pair. Only pairs the model
+    # answered are records: a failed call is left for the next run to
+    # retry, and once the circuit breaker opens the run stops with
+    # CircuitOpenError.
+    client = client or get_client()
+    done = read_checkpoint(checkpoint, header) if checkpoint else {}
+    todo = [(approach, row) for approach in approaches for row in range(len(dataset))
+            if (approach['key'], row) not in done]
+    total = len(done) + len(todo)
+
+    def predict(approach, row):
+        prompt = approach['template'].replace("[REVIEW_TEXT]", dataset.at[row, 'review'])
+        # fresh=True: every run samples the model, not the response cache.
+        text = client.generate(prompt, PARAMETERS, fresh=True)
+        stars, valid = parse_prediction(text)
+        return {'approach': approach['key'], 'row': row, 'response': text, 'predicted': stars, 'valid_json': valid}
+
+    out = None
+    if checkpoint:
+        new_file = not os.path.exists(checkpoint)
+        torn = not new_file and os.path.getsize(checkpoint) and not open(checkpoint, 'rb').read().endswith(b"\n")
+        out = open(checkpoint, 'a', encoding='utf-8')
+        if new_file:
+            out.write(json.dumps(header) + "\n")
+        elif torn:
+            out.write("\n")
+    def save(record):
+        done[(record['approach'], record['row'])] = record
+        if out:
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+
+    started = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="eval")
+    futures = []
+    try:
+        futures = [pool.submit(predict, approach, row) for approach, row in todo]
+        for future in as_completed(futures):
+            error = future.exception()
+            if isinstance(error, CircuitOpenError):
+                raise error
+            if error is not None:
+                print(f"AI Error: {error}", file=sys.stderr)
+                continue
+            save(future.result())
+            if progress:
+                progress(len(done), total, time.perf_counter() - started)
+    finally:
+        # On Ctrl+C, drop what has not started but keep what was in flight.
+        pool.shutdown(wait=True, cancel_futures=True)
+        for future in futures:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                record = future.result()
+                if (record['approach'], record['row']) not in done:
+                    save(record)
+        if out:
+            out.close()
+    return list(done.values())
+
+
+def distribution(values):
+    counts = Counter(v for v in values if v is not None)
+    return {str(star): counts.get(star, 0) for star in STARS}
+
+
+def primary_bias(predictions):
+    counts = Counter(p for p in predictions if p is not None)
+    if not counts:
+        return "None"
+    star, n = counts.most_common(1)[0]
+    tone = "Negative" if star <= 2 else ("Neutral" if star == 3 else "Positive")
+    if n / len(predictions) >= 0.8:
+        tone = "Extreme " + tone
+    return f"{tone} ({star}★)"
+
+
+def compute_metrics(dataset, records, approaches=APPROACHES):
+    # Accuracy and JSON validity are over every review; MAE over the
+    # reviews where a rating could be read from the reply at all.
+    labels = dataset['stars'].to_numpy()
+    results = []
+    for approach in approaches:
+        rows = sorted((r for r in records if r['approach'] == approach['key']), key=lambda r: r['row'])
+        predicted = [r['predicted'] for r in rows]
+        actual = [int(labels[r['row']]) for r in rows]
+        scored = [(p, a) for p, a in zip(predicted, actual) if p is not None]
+        valid = sum(r['valid_json'] for r in rows)
+        results.append({
+            'key': approach['key'],
+            'name': approach['name'],
+            'short_name': approach['short_name'],
+            'evaluated': len(rows),
+            'accuracy': round(100 * sum(p == a for p, a in scored) / len(rows), 1) if rows else 0.0,
+            'mae': round(sum(abs(p - a) for p, a in scored) / len(scored), 2) if scored else None,
+            'json_validity': round(100 * valid / len(rows), 1) if rows else 0.0,
+            'failed': len(rows) - valid,
+            'predictions': distribution(predicted),
+            'primary_bias': primary_bias(predicted),
+        })
+    return results
+
+
+DEPLOYMENTS = {'http': "Hosted API", 'local': "Local inference", 'stub': "Stub (no model)"}
+
+
+def build_results(dataset, records, model, deployment, device, approaches=APPROACHES):
+    return {
+        'model': model,
+        'deployment': deployment,
+        'device': device,
+        'sample_size': len(dataset),
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'actual': distribution(dataset['stars']),
+        'approaches': compute_metrics(dataset, records, approaches),
+    }
+
+
+def write_results(results, path=RESULTS_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_results(path=RESULTS_FILE):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+LEANINGS = [("negative", "1-2★", ["1", "2"]), ("neutral", "3★", ["3"]), ("positive", "4-5★", ["4", "5"])]
+
+
+def lean_shares(results, approach):
+    # (tone, label, share of the approach's predictions, share of the
+    # actual ratings) per group of LEANINGS; None if it predicted nothing.
+    predicted = approach['predictions']
+    total = sum(predicted.values())
+    if not total:
+        return None
+    actual_total = sum(results['actual'].values()) or 1
+    return [(tone, label, sum(predicted[s] for s in stars) / total,
+             sum(results['actual'][s] for s in stars) / actual_total) for tone, label, stars in LEANINGS]
+
+
+def best_approach(results):
+    # The approach with the highest accuracy, as format_report picks it.
+    return max(results['approaches'], key=lambda a: a['accuracy']) if results['approaches'] else None
+
+
+def observations(results):
+    # Notes per approach key, read off a results artifact: where the
+    # approach ranks, and which way its predictions lean against the
+    # actual ratings.
+    approaches = results['approaches']
+    notes = {}
+    for approach in approaches:
+        lines = []
+        for metric, label in [('accuracy', "accuracy"), ('json_validity', "JSON validity")]:
+            values = [a[metric] for a in approaches]
+            if max(values) == min(values):
+                continue
+            if approach[metric] == max(values):
+                lines.append(f"Highest {label} of the {len(approaches)} approaches ({approach[metric]:.1f}%)")
+            elif approach[metric] == min(values):
+                lines.append(f"Lowest {label} of the {len(approaches)} approaches ({approach[metric]:.1f}%)")
+        shares = lean_shares(results, approach)
+        if shares:
+            tone, label, share, truth = max(shares, key=lambda s: s[2] - s[3])
+            if share - truth >= 0.1:
+                lines.append(f"Leans {tone}: {label} for {share:.1%} of its predictions, against {truth:.1%} of actual ratings")
+        notes[approach['key']] = lines
+    return notes
+
+
+def common_findings(results):
+    # What every approach got wrong the same way: rating groups all of
+    # them under- or over-predicted by 10 points or more, and every
+    # approach's JSON validity when none reached 90%.
+    approaches = results['approaches']
+    shares = [lean_shares(results, approach) for approach in approaches]
+    if not approaches or None in shares:
+        return []
+    lines = []
+    for i, (tone, label, _, truth) in enumerate(shares[0]):
+        predicted = [approach_shares[i][2] for approach_shares in shares]
+        if all(share <= truth - 0.1 for share in predicted):
+            lines.append(f"Too few {tone} ratings: {label} for {min(predicted):.1%}–{max(predicted):.1%} of "
+                         f"predictions, against {truth:.1%} of actual ratings")
+        elif all(share >= truth + 0.1 for share in predicted):
+            lines.append(f"Too many {tone} ratings: {label} for {min(predicted):.1%}–{max(predicted):.1%} of "
+                         f"predictions, against {truth:.1%} of actual ratings")
+    if all(approach['json_validity'] < 90 for approach in approaches):
+        lines.append(f"Unreliable JSON: validity of {min(a['json_validity'] for a in approaches):.1f}%–"
+                     f"{max(a['json_validity'] for a in approaches):.1f}%")
+    return lines
+
+
+def percent_lines(counts, total, skip_zero=True):
+    return [f"  {star}★: {n} ({100 * n / total:.1f}%)" for star, n in counts.items() if n or not skip_zero]
+
+
+def format_report(results):
+    # Plain-text report of a results artifact, as shown under "View
+    # Complete Test Results".
+    total = results['sample_size']
+    rule = "=" * 60
+    lines = [
+        f"YELP RATING PREDICTION - {results['model']}",
+        f"Sample Size: {total} reviews",
+        f"Device: {results['device']}",
+    ]
+    for i, approach in enumerate(results['approaches'], 1):
+        mae = f"{approach['mae']:.2f}" if approach['mae'] is not None else "n/a"
+        lines += ["", rule, f"APPROACH {i}: {approach['name'].upper()}", rule,
+                  f"Accuracy: {approach['accuracy']:.1f}%",
+                  f"MAE: {mae}",
+                  f"Valid JSON: {approach['json_validity']:.1f}%",
+                  f"Failed: {approach['failed']}",
+                  "", "Predictions:"]
+        lines += percent_lines(approach['predictions'], total)
+        lines += ["", "Actual Distribution:"]
+        lines += percent_lines(results['actual'], total)
+    approaches = results['approaches']
+    if approaches:
+        best_index, best = max(enumerate(approaches, 1), key=lambda item: item[1]['accuracy'])
+        maes = [a['mae'] for a in approaches if a['mae'] is not None]
+        lines += ["", rule, "SUMMARY", rule,
+                  f"Best Overall: Approach {best_index} ({best['name']})",
+                  f"  - Highest Accuracy: {best['accuracy']:.1f}%",
+                  f"  - MAE: {best['mae']:.2f}" if best['mae'] is not None else "  - MAE: n/a",
+                  f"  - JSON Validity: {best['json_validity']:.1f}%",
+                  "", "Average Performance:",
+                  f"  - Accuracy: {sum(a['accuracy'] for a in approaches) / len(approaches):.1f}%",
+                  f"  - MAE: {sum(maes) / len(maes):.2f}" if maes else "  - MAE: n/a",
+                  f"  - JSON Validity: {sum(a['json_validity'] for a in approaches) / len(approaches):.1f}%"]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the Task 1 prompt approaches on labeled Yelp reviews")
+    parser.add_argument("data", help="CSV or JSON-lines file with review text and star labels")
+    parser.add_argument("--sample", type=int, default=200, help="reviews to evaluate (0 = all)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--text-column", default="text")
+    parser.add_argument("--label-column", default="stars")
+    parser.add_argument("--approach", choices=[a['key'] for a in APPROACHES], action="append")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--backend", help="inference backend (defaults to INFERENCE_BACKEND)")
+    parser.add_argument("--model", help="model name for the report (defaults to the backend's)")
+    parser.add_argument("--device", default="CPU", help="where the model ran, for the report")
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--checkpoint", help="defaults to OUTPUT.checkpoint.jsonl")
+    parser.add_argument("--restart", action="store_true", help="discard the checkpoint and start over")
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.data, args.sample, args.seed, args.text_column, args.label_column)
+    approaches = [a for a in APPROACHES if not args.approach or a['key'] in args.approach]
+    backend = args.backend or os.environ.get("INFERENCE_BACKEND", "http")
+    client = get_client(backend=backend)
+    checkpoint = args.checkpoint or args.output + ".checkpoint.jsonl"
+    if args.restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    header = {'data': os.path.abspath(args.data), 'sample': len(dataset), 'seed': args.seed,
+              'model': client.cache_id, 'parameters': PARAMETERS}
+
+    def report(done, total, elapsed):
+        print(f"\r{done}/{total} predictions, {elapsed:.0f}s", end="", file=sys.stderr)
+
+    try:
+        records = evaluate(dataset, approaches, client, args.workers, checkpoint, header, progress=report)
+    except ValueError as e:
+        parser.error(str(e))
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; rerun the same command to resume from {checkpoint}", file=sys.stderr)
+        sys.exit(130)
+    except CircuitOpenError as e:
+        print(f"\nStopped: {e}. Rerun the same command to resume from {checkpoint}", file=sys.stderr)
+        sys.exit(1)
+    print(file=sys.stderr)
+    # Failed calls are not predictions: results are only written once every
+    # pair has a model reply.
+    failed = len(approaches) * len(dataset) - len(records)
+    if failed:
+        print(f"{failed} model calls failed and were not recorded; rerun the same command to retry them",
+              file=sys.stderr)
+        sys.exit(1)
+    results = build_results(dataset, records, args.model or client.cache_id, DEPLOYMENTS[backend], args.device,
+                            approaches)
+    write_results(results, args.output)
+    print(format_report(results))
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,126 +1,117 @@
 import streamlit as st
 import pandas as pd
-import json
 from datetime import datetime
 import os
-import requests
-import plotly.express as px
-import plotly.graph_objects as go
+import time
+from storage import get_store
+from analysis import generate_admin_analysis
+from batch_analysis import analyze_pending, count_pending
+from timeline import GRANULARITIES, timeline
+from topics import TREND_DAYS, top_issues, weekly_counts
+from inference import get_client, submit_background
+from batching import get_batcher
+from dedupe import get_index, prior_row
+import metrics
 
-DATA_FILE = "feedback_data.csv"
-HF_API_URL = "https://api-inference.huggingface.co/models/Qwen/Qwen2-7B-Instruct"
-HF_TOKEN = st.secrets.get("HF_TOKEN", "")
+try:
+    HF_TOKEN = st.secrets.get("HF_TOKEN", "")
+except FileNotFoundError:
+    # No secrets.toml, e.g. imported by the load test: use the environment.
+    HF_TOKEN = os.environ.get("HF_TOKEN", "")
+# analysis.py also runs from the CLI, where the token comes from the environment.
+os.environ.setdefault("HF_TOKEN", HF_TOKEN)
 
-def load_data():
-    if os.path.exists(DATA_FILE):
-        try:
-            df = pd.read_csv(DATA_FILE)
-            if 'summary' not in df.columns:
-                df['summary'] = ''
-            if 'actions' not in df.columns:
-                df['actions'] = ''
-            return df
-        except:
-            return pd.DataFrame(columns=['id', 'timestamp', 'rating', 'review', 'ai_response', 'summary', 'actions'])
-    return pd.DataFrame(columns=['id', 'timestamp', 'rating', 'review', 'ai_response', 'summary', 'actions'])
+PAGE_SIZE = int(os.environ.get("ADMIN_PAGE_SIZE", 10))
+PAGE_SIZES = sorted({10, 25, 50, 100, PAGE_SIZE})
+TOP_ISSUES = 6
 
-def generate_admin_analysis(rating, review):    
-    try:
-        prompt = f"""Analyze this customer feedback professionally:
+def load_rollup(start=None, end=None):
+    with metrics.timed("admin.rollup"):
+        return get_store().rollup(start, end)
 
-Rating: {rating}/5 stars
-Review: "{review}"
+def search_feedback(page, page_size, **filters):
+    with metrics.timed("admin.search"):
+        return get_store().search(offset=(page - 1) * page_size, limit=page_size, **filters)
 
-Provide:
-1. One sentence summary of the key issue/sentiment
-2. Three specific actionable recommendations
-
-Format your response as:
-SUMMARY: [one sentence]
-ACTION 1: [specific action]
-ACTION 2: [specific action]
-ACTION 3: [specific action]"""
-        
-        headers = {"Authorization": f"Bearer {HF_TOKEN}"}
-        payload = {
-            "inputs": prompt,
-            "parameters": {
-                "max_new_tokens": 150,
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "return_full_text": False
-            }
-        }
-        
-        response = requests.post(HF_API_URL, headers=headers, json=payload, timeout=30)
-        
-        if response.status_code == 200:
-            result = response.json()
-            if isinstance(result, list) and len(result) > 0:
-                text = result[0].get("generated_text", "").strip()
-                
-                summary = ""
-                actions = []
-                
-                if "SUMMARY:" in text:
-                    summary_part = text.split("SUMMARY:")[1].split("ACTION")[0].strip()
-                    summary = summary_part.split("\n")[0].strip()
-                
-                for i in range(1, 4):
-                    if f"ACTION {i}:" in text:
-                        action_text = text.split(f"ACTION {i}:")[1]
-                        if f"ACTION {i+1}:" in action_text:
-                            action_text = action_text.split(f"ACTION {i+1}:")[0]
-                        action = action_text.strip().split("\n")[0].strip()
-                        if action and len(action) > 10:
-                            actions.append(action)
-                
-                if summary and len(summary) > 20 and len(actions) >= 2:
-                    return summary, actions
-        
-        raise Exception("AI parsing failed")
-    
-    except Exception as e:
-        print(f"AI Error: {e}")
-        pass
-    
-    review_lower = review.lower()
-    
-    if rating >= 4:
-        summary = f"Customer is highly satisfied with the service and experience (rated {rating}/5)"
-        actions = [
-            "Send personalized thank you message to customer",
-            "Request permission to use review as testimonial",
-            "Analyze what went well to replicate success"
-        ]
-    elif rating == 3:
-        summary = f"Customer had a mixed experience with room for improvement (rated {rating}/5)"
-        actions = [
-            "Contact customer to understand specific pain points",
-            "Identify service gaps mentioned in the feedback",
-            "Implement improvements in areas of concern"
-        ]
+def update_analysis(feedback_id, rating, review, fresh=False):
+    # A near-duplicate of an analyzed review takes its analysis; Regenerate
+    # (fresh=True) always asks the model.
+    prior = None if fresh else prior_row(get_store(), feedback_id)
+    if prior is not None and prior['summary']:
+        summary, actions = prior['summary'], list(prior['actions'])
+        metrics.count("llm_calls_saved", kind="analysis")
     else:
-        summary = f"Customer expressed dissatisfaction with the service experience (rated {rating}/5)"
-        actions = [
-            "Reach out immediately to apologize and resolve issue",
-            "Conduct internal investigation into problems raised",
-            "Offer compensation to recover customer relationship"
-        ]
+        with metrics.timed("admin.analysis"):
+            summary, actions = generate_admin_analysis(rating, review, fresh=fresh)
+    with metrics.timed("admin.save_analysis"):
+        get_store().update_analysis(feedback_id, summary, actions)
     
     return summary, actions
 
-def update_analysis(df, idx):
-    rating = df.loc[idx, 'rating']
-    review = df.loc[idx, 'review']
-    
-    summary, actions = generate_admin_analysis(rating, review)
-    
-    df.loc[idx, 'summary'] = summary
-    df.loc[idx, 'actions'] = json.dumps(actions)
-    df.to_csv(DATA_FILE, index=False)
-    
-    return summary, actions
+def describe_trend(recent, previous):
+    if previous:
+        change = (recent - previous) / previous
+        return f"{'📈' if change > 0 else '📉'} {change:+.0%} vs previous {TREND_DAYS} days"
+    return f"🆕 {recent} in the last {TREND_DAYS} days" if recent else f"none in the last {TREND_DAYS} days"
+
+def show_model_status():
+    # Circuit breaker state of the model endpoint the analyses use.
+    breaker = get_client().breaker
+    if breaker is None:
+        return
+    status = breaker.status()
+    if status['state'] == "open":
+        st.warning(f"🔴 AI model unavailable: analyses use templates until the endpoint recovers "
+                   f"(next check in {status['retry_in']:.0f}s). Last error: {status['last_error']}")
+    elif status['state'] == "half-open":
+        st.info("🟡 Checking whether the AI model has recovered...")
+    elif status['recent_calls']:
+        latency = f" • median {status['p50_ms']:.0f} ms" if status['p50_ms'] is not None else ""
+        st.caption(f"🟢 AI model healthy • {status['recent_failures']}/{status['recent_calls']} recent calls failed{latency}")
+
+def show_system_health():
+    # Stage timings and model call counts recorded by metrics.py since the
+    # process started, plus the breaker and batcher state.
+    with st.expander("🩺 System health"):
+        if not metrics.ENABLED:
+            st.caption("Metrics are off (APP_METRICS=0)")
+            return
+        snapshot = metrics.snapshot()
+        if snapshot['stages']:
+            st.dataframe(pd.DataFrame([
+                {'Stage': stage, 'Calls': timings['count'], 'p50 (ms)': timings['p50'] * 1000,
+                 'p95 (ms)': timings['p95'] * 1000, 'p99 (ms)': timings['p99'] * 1000}
+                for stage, timings in snapshot['stages'].items()
+            ]).round(1), hide_index=True, use_container_width=True)
+        calls = {dict(labels)['outcome']: n for (name, labels), n in snapshot['counters'].items() if name == "llm_calls"}
+        fallbacks = {dict(labels)['kind']: n for (name, labels), n in snapshot['counters'].items() if name == "llm_fallbacks"}
+        cols = st.columns(6)
+        for col, (label, value) in zip(cols, [
+            ("✅ Model replies", calls.get("success", 0)),
+            ("💾 Cache hits", calls.get("cache_hit", 0)),
+            ("🧩 Parse failures", calls.get("parse_failure", 0)),
+            ("⏱️ Timeouts", calls.get("timeout", 0)),
+            ("⚠️ Errors", calls.get("error", 0) + calls.get("circuit_open", 0)),
+            ("📄 Fallbacks", sum(fallbacks.values())),
+        ]):
+            col.metric(label, value)
+        dedupe = {dict(labels)['outcome']: n for (name, labels), n in snapshot['counters'].items() if name == "dedupe"}
+        saved = sum(n for (name, _), n in snapshot['counters'].items() if name == "llm_calls_saved")
+        if dedupe:
+            checked = sum(dedupe.values())
+            st.caption(f"Near-duplicates: {dedupe.get('duplicate', 0)} of {checked} new reviews "
+                       f"({dedupe.get('duplicate', 0) / checked:.0%}) • {saved} model calls saved")
+        breaker = get_client().breaker
+        if breaker is not None:
+            status = breaker.status()
+            st.caption(f"Circuit breaker: {status['state']} • opened {status['opened']}x • "
+                       f"{status['rejected']} calls refused")
+        batcher = get_batcher()
+        if batcher is not None:
+            stats = batcher.stats()
+            st.caption(f"Micro-batching: {stats['prompts']} prompts in {stats['batches']} batches")
+        if os.environ.get("METRICS_PORT"):
+            st.caption(f"Prometheus metrics on port {os.environ['METRICS_PORT']}")
 
 def get_rating_color(rating):
     return "🟢" if rating >= 4 else ("🟡" if rating == 3 else "🔴")
@@ -128,7 +119,8 @@ def get_rating_color(rating):
 def get_border_class(rating):
     return "positive-border" if rating >= 4 else ("neutral-border" if rating == 3 else "negative-border")
 
-st.markdown("""
+# Emitted by main() on every run; the module body only runs on first import.
+STYLES = """
 <style>
     .main {
         background: #f8f9fa;
@@ -172,19 +164,21 @@ st.markdown("""
         margin: 0.5rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
-def create_rating_distribution(df):
-    if len(df) == 0:
+def create_rating_distribution(rating_counts):
+    rating_counts = rating_counts[rating_counts > 0]
+    if len(rating_counts) == 0:
         return None
     
-    rating_counts = df['rating'].value_counts().sort_index()
+    import plotly.graph_objects as go
     
+    colors = ['#f44336', '#ff9800', '#ffc107', '#8bc34a', '#4caf50']
     fig = go.Figure(data=[
         go.Bar(
             x=[f"{i} ⭐" for i in rating_counts.index],
             y=rating_counts.values,
-            marker_color=['#f44336', '#ff9800', '#ffc107', '#8bc34a', '#4caf50'][:len(rating_counts)],
+            marker_color=[colors[i - 1] for i in rating_counts.index],
             text=rating_counts.values,
             textposition='auto',
         )
@@ -201,20 +195,26 @@ def create_rating_distribution(df):
     
     return fig
 
-def create_timeline_chart(df):
-    if len(df) == 0:
+def create_timeline_chart(counts, stacked=False):
+    if len(counts) == 0:
         return None
     
-    df['date'] = pd.to_datetime(df['timestamp']).dt.date
-    daily_counts = df.groupby('date').size().reset_index(name='count')
+    # plotly.express costs more to import than the whole dashboard takes to render.
+    import plotly.graph_objects as go
     
-    fig = px.line(
-        daily_counts,
-        x='date',
-        y='count',
-        title='Feedback Submissions Over Time',
-        markers=True
-    )
+    if stacked:
+        colors = ['#f44336', '#ff9800', '#ffc107', '#8bc34a', '#4caf50']
+        fig = go.Figure(data=[
+            go.Bar(x=counts.index, y=counts[rating], name=f"{rating} ⭐", marker_color=colors[rating - 1])
+            for rating in counts.columns
+        ])
+        fig.update_layout(barmode='stack', title='Feedback Submissions Over Time')
+    else:
+        totals = counts.sum(axis=1)
+        fig = go.Figure(data=[
+            go.Scatter(x=totals.index, y=totals.values, mode='lines+markers' if len(totals) <= 200 else 'lines')
+        ])
+        fig.update_layout(title='Feedback Submissions Over Time')
     
     fig.update_layout(
         xaxis_title="Date",
@@ -225,7 +225,88 @@ def create_timeline_chart(df):
     
     return fig
 
+def create_topic_chart(weekly, labels):
+    if len(weekly) < 2:
+        return None
+    
+    import plotly.graph_objects as go
+    
+    fig = go.Figure(data=[
+        go.Scatter(x=weekly.index, y=weekly[topic], name=labels[topic], mode='lines')
+        for topic in weekly.columns
+    ])
+    fig.update_layout(
+        title="Top Issues per Week",
+        height=300,
+        margin=dict(l=20, r=20, t=40, b=20),
+        legend=dict(orientation="h", y=-0.2)
+    )
+    
+    return fig
+
+def show_top_issues():
+    # Recurring topics found by clustering the review texts (topics.py):
+    # no model calls, and only new reviews are clustered between reruns.
+    st.markdown("## 🧭 Top Issues")
+    col1, col2 = st.columns([3, 1])
+    with col2:
+        scope = st.selectbox("Reviews", ["Rated 1-3 ⭐", "All ratings"], label_visibility="collapsed")
+    with metrics.timed("admin.topics"), st.spinner("Grouping reviews by topic..."):
+        summary, state = top_issues(get_store(), (1, 2, 3) if scope == "Rated 1-3 ⭐" else None)
+    topics = summary[summary['topic'] >= 0].head(TOP_ISSUES)
+    with col1:
+        st.caption(f"Most common topics among {len(state.frame):,} reviews, grouped by the words they share")
+    if len(topics) == 0:
+        st.info("Not enough reviews to find common topics yet")
+        return
+    
+    labels = dict(zip(topics['topic'], topics['label']))
+    chart = create_topic_chart(weekly_counts(state, list(labels)), labels)
+    if chart:
+        st.plotly_chart(chart, use_container_width=True)
+    
+    for rank, row in enumerate(topics.itertuples(), 1):
+        with st.expander(f"**{rank}. {row.label}** — {row.size:,} reviews ({row.share:.0%}) • "
+                         f"avg {row.avg_rating:.1f} ⭐ • {describe_trend(row.recent, row.previous)}"):
+            for example in row.examples:
+                st.markdown(f"> {example}")
+
+def start_batch(total):
+    # "Analyze all pending" runs on the inference pool, so a click elsewhere
+    # (which stops this script) does not stop the batch.
+    progress = {'done': 0, 'total': total, 'elapsed': 0.0}
+    
+    def report(done, total, elapsed):
+        progress.update(done=done, total=total, elapsed=elapsed)
+    
+    st.session_state.batch = (submit_background(analyze_pending, progress=report), progress)
+
+def show_batch():
+    # Polls a running batch once a second, then reruns the page to show
+    # the new analyses.
+    if st.session_state.get('batch') is None:
+        stats = st.session_state.pop('batch_stats', None)
+        if stats:
+            st.success(f"✅ Analyzed {stats['total']} reviews in {stats['elapsed']:.1f}s ({stats['rows_per_sec']:.1f} rows/s)")
+        return
+    
+    @st.fragment(run_every=1)
+    def batch_progress():
+        future, progress = st.session_state.batch
+        if future.done():
+            st.session_state.batch = None
+            st.session_state.batch_stats = future.result()
+            st.rerun()
+        done, total = progress['done'], max(progress['total'], 1)
+        st.progress(min(done / total, 1.0))
+        rate = done / progress['elapsed'] if progress['elapsed'] > 0 else 0.0
+        st.caption(f"{done}/{total} analyzed • {rate:.1f} rows/s")
+    
+    batch_progress()
+
 def main():
+    st.markdown(STYLES, unsafe_allow_html=True)
+    
     st.title("📊 Admin Dashboard")
     st.markdown("### Customer Feedback Management System")
     
@@ -234,11 +315,12 @@ def main():
         if st.button("🔄 Refresh", use_container_width=True):
             st.rerun()
     
+    show_model_status()
     st.markdown("---")
     
-    df = load_data()
+    feedback_count = get_store().count()
     
-    if len(df) == 0:
+    if feedback_count == 0:
         st.info("📭 No feedback submissions yet. Waiting for customer reviews...")
         st.markdown("### 🚀 Getting Started")
         st.markdown("""
@@ -250,10 +332,19 @@ def main():
     
     st.markdown("## 📈 Analytics Overview")
     
-    total_reviews = len(df)
-    avg_rating = df['rating'].mean()
-    positive_count = len(df[df['rating'] >= 4])
-    negative_count = len(df[df['rating'] <= 2])
+    # Everything in the overview comes from the per-day rating counts the
+    # store maintains on insert, not from the reviews themselves.
+    days = load_rollup().index
+    first_day, last_day = (days.min().date(), days.max().date()) if len(days) else (datetime.now().date(),) * 2
+    date_range = st.date_input("📅 Date range", value=(first_day, last_day), min_value=first_day, max_value=last_day)
+    start_day, end_day = (date_range[0], date_range[-1]) if date_range else (first_day, last_day)
+    rollup = load_rollup(pd.Timestamp(start_day), pd.Timestamp(end_day) + pd.Timedelta(days=1))
+    rating_counts = rollup.sum()
+    
+    total_reviews = int(rating_counts.sum())
+    avg_rating = (rating_counts * rating_counts.index).sum() / total_reviews if total_reviews > 0 else 0
+    positive_count = int(rating_counts[[4, 5]].sum())
+    negative_count = int(rating_counts[[1, 2]].sum())
     positive_pct = (positive_count / total_reviews * 100) if total_reviews > 0 else 0
     negative_pct = (negative_count / total_reviews * 100) if total_reviews > 0 else 0
     
@@ -274,22 +365,108 @@ def main():
     col1, col2 = st.columns(2)
     
     with col1:
-        rating_chart = create_rating_distribution(df)
+        rating_chart = create_rating_distribution(rating_counts)
         if rating_chart:
             st.plotly_chart(rating_chart, use_container_width=True)
     
     with col2:
-        timeline_chart = create_timeline_chart(df)
+        col_a, col_b = st.columns([3, 2])
+        with col_a:
+            granularity = st.radio("Group by", GRANULARITIES, index=GRANULARITIES.index('day'),
+                                   format_func=str.title, horizontal=True)
+        with col_b:
+            stacked = st.toggle("By rating")
+        with metrics.timed("admin.timeline"):
+            counts = timeline(get_store(), granularity, pd.Timestamp(start_day), pd.Timestamp(end_day) + pd.Timedelta(days=1))
+        timeline_chart = create_timeline_chart(counts, stacked)
         if timeline_chart:
             st.plotly_chart(timeline_chart, use_container_width=True)
     
+    st.markdown("---")
+    show_top_issues()
+    
     st.markdown("---")
     st.markdown("## 📋 Recent Feedback")
     
-    df = df.sort_values('timestamp', ascending=False).reset_index(drop=True)
+    pending_count = count_pending()
+    running = st.session_state.get('batch') is not None
+    if pending_count > 0:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.markdown(f"**{pending_count}** review{'s' if pending_count != 1 else ''} waiting for AI analysis")
+        with col2:
+            analyze_all = st.button(f"⚡ Analyze all pending", use_container_width=True, disabled=running)
+        if analyze_all and not running:
+            start_batch(pending_count)
+    show_batch()
+    
+    with st.expander("🔎 Filter & search"):
+        query = st.text_input("Search reviews and summaries", placeholder="e.g. delivery, refund")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            ratings = st.multiselect("Rating", [1, 2, 3, 4, 5], format_func=lambda r: "⭐" * r)
+        with col2:
+            list_range = st.date_input("Submitted", value=(first_day, last_day), min_value=first_day,
+                                       max_value=last_day, key="list_range")
+        with col3:
+            status = st.selectbox("Analysis", ["All", "Analyzed", "Not analyzed"])
+        collapse = st.toggle("Collapse near-duplicates", value=True,
+                             help="Show reviews that repeat an earlier one as a single line")
+    
+    # Dates only narrow the query when they differ from the full history.
+    list_start, list_end = (list_range[0], list_range[-1]) if list_range else (first_day, last_day)
+    filters = {
+        'query': query,
+        'ratings': ratings,
+        'start': pd.Timestamp(list_start) if list_start != first_day else None,
+        'end': pd.Timestamp(list_end) + pd.Timedelta(days=1) if list_end != last_day else None,
+        'analyzed': {"All": None, "Analyzed": True, "Not analyzed": False}[status],
+    }
     
+    # Only the current page is read and rendered, so a rerun costs the same
+    # at 100 reviews as at 100,000. Changing a filter starts again at page 1.
+    col1, col2, col3 = st.columns([4, 1, 1])
+    with col2:
+        page_size = st.selectbox("Per page", PAGE_SIZES, index=PAGE_SIZES.index(PAGE_SIZE))
+    page_key = f"page_{hash((repr(filters), page_size))}"
+    page = int(st.session_state.get(page_key, 1))
+    df, matches = search_feedback(page, page_size, **filters)
+    # Keyword searches stop counting at the store's count_limit.
+    limit = get_store().count_limit
+    capped = bool(query) and matches > limit
+    page_count = max(1, -(-(limit if capped else matches) // page_size))
+    if page > page_count:
+        # Fewer matches than when this page was picked (rows changed under
+        # the same filters): show the last page instead.
+        page = page_count
+        st.session_state[page_key] = page
+        df, matches = search_feedback(page, page_size, **filters)
+    with col3:
+        st.number_input("Page", min_value=1, max_value=page_count, step=1, key=page_key)
+    with col1:
+        first = (page - 1) * page_size
+        total = f"{limit:,}+" if capped else f"{matches:,}"
+        if matches:
+            st.caption(f"Showing {first + 1}–{first + len(df)} of {total} reviews, newest first")
+        else:
+            st.caption("No reviews match these filters")
+    
+    # Picks up reviews stored by other processes since the last render,
+    # once the index has finished loading.
+    index = get_index()
+    if index.ready.is_set():
+        index.sync(get_store())
+    
+    render_started = time.perf_counter()
     for idx in range(len(df)):
         row = df.iloc[idx]
+        group = index.group_of(row['id'])
+        
+        if collapse and group != row['id']:
+            timestamp = row['timestamp'].strftime("%Y-%m-%d %H:%M")
+            st.markdown(f"🔁 {'⭐' * int(row['rating'])} **{timestamp}** • near-duplicate of review #{group}: "
+                        f"*{row['review'][:100]}*")
+            continue
         
         with st.container():
             col1, col2 = st.columns([3, 1])
@@ -298,7 +475,7 @@ def main():
                 st.markdown(f"### {get_rating_color(row['rating'])} {'⭐' * int(row['rating'])} ({row['rating']}/5)")
             
             with col2:
-                timestamp = pd.to_datetime(row['timestamp']).strftime("%Y-%m-%d %H:%M")
+                timestamp = row['timestamp'].strftime("%Y-%m-%d %H:%M")
                 st.markdown(f"**🕐 {timestamp}**")
             
             border_class = get_border_class(row['rating'])
@@ -306,6 +483,18 @@ def main():
             st.markdown("**📝 Customer Review:**")
             st.info(row['review'])
             
+            members = index.group_members(row['id'])
+            if group != row['id']:
+                st.caption(f"🔁 Near-duplicate of review #{group}")
+            elif len(members) > 1:
+                with st.expander(f"🔁 {len(members) - 1} near-duplicate review{'s' if len(members) > 2 else ''}"):
+                    for member in members[1:11]:
+                        other = get_store().get(member)
+                        if other is not None:
+                            st.markdown(f"**{other['timestamp'].strftime('%Y-%m-%d %H:%M')}** • #{member}: *{other['review']}*")
+                    if len(members) > 11:
+                        st.caption(f"...and {len(members) - 11} more")
+            
             st.markdown("**💬 AI Response Sent:**")
             st.success(f"*\"{row['ai_response']}\"*")
             
@@ -317,20 +506,20 @@ def main():
                 st.markdown(f"<div class='analysis-box'><strong>{row['summary']}</strong></div>", unsafe_allow_html=True)
                 
                 st.markdown("**✅ Recommended Actions:**")
-                try:
-                    actions = json.loads(row['actions'])
+                actions = row['actions']
+                if actions:
                     icons = ["🎯", "📋", "💡"]
                     for i, action in enumerate(actions, 1):
                         icon = icons[i-1] if i <= 3 else "💡"
                         st.markdown(f"{icon} **{i}.** {action}")
-                except:
+                else:
                     st.markdown("- Review feedback and take appropriate action")
                 
                 col1, col2, col3 = st.columns([2, 1, 2])
                 with col2:
-                    if st.button("🔄 Regenerate", key=f"regen_{idx}"):
+                    if st.button("🔄 Regenerate", key=f"regen_{row['id']}"):
                         with st.spinner("🔄 Re-analyzing feedback..."):
-                            summary, actions = update_analysis(df, idx)
+                            summary, actions = update_analysis(row['id'], row['rating'], row['review'], fresh=True)
                             st.success("✅ Analysis updated!")
                             st.rerun()
             else:
@@ -339,13 +528,16 @@ def main():
                 
                 col1, col2, col3 = st.columns([1, 2, 1])
                 with col2:
-                    if st.button(f"🤖 Generate AI Analysis", key=f"analyze_{idx}", use_container_width=True):
+                    if st.button(f"🤖 Generate AI Analysis", key=f"analyze_{row['id']}", use_container_width=True):
                         with st.spinner("🔄 Analyzing feedback with AI..."):
-                            summary, actions = update_analysis(df, idx)
+                            summary, actions = update_analysis(row['id'], row['rating'], row['review'])
                             st.success("✅ Analysis generated!")
                             st.rerun()
             
             st.markdown("---")
+    metrics.observe("admin.render_list", time.perf_counter() - render_started)
+    
+    show_system_health()
     
     st.markdown("""
     <div style='text-align: center; color: #666; padding: 2rem;'>
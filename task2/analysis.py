@@ -0,0 +1,165 @@
+import json
+import re
+
+from inference import InvalidOutputError, get_client
+from metrics import count
+
+
+# One line of model output: a "SUMMARY:" / "ACTION 2:" / "Actions:" label
+# (any case, optionally bold or a markdown heading), or a numbered or
+# bulleted list item. Anything else is plain text.
+LINE = re.compile(
+    r"[ \t>#]*[*_]*"
+    r"(?:(?P<label>summary|actions?|recommendations?)(?:[ \t]*#?(?P<number>\d))?[ \t*_]*(?:[:\-\u2013.)][ \t*_]*|$)"
+    r"|(?P<item>\d[.)]|[-*\u2022])[ \t]+[*_]*)"
+    r"(?P<text>.*)",
+    re.IGNORECASE,
+)
+
+
+def usable(summary, actions):
+    # The same bar every parse has to clear: a real sentence and at least
+    # two actions that are more than a word or two.
+    actions = [action for action in actions if len(action) > 10][:3]
+    if len(summary) > 20 and len(actions) >= 2:
+        return summary, actions
+    return None
+
+
+def parse_json_analysis(text):
+    # {"summary": "...", "actions": ["...", ...]}, possibly in a code fence
+    # or after a line of preamble.
+    try:
+        data = json.loads(text[text.index("{"):text.rindex("}") + 1])
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    data = {str(key).lower(): value for key, value in data.items()}
+    actions = data.get("actions", data.get("recommendations"))
+    if isinstance(actions, str):
+        actions = [actions]
+    if not isinstance(actions, list):
+        return None
+    return usable(str(data.get("summary") or "").strip(), [str(action).strip() for action in actions])
+
+
+def parse_labelled_analysis(text):
+    # One pass over the lines: the summary is the first line after its
+    # label, actions are "ACTION n:" lines, or list items once the summary
+    # or an "Actions:" heading has been seen. Echoed template placeholders
+    # like "[specific action]" are skipped.
+    summary, actions = "", []
+    section, waiting = None, False
+    for line in text.splitlines():
+        match = LINE.match(line)
+        if match:
+            label, number, item, content = match.groups()
+        elif waiting:
+            label = item = None
+            content = line
+        else:
+            # Plain text only counts right after a label on its own line.
+            continue
+        content = content.strip(" \t*_")
+        if content[:1] == "[" and content[-1:] == "]":
+            content = ""
+        if label:
+            section = "summary" if label.lower() == "summary" else "actions"
+            # A label on its own line takes the next line as its text,
+            # except an "Actions:" heading, which introduces a list.
+            waiting = not content and (section == "summary" or bool(number))
+        elif item:
+            if section is None and not summary:
+                continue
+            if section != "summary":
+                section = "actions"
+            waiting = False
+        elif waiting and content:
+            waiting = False
+        else:
+            continue
+        if not content:
+            continue
+        if section == "summary":
+            summary = summary or content
+            section = None
+        elif len(content) > 10:
+            actions.append(content)
+            if len(actions) == 3:
+                break
+    return usable(summary, actions)
+
+
+def parse_analysis(text):
+    # Returns (summary, actions), or None when the output is not usable.
+    # Accepts the requested SUMMARY:/ACTION n: format and its common
+    # variations (any case, markdown, numbered lists), or a JSON object.
+    if text.lstrip().startswith(("{", "```")):
+        return parse_json_analysis(text)
+    parsed = parse_labelled_analysis(text)
+    if parsed is None and "{" in text:
+        parsed = parse_json_analysis(text)
+    return parsed
+
+
+def generate_admin_analysis(rating, review, fresh=False):
+    try:
+        prompt = f"""Analyze this customer feedback professionally:
+
+Rating: {rating}/5 stars
+Review: "{review}"
+
+Provide:
+1. One sentence summary of the key issue/sentiment
+2. Three specific actionable recommendations
+
+Format your response as:
+SUMMARY: [one sentence]
+ACTION 1: [specific action]
+ACTION 2: [specific action]
+ACTION 3: [specific action]"""
+        
+        parameters = {
+            "max_new_tokens": 150,
+            "temperature": 0.7,
+            "top_p": 0.9,
+            "return_full_text": False
+        }
+        
+        # Only parseable text is cached; fresh=True (Regenerate) skips the cache.
+        # Output that does not parse gets one more sample before the fallback.
+        client = get_client()
+        try:
+            text = client.generate(prompt, parameters, fresh=fresh, validate=parse_analysis)
+        except InvalidOutputError:
+            text = client.generate(prompt, parameters, fresh=fresh, validate=parse_analysis)
+        return parse_analysis(text)
+    
+    except Exception as e:
+        print(f"AI Error: {e}")
+        count("llm_fallbacks", kind="analysis")
+    
+    if rating >= 4:
+        summary = f"Customer is highly satisfied with the service and experience (rated {rating}/5)"
+        actions = [
+            "Send personalized thank you message to customer",
+            "Request permission to use review as testimonial",
+            "Analyze what went well to replicate success"
+        ]
+    elif rating == 3:
+        summary = f"Customer had a mixed experience with room for improvement (rated {rating}/5)"
+        actions = [
+            "Contact customer to understand specific pain points",
+            "Identify service gaps mentioned in the feedback",
+            "Implement improvements in areas of concern"
+        ]
+    else:
+        summary = f"Customer expressed dissatisfaction with the service experience (rated {rating}/5)"
+        actions = [
+            "Reach out immediately to apologize and resolve issue",
+            "Conduct internal investigation into problems raised",
+            "Offer compensation to recover customer relationship"
+        ]
+    
+    return summary, actions
@@ -0,0 +1,124 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from analysis import generate_admin_analysis
+from dedupe import get_index
+from inference import RateLimiter
+from metrics import count
+from storage import get_store
+
+ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", 4))
+ANALYSIS_RATE = float(os.environ.get("ANALYSIS_RATE", 5))
+COMMIT_EVERY = 50
+
+
+def pending_rows(store=None, limit=None):
+    df = (store or get_store()).load_cached()
+    pending = df[df['summary'] == ''][['id', 'rating', 'review']]
+    return pending.head(limit) if limit else pending
+
+
+def count_pending(store=None):
+    return (store or get_store()).search(analyzed=False, limit=0)[1]
+
+
+def analyze_pending(store=None, workers=ANALYSIS_WORKERS, rate=ANALYSIS_RATE, limit=None,
+                    commit_every=COMMIT_EVERY, progress=None):
+    # Analyze every row without a summary: model calls run on a bounded pool
+    # and share one rate limit, results are written back COMMIT_EVERY rows at
+    # a time. `progress(done, total, elapsed)` is called after each row.
+    # Only one review per group of near-duplicates goes to the model; the
+    # rest take its analysis, or that of an earlier analyzed duplicate.
+    store = store or get_store()
+    rows = pending_rows(store, limit)
+    total = len(rows)
+    limiter = RateLimiter(rate)
+    index = get_index(store)
+    index.ready.wait()
+    groups = rows['id'].map(index.group_of)
+    copies = rows[groups.duplicated()]
+    rows = rows[~groups.duplicated()]
+    frame = store.load_cached()
+    analyzed = frame[frame['id'].isin(set(groups)) & (frame['summary'] != '')]
+    known = {feedback_id: (summary, list(actions))
+             for feedback_id, summary, actions in analyzed[['id', 'summary', 'actions']].itertuples(index=False)}
+
+    def analyze(feedback_id, rating, review):
+        group = index.group_of(feedback_id)
+        if group in known:
+            count("llm_calls_saved", kind="analysis")
+            return feedback_id, *known[group]
+        limiter.wait()
+        summary, actions = generate_admin_analysis(int(rating), str(review))
+        return feedback_id, summary, actions
+
+    started = time.perf_counter()
+    done = written = 0
+    buffer = []
+
+    def finish(result):
+        nonlocal done, written, buffer
+        buffer.append(result)
+        done += 1
+        if len(buffer) >= commit_every:
+            written += store.update_analyses(buffer)
+            buffer = []
+        if progress:
+            progress(done, total, time.perf_counter() - started)
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis")
+    futures = []
+    handled = set()
+    try:
+        futures = [pool.submit(analyze, *row) for row in rows.itertuples(index=False)]
+        for future in as_completed(futures):
+            handled.add(future)
+            feedback_id, summary, actions = future.result()
+            known.setdefault(index.group_of(feedback_id), (summary, actions))
+            finish((feedback_id, summary, actions))
+        for feedback_id in copies['id']:
+            count("llm_calls_saved", kind="analysis")
+            finish((feedback_id, *known[index.group_of(feedback_id)]))
+    finally:
+        # When the run is stopped (Streamlit raises from the progress
+        # callback), drop the calls not yet started but save every analysis
+        # already paid for.
+        pool.shutdown(wait=True, cancel_futures=True)
+        for future in futures:
+            if future not in handled and future.done() and not future.cancelled() and future.exception() is None:
+                buffer.append(future.result())
+        if buffer:
+            written += store.update_analyses(buffer)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'total': total,
+        'written': written,
+        'elapsed': elapsed,
+        'rows_per_sec': done / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate AI analysis for every feedback row without a summary")
+    parser.add_argument("--workers", type=int, default=ANALYSIS_WORKERS)
+    parser.add_argument("--rate", type=float, default=ANALYSIS_RATE, help="max model calls per second (0 = unlimited)")
+    parser.add_argument("--limit", type=int, help="analyze at most this many rows")
+    parser.add_argument("--backend", help="storage backend (defaults to FEEDBACK_BACKEND)")
+    args = parser.parse_args()
+
+    def report(done, total, elapsed):
+        if done == total or done % 10 == 0:
+            print(f"\r{done}/{total} analyzed, {done / elapsed:.1f} rows/s", end="", file=sys.stderr)
+
+    stats = analyze_pending(get_store(args.backend), args.workers, args.rate, args.limit, progress=report)
+    print(file=sys.stderr)
+    print(f"Analyzed {stats['total']} rows ({stats['written']} written) in {stats['elapsed']:.1f}s, "
+          f"{stats['rows_per_sec']:.1f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Upper bounds (ms) of the queue-wait histogram buckets; the last bucket
+# holds everything slower.
+WAIT_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 250, 500, 1000]
+
+
+class MicroBatcher:
+    # Process-wide scheduler for model calls. Prompts with the same client
+    # and parameters are collected for up to `window` seconds, or until
+    # max_batch are waiting, and then run together: as one call with a list
+    # of inputs when the client has batch_inputs, otherwise fanned out one
+    # call per prompt. Either way at most `workers` calls run at once.
+    def __init__(self, window=0.02, max_batch=8, workers=8):
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self.batch_sizes = Counter()
+        self.queue_waits = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def submit(self, client, prompt, parameters):
+        # Returns a Future for the generated text (unvalidated, uncached:
+        # callers go through client.generate()).
+        future = Future()
+        key = (id(client), json.dumps(parameters, sort_keys=True))
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="batch-scheduler", daemon=True)
+                self._thread.start()
+            batch = self._pending.get(key)
+            if batch is None:
+                batch = self._pending[key] = (time.monotonic() + self.window, client, parameters, [])
+                self._cond.notify()
+            batch[3].append((prompt, future, time.monotonic()))
+            full = len(batch[3]) >= self.max_batch
+            if full:
+                del self._pending[key]
+        if full:
+            self._dispatch(*batch[1:])
+        return future
+
+    def _run(self):
+        # Sends every batch whose window has closed; full batches never
+        # reach here, submit() sends those straight away.
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                due = [key for key, batch in self._pending.items() if batch[0] <= now]
+                if not due:
+                    deadline = min((batch[0] for batch in self._pending.values()), default=None)
+                    self._cond.wait(None if deadline is None else deadline - now)
+                    continue
+                batches = [self._pending.pop(key) for key in due]
+            for batch in batches:
+                self._dispatch(*batch[1:])
+
+    def _dispatch(self, client, parameters, items):
+        with self._stats_lock:
+            self.batch_sizes[len(items)] += 1
+        if client.batch_inputs:
+            self._pool.submit(self._call, client, parameters, items)
+        else:
+            for item in items:
+                self._pool.submit(self._call, client, parameters, [item])
+
+    def _call(self, client, parameters, items):
+        # Queue wait runs from submit() until the call starts: the batching
+        # window plus any time spent waiting for a free worker.
+        now = time.monotonic()
+        with self._stats_lock:
+            for _, _, enqueued in items:
+                wait = (now - enqueued) * 1000
+                self.queue_waits[next((i for i, bound in enumerate(WAIT_BUCKETS) if wait <= bound),
+                                      len(WAIT_BUCKETS))] += 1
+        try:
+            if len(items) == 1:
+                texts = [client._generate(items[0][0], parameters)]
+            else:
+                texts = client._generate_batch([prompt for prompt, _, _ in items], parameters)
+        except Exception as e:
+            for _, future, _ in items:
+                future.set_exception(e)
+            return
+        for (_, future, _), text in zip(items, texts):
+            future.set_result(text)
+
+    def stats(self):
+        with self._stats_lock:
+            labels = [f"<={bound}ms" for bound in WAIT_BUCKETS] + [f">{WAIT_BUCKETS[-1]}ms"]
+            return {
+                'batches': sum(self.batch_sizes.values()),
+                'prompts': sum(size * n for size, n in self.batch_sizes.items()),
+                'batch_sizes': dict(sorted(self.batch_sizes.items())),
+                'queue_wait': dict(zip(labels, self.queue_waits)),
+            }
+
+
+def format_histogram(histogram, width=40):
+    # {label: count} as text bars, for benchmark and CLI output.
+    top = max(histogram.values(), default=0) or 1
+    return "\n".join(f"{str(label):>10} | {'#' * round(width * count / top):<{width}} {count}"
+                     for label, count in histogram.items())
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher():
+    # Configured from INFERENCE_BATCH_WINDOW_MS (default 20; 0 turns
+    # batching off and returns None), INFERENCE_MAX_BATCH and
+    # INFERENCE_BATCH_WORKERS.
+    global _batcher
+    window = float(os.environ.get("INFERENCE_BATCH_WINDOW_MS", 20)) / 1000
+    if window <= 0:
+        return None
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = MicroBatcher(
+                window=window,
+                max_batch=int(os.environ.get("INFERENCE_MAX_BATCH", 8)),
+                workers=int(os.environ.get("INFERENCE_BATCH_WORKERS", 8)),
+            )
+        return _batcher
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    # Tracks the recent calls to one model endpoint. After `failures`
+    # failed calls in a row (errors, timeouts, or calls slower than
+    # `slow_call` seconds) the circuit opens: calls are refused at once
+    # with CircuitOpenError, so callers fall back to their templates instead
+    # of waiting out another timeout. After `cooldown` seconds one call is
+    # let through as a probe (half-open); it closes the circuit if it
+    # succeeds and reopens it if not.
+    def __init__(self, failures=5, cooldown=30.0, slow_call=20.0, window=50):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.slow_call = slow_call
+        self.state = CLOSED
+        self.opened_at = None
+        self.last_error = ""
+        self._streak = 0
+        self._probing = False
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    def acquire(self):
+        # Call before the model call; raises CircuitOpenError if it should
+        # not be made. Every successful acquire() must be followed by
+        # record() or release().
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self._probing):
+                self._probing = self.state == HALF_OPEN
+                self.stats['calls'] += 1
+                return
+            self.stats['rejected'] += 1
+        raise CircuitOpenError(f"Model endpoint unavailable ({self.last_error})")
+
+    def record(self, elapsed, error=None):
+        # The outcome of an acquired call: seconds taken, and the exception
+        # if it failed. A call that succeeded but took longer than slow_call
+        # still counts against the endpoint.
+        if error is None and elapsed > self.slow_call:
+            error = f"slow call ({elapsed:.1f}s)"
+        with self._lock:
+            self._probing = False
+            self._recent.append((elapsed, error is None))
+            if error is None:
+                self._streak = 0
+                self.state = CLOSED
+                return
+            self.stats['failures'] += 1
+            self.last_error = str(error) or type(error).__name__
+            self._streak += 1
+            if self.state == HALF_OPEN or self._streak >= self.failures:
+                if self.state != OPEN:
+                    self.stats['opened'] += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        # An acquired call that ended without a verdict, like a stream the
+        # reader abandoned: lets the next probe through.
+        with self._lock:
+            self._probing = False
+
+    def status(self):
+        with self._lock:
+            latencies = sorted(elapsed for elapsed, ok in self._recent if ok)
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+            return {
+                'state': self.state,
+                'recent_calls': len(self._recent),
+                'recent_failures': sum(not ok for _, ok in self._recent),
+                'p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else None,
+                'retry_in': retry_in,
+                'last_error': self.last_error,
+                **self.stats,
+            }
+
+
+def new_breaker():
+    # Configured from INFERENCE_BREAKER_FAILURES (default 5; 0 disables the
+    # breaker and returns None), INFERENCE_BREAKER_COOLDOWN (30 s) and
+    # INFERENCE_BREAKER_SLOW_CALL (20 s).
+    failures = int(os.environ.get("INFERENCE_BREAKER_FAILURES", 5))
+    if failures <= 0:
+        return None
+    return CircuitBreaker(
+        failures=failures,
+        cooldown=float(os.environ.get("INFERENCE_BREAKER_COOLDOWN", 30)),
+        slow_call=float(os.environ.get("INFERENCE_BREAKER_SLOW_CALL", 20)),
+    )
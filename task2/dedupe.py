@@ -0,0 +1,253 @@
+import os
+import re
+import threading
+
+import numpy as np
+
+from metrics import count
+from storage import get_store
+
+# Reviews whose 64-bit SimHashes differ in at most MAX_DISTANCE bits, and
+# that carry the same rating, are near-duplicates: the same text give or
+# take case, punctuation and spacing, and now and then a small edit.
+MAX_DISTANCE = int(os.environ.get("DEDUPE_MAX_DISTANCE", 3))
+# Sidecar file next to the store: one fixed-size record per indexed review.
+RECORD = np.dtype([('id', '<i8'), ('hash', '<u8'), ('group', '<i8'), ('rating', 'i1')])
+HASH_CHUNK = 20_000
+# Features are the overlapping 5-byte windows of the normalized text.
+SHINGLE = 5
+# Per-text feature counts are summed in byte-wide lanes, so in runs of at
+# most 255 features.
+LANE_MAX = 255
+
+
+def normalize(text):
+    # Lower case, words separated by single spaces, punctuation dropped.
+    return " ".join(re.findall(r"[^\W_]+", str(text).lower()))
+
+
+def mix(values):
+    # splitmix64 finalizer: spreads each window's bytes over all 64 bits.
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def runs(starts, sizes, limit):
+    # Splits the runs [start, start + size) into pieces of at most `limit`;
+    # returns the piece starts and the number of pieces per run.
+    pieces = -(-sizes // limit)
+    first = np.repeat(np.cumsum(pieces) - pieces, pieces)
+    return np.repeat(starts, pieces) + limit * (np.arange(pieces.sum()) - first), pieces
+
+
+def simhashes(texts):
+    # SimHash of each text: bit i is set when most of its features have bit
+    # i set. Texts are hashed a chunk at a time, entirely in numpy.
+    out = np.zeros(len(texts), dtype=np.uint64)
+    pad = b"\0" * (SHINGLE - 1)
+    for begin in range(0, len(texts), HASH_CHUNK):
+        encoded = [normalize(text).encode() for text in texts[begin:begin + HASH_CHUNK]]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        # Texts shorter than a window still get one, padded with zeros.
+        sizes = np.where(lengths > 0, np.maximum(lengths - (SHINGLE - 1), 1), 0)
+        filled = np.flatnonzero(sizes)
+        if not len(filled):
+            continue
+        buffer = np.frombuffer(pad.join(encoded) + pad, dtype=np.uint8)
+        offsets = np.cumsum(lengths + SHINGLE - 1) - lengths - (SHINGLE - 1)
+        positions, _ = runs(offsets[filled], sizes[filled], 1)
+        windows = np.zeros(len(positions), dtype=np.uint64)
+        for k in range(SHINGLE):
+            windows |= buffer[positions + k].astype(np.uint64) << np.uint64(8 * k)
+        bits = np.unpackbits(mix(windows).view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+        # Sum the bits of each text's features with eight per uint64 add,
+        # then widen: one piece per LANE_MAX features, pieces per text.
+        feature_starts = np.cumsum(sizes[filled]) - sizes[filled]
+        piece_starts, pieces = runs(feature_starts, sizes[filled], LANE_MAX)
+        lanes = np.add.reduceat(bits.view(np.uint64), piece_starts, axis=0)
+        votes = lanes.view(np.uint8).reshape(len(piece_starts), 64).astype(np.int32)
+        if len(piece_starts) > len(filled):
+            votes = np.add.reduceat(votes, np.cumsum(pieces) - pieces, axis=0)
+        majority = (2 * votes > sizes[filled, None]).astype(np.uint8)
+        out[begin + filled] = np.packbits(majority, axis=1, bitorder='little').view(np.uint64).ravel()
+    return out
+
+
+# Set bits in every 16-bit value, for counting differing bits in numpy.
+POPCOUNT = np.array([bin(i).count("1") for i in range(1 << 16)], dtype=np.uint8)
+# Buckets up to this size are compared in plain Python.
+SCAN_MAX = 16
+
+
+def distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def distances(value, others):
+    diff = np.asarray(others, dtype=np.uint64) ^ np.uint64(value)
+    words = diff.view(np.uint16).reshape(-1, 4)
+    return POPCOUNT[words].sum(axis=1, dtype=np.int64)
+
+
+class DuplicateIndex:
+    # In-memory SimHash index over a store's reviews, persisted to an
+    # append-only sidecar. The 64 bits are split into MAX_DISTANCE + 1
+    # bands: two hashes within MAX_DISTANCE bits agree exactly on at least
+    # one band, so a lookup only compares against reviews with the same
+    # rating that share a band. Each review belongs to a group, named by the
+    # first review of it; only those first reviews go into the bands.
+    def __init__(self, path, max_distance=MAX_DISTANCE):
+        self.path = path
+        self.bands = max_distance + 1
+        self.width = 64 // self.bands
+        self.max_distance = max_distance
+        # {(rating, band bits): ([group ids], [hashes])} per band
+        self.tables = [{} for _ in range(self.bands)]
+        self.groups = {}
+        self.members = {}
+        self.lock = threading.Lock()
+        # Set once the first sync() has finished.
+        self.ready = threading.Event()
+
+    def _keys(self, value, rating):
+        mask = (1 << self.width) - 1
+        return [(rating, (value >> (band * self.width)) & mask) for band in range(self.bands)]
+
+    def _match(self, value, rating):
+        # The nearest group within max_distance, or None.
+        best, best_distance = None, self.max_distance + 1
+        for table, key in zip(self.tables, self._keys(value, rating)):
+            bucket = table.get(key)
+            if bucket is None:
+                continue
+            ids, hashes = bucket
+            if len(ids) <= SCAN_MAX:
+                for group, other in zip(ids, hashes):
+                    d = distance(value, other)
+                    if d < best_distance:
+                        best, best_distance = group, d
+            else:
+                found = distances(value, hashes)
+                nearest = int(found.argmin())
+                if found[nearest] < best_distance:
+                    best, best_distance = ids[nearest], int(found[nearest])
+            if best_distance == 0:
+                break
+        return best
+
+    def _place(self, feedback_id, rating, value, group):
+        self.groups[feedback_id] = group
+        if group == feedback_id:
+            for table, key in zip(self.tables, self._keys(value, rating)):
+                ids, hashes = table.setdefault(key, ([], []))
+                ids.append(feedback_id)
+                hashes.append(value)
+            self.members[feedback_id] = [feedback_id]
+        else:
+            self.members.setdefault(group, [group]).append(feedback_id)
+
+    def _insert(self, feedback_id, rating, value):
+        # Returns the record to persist.
+        group = self._match(value, rating)
+        group = feedback_id if group is None else group
+        self._place(feedback_id, rating, value, group)
+        return (feedback_id, value, group, rating)
+
+    def _load(self, records):
+        for feedback_id, value, group, rating in records.tolist():
+            # Skips a review written twice by two processes indexing it.
+            if feedback_id not in self.groups:
+                self._place(feedback_id, rating, value, group)
+
+    def _append(self, records):
+        with open(self.path, 'ab') as f:
+            f.write(np.array(records, dtype=RECORD).tobytes())
+
+    def add(self, feedback_id, rating, review):
+        # Indexes a newly stored review; returns its group, which is another
+        # review's id when this one is a near-duplicate of it. Until the
+        # first sync is done every review is its own group, and the sync
+        # indexes it later.
+        feedback_id, rating = int(feedback_id), int(rating)
+        if not self.ready.is_set():
+            return feedback_id
+        value = int(simhashes([review])[0])
+        with self.lock:
+            if feedback_id not in self.groups:
+                self._append([self._insert(feedback_id, rating, value)])
+            group = self.groups[feedback_id]
+        count("dedupe", outcome="unique" if group == feedback_id else "duplicate")
+        return group
+
+    def group_of(self, feedback_id):
+        return self.groups.get(int(feedback_id), int(feedback_id))
+
+    def group_members(self, feedback_id):
+        return self.members.get(self.group_of(feedback_id), [int(feedback_id)])
+
+    def sync(self, store):
+        # Reads the sidecar on first use, then indexes any reviews the store
+        # has that the index does not (written by another process, or from
+        # before the index existed). A sidecar listing more reviews than the
+        # store has belongs to an older store and is rebuilt.
+        with self.lock:
+            try:
+                return self._sync(store)
+            finally:
+                self.ready.set()
+
+    def _sync(self, store):
+        rows = store.count()
+        if len(self.groups) == rows:
+            return 0
+        if not self.groups and os.path.exists(self.path):
+            records = np.fromfile(self.path, dtype=np.uint8)
+            # Drop a torn trailing record, if a write was cut short.
+            records = records[:len(records) // RECORD.itemsize * RECORD.itemsize].view(RECORD)
+            if len(records) <= rows:
+                self._load(records)
+            else:
+                os.remove(self.path)
+        if len(self.groups) == rows:
+            return 0
+        df = store.load_columns(['id', 'rating', 'review'])
+        known = np.fromiter(self.groups, dtype=np.int64, count=len(self.groups))
+        df = df[~np.isin(df['id'].to_numpy(), known)].sort_values('id')
+        values = simhashes(df['review'].astype(str).tolist())
+        records = [self._insert(int(feedback_id), int(rating), int(value))
+                   for feedback_id, rating, value in zip(df['id'], df['rating'], values.tolist())]
+        if records:
+            self._append(records)
+        return len(records)
+
+    def stats(self):
+        with self.lock:
+            return {'reviews': len(self.groups), 'groups': len(self.members)}
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(store=None):
+    # One index per store, kept in <store path>.dedupe. The first call
+    # starts bringing it up to date with the store in the background, so a
+    # large store never holds up a submit.
+    store = store or get_store()
+    with _indexes_lock:
+        index = _indexes.get(id(store))
+        if index is None:
+            index = _indexes[id(store)] = DuplicateIndex(store.path + ".dedupe")
+            threading.Thread(target=index.sync, args=(store,), name="dedupe-sync", daemon=True).start()
+    return index
+
+
+def prior_row(store, feedback_id):
+    # The first review of feedback_id's group, when it is a near-duplicate
+    # of an earlier one; None otherwise.
+    group = get_index(store).group_of(feedback_id)
+    if group == int(feedback_id):
+        return None
+    return store.get(group)
@@ -0,0 +1,471 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from batching import get_batcher
+from breaker import CircuitOpenError, new_breaker
+from llm_cache import cache_key, get_cache
+from metrics import count, observe, timed
+
+HF_API_URL = "https://api-inference.huggingface.co/models/Qwen/Qwen2-7B-Instruct"
+# The model the Task 1 results were measured with; small enough for a CPU.
+LOCAL_MODEL = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"
+
+# Statuses worth another attempt: rate limited, or the model is still loading.
+RETRY_STATUSES = {429, 503}
+
+
+class InferenceError(Exception):
+    pass
+
+
+class InvalidOutputError(InferenceError):
+    # The model answered, but validate() rejected the text.
+    pass
+
+
+def generated_text(result):
+    if not (isinstance(result, list) and len(result) > 0):
+        raise InferenceError("API response invalid")
+    return result[0].get("generated_text", "").strip()
+
+
+def stream_tokens(response):
+    # Token texts from a TGI server-sent event stream: one "data:{json}"
+    # line per token. Lines are read as the chunks arrive, not 512 bytes
+    # at a time.
+    for line in response.iter_lines(chunk_size=None):
+        if not line.startswith(b"data:"):
+            continue
+        event = json.loads(line[5:])
+        if event.get("error"):
+            raise InferenceError(f"Stream failed: {event['error']}")
+        token = event.get("token") or {}
+        if not token.get("special"):
+            yield token.get("text", "")
+
+
+def failure_outcome(error):
+    # How a failed model call is counted in the llm_calls metric.
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, (requests.Timeout, TimeoutError)):
+        return "timeout"
+    return "error"
+
+
+class ModelClient:
+    # A text-generation backend. Subclasses implement _generate(prompt,
+    # parameters) and, if they can, _stream(); the response cache and reply
+    # validation are shared. cache_id keeps replies from different models
+    # apart in the cache. With a batcher, generate() calls are queued and
+    # sent in micro-batches; batch_inputs says _generate_batch() can send
+    # several prompts in one call. With a breaker, calls are refused at once
+    # while the backend is failing; cache hits are still served.
+    cache_id = ""
+    batch_inputs = False
+    batcher = None
+    breaker = None
+
+    def _generate(self, prompt, parameters):
+        raise NotImplementedError
+
+    def _generate_batch(self, prompts, parameters):
+        return [self._generate(prompt, parameters) for prompt in prompts]
+
+    def _stream(self, prompt, parameters):
+        yield self._generate(prompt, parameters)
+
+    def generate(self, prompt, parameters, fresh=False, validate=None):
+        # Identical requests are answered from the response cache. fresh=True
+        # skips the lookup (Regenerate) but still stores the new text; only
+        # text that passes validate() is cached, anything else raises.
+        cache = get_cache()
+        key = cache_key(self.cache_id, prompt, parameters) if cache else None
+        if cache:
+            text = cache.get(key, fresh)
+            if text is not None:
+                count("llm_calls", outcome="cache_hit")
+                return text
+
+        breaker = self.breaker
+        started = time.monotonic()
+        try:
+            if breaker is not None:
+                breaker.acquire()
+            if self.batcher is not None:
+                text = self.batcher.submit(self, prompt, parameters).result().strip()
+            else:
+                text = self._generate(prompt, parameters).strip()
+        except Exception as e:
+            if breaker is not None and not isinstance(e, CircuitOpenError):
+                breaker.record(time.monotonic() - started, e)
+            count("llm_calls", outcome=failure_outcome(e))
+            raise
+        elapsed = time.monotonic() - started
+        observe("llm.request", elapsed)
+        if breaker is not None:
+            breaker.record(elapsed)
+        with timed("llm.parse"):
+            valid = validate is None or validate(text)
+        if not valid:
+            count("llm_calls", outcome="parse_failure")
+            raise InvalidOutputError("API response invalid")
+        count("llm_calls", outcome="success")
+        if cache:
+            cache.put(key, text)
+        return text
+
+    def stream(self, prompt, parameters, fresh=False, validate=None):
+        # Like generate(), but yields the reply piece by piece as the backend
+        # produces it. A cached reply comes out as one piece. validate() needs
+        # the whole text, so a rejected reply raises after it was yielded.
+        cache = get_cache()
+        key = cache_key(self.cache_id, prompt, parameters) if cache else None
+        if cache:
+            text = cache.get(key, fresh)
+            if text is not None:
+                count("llm_calls", outcome="cache_hit")
+                yield text
+                return
+
+        # The breaker judges a stream by its time to first token, since the
+        # rest is paced by generation.
+        breaker = self.breaker
+        started = time.monotonic()
+        first = None
+        parts = []
+        try:
+            if breaker is not None:
+                breaker.acquire()
+            for token in self._stream(prompt, parameters):
+                if first is None:
+                    first = time.monotonic() - started
+                    observe("llm.first_token", first)
+                if not parts:
+                    token = token.lstrip()
+                if token:
+                    parts.append(token)
+                    yield token
+        except GeneratorExit:
+            if breaker is not None:
+                breaker.release()
+            raise
+        except Exception as e:
+            if breaker is not None and not isinstance(e, CircuitOpenError):
+                breaker.record(time.monotonic() - started, e)
+            count("llm_calls", outcome=failure_outcome(e))
+            raise
+        observe("llm.stream", time.monotonic() - started)
+        if breaker is not None:
+            breaker.record(time.monotonic() - started if first is None else first)
+        text = "".join(parts).strip()
+        with timed("llm.parse"):
+            valid = validate is None or validate(text)
+        if not valid:
+            count("llm_calls", outcome="parse_failure")
+            raise InvalidOutputError("API response invalid")
+        count("llm_calls", outcome="success")
+        if cache:
+            cache.put(key, text)
+
+
+class InferenceClient(ModelClient):
+    # Hosted text-generation endpoint over HTTP. One pooled keep-alive
+    # session per process, shared by the user and admin dashboards, instead
+    # of a fresh TCP+TLS handshake per requests.post.
+    def __init__(self, url=HF_API_URL, token="", pool_size=10, connect_timeout=5.0,
+                 read_timeout=30.0, max_retries=3, backoff=0.5, backoff_cap=8.0, batch_inputs=False):
+        self.url = url
+        self.batch_inputs = batch_inputs
+        self.cache_id = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_cap = backoff_cap
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        self.stats = {'requests': 0, 'retries': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _delay(self, attempt, response=None):
+        # Full jitter: a random wait up to the exponential step, so sessions
+        # that failed together do not retry together. Retry-After wins.
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_cap)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_cap, self.backoff * 2 ** attempt))
+
+    def post(self, payload, stream=False):
+        for attempt in range(self.max_retries + 1):
+            self._count('requests')
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout, stream=stream)
+            except requests.ConnectionError:
+                # Includes connect timeouts; read timeouts are not retried
+                # since the request may already be running on the server.
+                if attempt == self.max_retries:
+                    raise
+                response = None
+            if response is not None and (response.status_code not in RETRY_STATUSES or attempt == self.max_retries):
+                return response
+            if response is not None:
+                response.close()
+            self._count('retries')
+            time.sleep(self._delay(attempt, response))
+
+    def _generate(self, prompt, parameters):
+        response = self.post({"inputs": prompt, "parameters": parameters})
+        if response.status_code != 200:
+            raise InferenceError(f"Inference API returned HTTP {response.status_code}")
+        return generated_text(response.json())
+
+    def _generate_batch(self, prompts, parameters):
+        # Endpoints that accept a list of inputs answer with one result per
+        # prompt, in order.
+        response = self.post({"inputs": prompts, "parameters": parameters})
+        if response.status_code != 200:
+            raise InferenceError(f"Inference API returned HTTP {response.status_code}")
+        result = response.json()
+        if not (isinstance(result, list) and len(result) == len(prompts)):
+            raise InferenceError("API response invalid")
+        return [generated_text([item]) for item in result]
+
+    def _stream(self, prompt, parameters):
+        response = self.post({"inputs": prompt, "parameters": parameters, "stream": True}, stream=True)
+        with response:
+            if response.status_code != 200:
+                raise InferenceError(f"Inference API returned HTTP {response.status_code}")
+            if response.headers.get("Content-Type", "").startswith("text/event-stream"):
+                yield from stream_tokens(response)
+            else:
+                # Endpoint without streaming support: the whole reply at once.
+                yield generated_text(response.json())
+
+
+class LocalClient(ModelClient):
+    # Runs the model in this process on the CPU, with no network hop: a
+    # .gguf file through llama-cpp-python, anything else as a transformers
+    # model id or directory. Neither package is a requirement; the one
+    # needed is imported when the model is first used. Calls are serialized,
+    # since concurrent generations would only compete for the same cores.
+    def __init__(self, model=LOCAL_MODEL, threads=None):
+        self.model = model
+        self.threads = threads
+        self.cache_id = f"local:{model}"
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    @property
+    def gguf(self):
+        return self.model.endswith(".gguf")
+
+    def _load(self):
+        with self._load_lock:
+            if self._model is None:
+                try:
+                    if self.gguf:
+                        from llama_cpp import Llama
+                        self._model = Llama(model_path=self.model, n_ctx=2048, n_threads=self.threads, verbose=False)
+                    else:
+                        import torch
+                        from transformers import pipeline
+                        if self.threads:
+                            torch.set_num_threads(self.threads)
+                        self._model = pipeline("text-generation", model=self.model, device="cpu")
+                except ImportError as e:
+                    package = "llama-cpp-python" if self.gguf else "transformers and torch"
+                    raise InferenceError(f"Local inference needs {package} ({e})")
+        return self._model
+
+    def _options(self, parameters):
+        temperature = parameters.get("temperature", 0.7)
+        if self.gguf:
+            return {"max_tokens": parameters.get("max_new_tokens", 100),
+                    "temperature": temperature, "top_p": parameters.get("top_p", 0.9)}
+        return {"max_new_tokens": parameters.get("max_new_tokens", 100), "do_sample": temperature > 0,
+                "temperature": temperature, "top_p": parameters.get("top_p", 0.9), "return_full_text": False}
+
+    def _generate(self, prompt, parameters):
+        model = self._load()
+        with self._lock:
+            result = model(prompt, **self._options(parameters))
+        if self.gguf:
+            return result["choices"][0]["text"]
+        return generated_text(result)
+
+    def _stream(self, prompt, parameters):
+        model = self._load()
+        with self._lock:
+            if self.gguf:
+                for chunk in model(prompt, stream=True, **self._options(parameters)):
+                    yield chunk["choices"][0]["text"]
+                return
+            from transformers import TextIteratorStreamer
+            streamer = TextIteratorStreamer(model.tokenizer, skip_prompt=True, skip_special_tokens=True)
+            worker = threading.Thread(target=model, args=(prompt,), daemon=True,
+                                      kwargs=dict(self._options(parameters), streamer=streamer))
+            worker.start()
+            yield from streamer
+            worker.join()
+
+
+STUB_REPLY = ("Thank you for sharing your experience with us. We have passed your comments on to the team "
+              "and will use them to keep improving.")
+STUB_ANALYSIS = """SUMMARY: Customer shared feedback about their recent order and overall experience.
+ACTION 1: Contact the customer to thank them and follow up on their comments
+ACTION 2: Share the feedback with the team responsible for this product
+ACTION 3: Track similar feedback to spot recurring issues early"""
+
+
+class StubClient(ModelClient):
+    # Canned replies and no model, so the whole pipeline runs and can be
+    # benchmarked offline. Prompts asking for a "SUMMARY:" get a parseable
+    # analysis, Task 1 rating prompts a JSON prediction, everything else a
+    # customer reply. latency is waited before the first word, token_delay
+    # between words; a batch takes as long as its longest reply.
+    cache_id = "stub"
+    batch_inputs = True
+
+    def __init__(self, latency=0.0, token_delay=0.0):
+        self.latency = latency
+        self.token_delay = token_delay
+
+    def _reply(self, prompt):
+        if "predicted_stars" in prompt:
+            # Task 1 rating prompts: a well-formed prediction that depends
+            # only on the prompt.
+            stars = zlib.crc32(prompt.encode()) % 5 + 1
+            return json.dumps({"predicted_stars": stars, "explanation": "Stub prediction."})
+        return STUB_ANALYSIS if "SUMMARY:" in prompt else STUB_REPLY
+
+    def _generate(self, prompt, parameters):
+        text = self._reply(prompt)
+        time.sleep(self.latency + self.token_delay * (len(text.split()) - 1))
+        return text
+
+    def _generate_batch(self, prompts, parameters):
+        texts = [self._reply(prompt) for prompt in prompts]
+        time.sleep(self.latency + self.token_delay * (max(len(text.split()) for text in texts) - 1))
+        return texts
+
+    def _stream(self, prompt, parameters):
+        time.sleep(self.latency)
+        for i, word in enumerate(re.findall(r"\s*\S+", self._reply(prompt))):
+            if i and self.token_delay:
+                time.sleep(self.token_delay)
+            yield word
+
+
+BACKENDS = {
+    'http': InferenceClient,
+    'local': LocalClient,
+    'stub': StubClient,
+}
+
+
+class RateLimiter:
+    # Spaces calls at least 1/rate seconds apart across all threads; a rate
+    # of 0 or None means unlimited.
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(token=None, url=None, backend=None):
+    # Backend is chosen with INFERENCE_BACKEND: "http" (default) for the
+    # hosted endpoint, "local" for INFERENCE_LOCAL_MODEL on this machine's
+    # CPU, "stub" for canned replies. For http the URL comes from
+    # INFERENCE_URL (defaults to the hosted Qwen2) and, unless passed, the
+    # token from HF_TOKEN; pool size, timeouts and retries from the other
+    # INFERENCE_* variables; INFERENCE_BATCH_INPUTS=1 sends micro-batches
+    # as one list of inputs. One client per configuration and process, each
+    # with its own circuit breaker (INFERENCE_BREAKER_*).
+    backend = backend or os.environ.get("INFERENCE_BACKEND", "http")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    with _clients_lock:
+        if backend == 'local':
+            key = (backend, os.environ.get("INFERENCE_LOCAL_MODEL", LOCAL_MODEL))
+            if key not in _clients:
+                threads = os.environ.get("INFERENCE_LOCAL_THREADS")
+                _clients[key] = LocalClient(key[1], int(threads) if threads else None)
+        elif backend == 'stub':
+            key = (backend,)
+            if key not in _clients:
+                _clients[key] = StubClient(
+                    latency=float(os.environ.get("INFERENCE_STUB_LATENCY", 0)),
+                    token_delay=float(os.environ.get("INFERENCE_STUB_TOKEN_DELAY", 0)),
+                )
+        else:
+            url = url or os.environ.get("INFERENCE_URL", HF_API_URL)
+            token = os.environ.get("HF_TOKEN", "") if token is None else token
+            key = (backend, url, token)
+            if key not in _clients:
+                _clients[key] = InferenceClient(
+                    url=url,
+                    token=token,
+                    pool_size=int(os.environ.get("INFERENCE_POOL_SIZE", 10)),
+                    connect_timeout=float(os.environ.get("INFERENCE_CONNECT_TIMEOUT", 5)),
+                    read_timeout=float(os.environ.get("INFERENCE_READ_TIMEOUT", 30)),
+                    max_retries=int(os.environ.get("INFERENCE_MAX_RETRIES", 3)),
+                    batch_inputs=os.environ.get("INFERENCE_BATCH_INPUTS", "0") == "1",
+                )
+        client = _clients[key]
+        if client.breaker is None:
+            client.breaker = new_breaker()
+    # Non-streaming calls share the process-wide micro-batcher, if enabled.
+    client.batcher = get_batcher()
+    return client
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def submit_background(fn, *args, **kwargs):
+    # Process-wide worker pool for model calls that should not block a
+    # Streamlit rerun. Size with INFERENCE_WORKERS.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.environ.get("INFERENCE_WORKERS", 8)),
+                thread_name_prefix="inference"
+            )
+    return _executor.submit(fn, *args, **kwargs)
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_FILE = "llm_cache.db"
+
+
+def cache_key(url, prompt, parameters):
+    # Content address of one generation request: same model, prompt and
+    # sampling parameters -> same key.
+    blob = json.dumps([url, prompt, parameters], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    # Persistent SQLite cache of generated text with a TTL and LRU eviction
+    # by entry count and total size.
+    evict_every = 100
+
+    def __init__(self, path=CACHE_FILE, ttl=7 * 24 * 3600, max_entries=10_000, max_bytes=50 * 2**20):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self.stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'stored': 0, 'evicted': 0}
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed)")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def get(self, key, fresh=False):
+        if fresh:
+            self._count('bypassed')
+            return None
+        conn = self._conn()
+        row = conn.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or now - row[1] > self.ttl:
+            self._count('misses')
+            return None
+        with conn:
+            conn.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+        self._count('hits')
+        return row[0]
+
+    def put(self, key, value):
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+        self._count('stored')
+        with self._lock:
+            self._inserts += 1
+            evict = self._inserts % self.evict_every == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        conn = self._conn()
+        with conn:
+            expired = conn.execute("DELETE FROM llm_cache WHERE created < ?", (time.time() - self.ttl,)).rowcount
+            count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM llm_cache").fetchone()
+            removed = 0
+            # Drop least recently used entries until both limits hold.
+            for key, length in conn.execute("SELECT key, LENGTH(value) FROM llm_cache ORDER BY accessed").fetchall():
+                if count - removed <= self.max_entries and size <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                removed += 1
+                size -= length
+        self._count('evicted', expired + removed)
+
+    def clear(self):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM llm_cache")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    # Shared cache configured by LLM_CACHE_* variables; LLM_CACHE=0 turns it
+    # off (returns None).
+    global _cache
+    if os.environ.get("LLM_CACHE", "1") == "0":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(
+                path=os.environ.get("LLM_CACHE_PATH", CACHE_FILE),
+                ttl=float(os.environ.get("LLM_CACHE_TTL", 7 * 24 * 3600)),
+                max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 10_000)),
+                max_bytes=int(os.environ.get("LLM_CACHE_MAX_BYTES", 50 * 2**20)),
+            )
+        return _cache
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# In-process timings and counters for the dashboards and the model client,
+# shown in the admin dashboard's System health panel and, with METRICS_PORT
+# set, served as Prometheus text. APP_METRICS=0 turns recording off;
+# timed() then hands back a shared no-op context manager.
+ENABLED = os.environ.get("APP_METRICS", "1") != "0"
+
+# Upper bounds (seconds) of the exported histogram buckets.
+BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+# Percentiles are taken over the most recent samples of each stage.
+RECENT = 1000
+
+_lock = threading.Lock()
+_stages = {}
+_counters = Counter()
+_null = nullcontext()
+
+
+class Stage:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=RECENT)
+
+
+def observe(stage, seconds):
+    if not ENABLED:
+        return
+    with _lock:
+        timings = _stages.get(stage)
+        if timings is None:
+            timings = _stages[stage] = Stage()
+        timings.buckets[bisect_left(BUCKETS, seconds)] += 1
+        timings.count += 1
+        timings.total += seconds
+        timings.recent.append(seconds)
+
+
+class Timer:
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+def timed(stage):
+    # with timed("user.save"): ...  records how long the block took,
+    # including blocks that raise.
+    return Timer(stage) if ENABLED else _null
+
+
+def count(name, **labels):
+    # count("llm_calls", outcome="timeout") adds one to that counter.
+    if ENABLED:
+        with _lock:
+            _counters[(name, tuple(sorted(labels.items())))] += 1
+
+
+def percentile(samples, q):
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def snapshot():
+    # {'stages': {stage: {count, mean, p50, p95, p99}}, 'counters':
+    # {(name, labels): n}}, times in seconds.
+    with _lock:
+        stages = {stage: (timings.count, timings.total, sorted(timings.recent))
+                  for stage, timings in _stages.items()}
+        counters = dict(_counters)
+    return {
+        'stages': {
+            stage: {
+                'count': n,
+                'mean': total / n,
+                'p50': percentile(recent, 0.5),
+                'p95': percentile(recent, 0.95),
+                'p99': percentile(recent, 0.99),
+            }
+            for stage, (n, total, recent) in sorted(stages.items())
+        },
+        'counters': dict(sorted(counters.items())),
+    }
+
+
+def format_labels(labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}" if labels else ""
+
+
+def prometheus_text():
+    # Text exposition format: one histogram with a stage label, and each
+    # counter as <name>_total.
+    with _lock:
+        stages = [(stage, list(timings.buckets), timings.count, timings.total)
+                  for stage, timings in sorted(_stages.items())]
+        counters = sorted(_counters.items())
+    lines = ["# TYPE app_stage_seconds histogram"]
+    for stage, buckets, n, total in stages:
+        cumulative = 0
+        for bound, bucket in zip(BUCKETS + ["+Inf"], buckets):
+            cumulative += bucket
+            lines.append(f'app_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'app_stage_seconds_sum{{stage="{stage}"}} {total}')
+        lines.append(f'app_stage_seconds_count{{stage="{stage}"}} {n}')
+    for name in sorted({name for (name, _), _ in counters}):
+        lines.append(f"# TYPE app_{name}_total counter")
+        lines += [f"app_{name}_total{format_labels(labels)} {n}"
+                  for (counter, labels), n in counters if counter == name]
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        data = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve_metrics(port=None):
+    # Serves prometheus_text() on METRICS_PORT (any path), bound to
+    # METRICS_HOST (default 127.0.0.1). Once per process; does nothing when
+    # no port is configured.
+    global _server
+    port = port or int(os.environ.get("METRICS_PORT", 0))
+    if not port or not ENABLED:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((os.environ.get("METRICS_HOST", "127.0.0.1"), port), MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
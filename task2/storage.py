@@ -0,0 +1,1340 @@
+import csv
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    TEXT_DTYPE = "string[pyarrow]"
+except ImportError:
+    pa = None
+    TEXT_DTYPE = object
+
+COLUMNS = ['id', 'timestamp', 'rating', 'review', 'ai_response', 'summary', 'actions']
+
+DATA_FILE = "feedback_data.csv"
+DB_FILE = "feedback_data.db"
+PARQUET_DIR = "feedback_data.parquet"
+
+
+def empty_frame():
+    return pd.DataFrame(columns=COLUMNS)
+
+
+def _decode_action_list(text):
+    try:
+        actions = json.loads(text) if text else []
+    except (TypeError, ValueError):
+        return ()
+    return tuple(str(a) for a in actions) if isinstance(actions, list) else ()
+
+
+def decode_actions(series):
+    # Most rows share a handful of fallback action lists, so decode each
+    # distinct JSON string once and let rows point at the same tuple.
+    decoded = {}
+    out = []
+    for value in series:
+        if not isinstance(value, tuple):
+            text = value if isinstance(value, str) else ''
+            if text not in decoded:
+                decoded[text] = _decode_action_list(text)
+            value = decoded[text]
+        out.append(value)
+    return pd.Series(out, index=series.index, dtype=object)
+
+
+def _to_text(series):
+    return series.fillna('').astype(str).astype(TEXT_DTYPE)
+
+
+def _to_category(series):
+    return series.fillna('').astype(str).astype('category')
+
+
+# In-memory schema used by load_cached(): ints sized to their range,
+# timestamps parsed once, Arrow-backed review text, categoricals for the
+# mostly-templated response/summary columns and pre-decoded action tuples.
+# Every converter also accepts already-typed values.
+CONVERTERS = {
+    'id': lambda s: s.astype('int64'),
+    'timestamp': lambda s: pd.to_datetime(s, format='ISO8601'),
+    'rating': lambda s: s.astype('int8'),
+    'review': _to_text,
+    'ai_response': _to_category,
+    'summary': _to_category,
+    'actions': decode_actions,
+}
+CATEGORY_COLUMNS = ['ai_response', 'summary']
+ARROW_COLUMNS = ['review'] if TEXT_DTYPE != object else []
+
+
+def to_typed(df):
+    return pd.DataFrame({col: CONVERTERS[col](df[col]) for col in COLUMNS}, index=df.index)
+
+
+def new_id(last_id=0):
+    # Millisecond timestamp ids, bumped past the last issued id so two
+    # submissions in the same millisecond never share an id.
+    return max(int(time.time() * 1000), int(last_id) + 1)
+
+
+def check_fields(fields):
+    unknown = set(fields) - set(COLUMNS[1:])
+    if unknown:
+        raise ValueError(f"Unknown feedback columns: {sorted(unknown)}")
+
+
+class WriteLock:
+    # Serializes writers: a thread lock for sessions inside this process plus
+    # an flock on a sidecar file for other processes (where fcntl exists).
+    def __init__(self, path):
+        self.path = path + ".lock"
+        self._thread_lock = threading.RLock()
+        self._local = threading.local()
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0 and fcntl is not None:
+            self._local.fd = open(self.path, 'a')
+            fcntl.flock(self._local.fd, fcntl.LOCK_EX)
+        self._local.depth = depth + 1
+        return self
+
+    def __exit__(self, *exc):
+        self._local.depth -= 1
+        if self._local.depth == 0 and fcntl is not None:
+            fcntl.flock(self._local.fd, fcntl.LOCK_UN)
+            self._local.fd.close()
+        self._thread_lock.release()
+
+
+def arrow_chunks(values):
+    data = pa.array(values)
+    return data.chunks if isinstance(data, pa.ChunkedArray) else [data]
+
+
+class TypedRows:
+    # The typed frame behind load_cached(), kept as column buffers with spare
+    # capacity at the end. Appended rows are copied into the spare room and
+    # the new frame is a view of the first `length` rows, so an append costs
+    # O(new rows) and a frame already handed out never sees rows past its
+    # own length. Updates first copy the columns they change, since older
+    # frames may still be read by another session.
+    #
+    # Categorical columns keep their codes here and only ever append
+    # categories. Each new category makes pandas re-check the whole list, so
+    # a column whose values are mostly unique (real model replies) is kept
+    # as text instead. Arrow text is immutable: it is kept as chunks, merged
+    # like a binary counter.
+    def __init__(self, frame):
+        self.length = len(frame)
+        self.capacity = self.length + max(self.length // 4, 1024)
+        ids = frame['id'].to_numpy()
+        self.max_id = int(ids.max()) if len(ids) else 0
+        self.ids_sorted = bool(frame['id'].is_monotonic_increasing)
+        self.kinds = {}
+        self.dtypes = {}
+        self.buffers = {}
+        self.terms = None
+        for col in COLUMNS:
+            values = frame[col]
+            if col in CATEGORY_COLUMNS and not self._mostly_unique(len(values.cat.categories)):
+                self.kinds[col] = 'category'
+                self.dtypes[col] = values.dtype
+                values = values.cat.codes
+            elif col in CATEGORY_COLUMNS or col == 'review':
+                self._set_text(col, _to_text(values.astype(object)))
+                continue
+            else:
+                self.kinds[col] = 'array'
+            self.buffers[col] = np.empty(self.capacity, dtype=values.dtype)
+            self.buffers[col][:self.length] = values.to_numpy()
+        self.frame = self._view()
+
+    def _mostly_unique(self, categories):
+        return categories > max(self.length // 2, 4096)
+
+    def _set_text(self, col, values):
+        if pa is None:
+            self.kinds[col] = 'array'
+            self.buffers[col] = np.empty(self.capacity, dtype=object)
+            self.buffers[col][:len(values)] = values.to_numpy()
+        else:
+            self.kinds[col] = 'arrow'
+            self.buffers[col] = []
+            self._add_chunks(col, arrow_chunks(values.array))
+
+    def _view(self):
+        columns = {}
+        for col in COLUMNS:
+            if self.kinds[col] == 'category':
+                columns[col] = pd.Categorical.from_codes(
+                    self.buffers[col][:self.length], dtype=self.dtypes[col], validate=False)
+            elif self.kinds[col] == 'arrow':
+                columns[col] = pd.arrays.ArrowStringArray(pa.chunked_array(self.buffers[col], type=pa.large_string()))
+            else:
+                columns[col] = self.buffers[col][:self.length]
+        return pd.DataFrame(columns, copy=False)
+
+    def _add_chunks(self, col, chunks):
+        # At most log2(rows) chunks; each row is re-copied O(log rows) times.
+        kept = self.buffers[col]
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+            kept.append(chunk.cast(pa.large_string()))
+            while len(kept) > 1 and len(kept[-2]) <= len(kept[-1]):
+                kept[-2:] = [pa.concat_arrays(kept[-2:])]
+
+    def _codes(self, col, values):
+        # Codes of `values` in the column's categories, adding unseen ones at
+        # the end so codes already stored stay valid.
+        categories = self.dtypes[col].categories
+        codes = categories.get_indexer(values)
+        if (codes < 0).any():
+            categories = categories.append(pd.Index(pd.unique(values[codes < 0])))
+            self.dtypes[col] = pd.CategoricalDtype(categories)
+            codes = categories.get_indexer(values)
+            # pandas widens the codes (int8, int16, ...) as categories grow.
+            width = pd.Categorical([], dtype=self.dtypes[col]).codes.dtype
+            if self.buffers[col].dtype != width:
+                self.buffers[col] = self.buffers[col].astype(width)
+        return codes
+
+    def positions(self, ids):
+        # Row of each id, -1 when absent. Ids past the largest one stored
+        # (every fresh submission) are never looked up.
+        ids = np.asarray(ids, dtype=np.int64)
+        out = np.full(len(ids), -1, dtype=np.int64)
+        known = np.flatnonzero(ids <= self.max_id)
+        if len(known) and self.length:
+            stored = self.buffers['id'][:self.length]
+            if self.ids_sorted:
+                found = np.minimum(np.searchsorted(stored, ids[known]), self.length - 1)
+                out[known] = np.where(stored[found] == ids[known], found, -1)
+            else:
+                out[known] = pd.Index(stored).get_indexer(ids[known])
+        return out
+
+    def find(self, term):
+        # Row positions matching one search term. The index is built on the
+        # first keyword search and kept up to date by merge() after that.
+        if self.terms is None:
+            self.terms = TermIndex(search_texts(self.frame))
+        return self.terms.find(term)
+
+    def merge(self, changed):
+        # New and updated typed rows; returns self with a new `frame`.
+        changed = changed.reset_index(drop=True)
+        positions = self.positions(changed['id'])
+        existing = positions >= 0
+        updated, positions = changed[existing], positions[existing]
+        new = changed[~existing].sort_values('id', kind='stable')
+        if self.terms is not None and len(updated):
+            # Only rows whose text changed are re-indexed.
+            before = self._at('review', positions) + ' ' + self._at('summary', positions)
+            edited = before != search_texts(updated).to_numpy()
+        if len(updated):
+            self._update(positions, updated)
+        if len(new):
+            self._append(new)
+        if self.terms is not None:
+            if len(updated):
+                self.terms.add(positions[edited], search_texts(updated)[edited])
+            self.terms.add(range(self.length - len(new), self.length), search_texts(new))
+            if self.terms.full():
+                self.terms = None
+        for col in CATEGORY_COLUMNS:
+            if self.kinds[col] == 'category' and self._mostly_unique(len(self.dtypes[col].categories)):
+                codes = self.buffers[col][:self.length]
+                self._set_text(col, _to_text(pd.Series(pd.Categorical.from_codes(codes, dtype=self.dtypes[col])).astype(object)))
+        self.frame = self._view()
+        return self
+
+    def _append(self, rows):
+        end = self.length + len(rows)
+        if end > self.capacity:
+            self.capacity = max(end, 2 * self.capacity)
+            for col, kind in self.kinds.items():
+                if kind != 'arrow':
+                    buffer = self.buffers[col]
+                    self.buffers[col] = np.empty(self.capacity, dtype=buffer.dtype)
+                    self.buffers[col][:self.length] = buffer[:self.length]
+        for col, kind in self.kinds.items():
+            values = rows[col]
+            if kind == 'arrow':
+                self._add_chunks(col, arrow_chunks(_to_text(values.astype(object)).array))
+            elif kind == 'category':
+                self.buffers[col][self.length:end] = self._codes(col, np.asarray(values, dtype=object))
+            else:
+                self.buffers[col][self.length:end] = np.asarray(values, dtype=self.buffers[col].dtype)
+        ids = rows['id'].to_numpy()
+        self.ids_sorted = self.ids_sorted and int(ids[0]) > self.max_id
+        self.max_id = max(self.max_id, int(ids.max()))
+        self.length = end
+
+    def _owners(self, col, positions):
+        # Arrow chunk holding each position, and the chunk start offsets.
+        offsets = np.cumsum([0] + [len(chunk) for chunk in self.buffers[col]])
+        return np.searchsorted(offsets, positions, side='right') - 1, offsets
+
+    def _at(self, col, positions):
+        # Values of `col` at `positions`, reading only those rows.
+        kind = self.kinds[col]
+        if kind == 'category':
+            return np.asarray(self.dtypes[col].categories, dtype=object)[self.buffers[col][positions]]
+        if kind == 'array':
+            return self.buffers[col][positions]
+        owners, offsets = self._owners(col, positions)
+        out = np.empty(len(positions), dtype=object)
+        for i in np.unique(owners):
+            chunk = self.buffers[col][i].take(pa.array(positions[owners == i] - offsets[i]))
+            out[owners == i] = chunk.to_numpy(zero_copy_only=False)
+        return out
+
+    def _update(self, positions, rows):
+        for col in COLUMNS[1:]:
+            kind = self.kinds[col]
+            new = rows[col].to_numpy() if kind == 'array' else np.asarray(rows[col], dtype=object)
+            if np.array_equal(self._at(col, positions), new):
+                continue
+            if kind == 'arrow':
+                # Rebuild only the chunks holding updated rows; a reply to a
+                # fresh submission lands in one of the small recent ones.
+                chunks = self.buffers[col]
+                owners, offsets = self._owners(col, positions)
+                for i in np.unique(owners):
+                    values = chunks[i].to_numpy(zero_copy_only=False)
+                    values[positions[owners == i] - offsets[i]] = new[owners == i]
+                    chunks[i] = pa.array(values, type=pa.large_string())
+                continue
+            if kind == 'category':
+                new = self._codes(col, new)
+            self.buffers[col] = self.buffers[col].copy()
+            self.buffers[col][positions] = new
+
+
+def read_range(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+def read_journal(path, start=0, end=None, strict=False):
+    # Update records appended since byte `start`. A line that does not parse
+    # is a torn write: skipped on a full read, or None with strict=True so
+    # an incremental refresh falls back to a full load.
+    if not os.path.exists(path):
+        return []
+    end = os.path.getsize(path) if end is None else end
+    records = []
+    for line in read_range(path, start, end).decode('utf-8').splitlines():
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            if strict:
+                return None
+    return records
+
+
+def apply_journal(df, records):
+    if not records or len(df) == 0:
+        return df
+    # Last write wins per (id, column); columns a record does not mention
+    # are left alone.
+    updates = pd.DataFrame(records).groupby('id').last()
+    df = df.set_index('id')
+    updates = updates[updates.index.isin(df.index)]
+    for col in updates.columns:
+        values = updates[col].dropna()
+        df.loc[values.index, col] = values
+    return df.reset_index()[COLUMNS]
+
+
+def merge_journal(rows, records):
+    # Typed counterpart of apply_journal: rebuild just the touched rows and
+    # merge them like any other changed rows.
+    if not records:
+        return rows
+    positions = rows.positions([r['id'] for r in records])
+    touched = rows.frame.iloc[np.unique(positions[positions >= 0])].astype(object)
+    return rows.merge(to_typed(apply_journal(touched, records)))
+
+
+def where_clause(filters):
+    # [(condition, params), ...] -> (" WHERE a AND b", params)
+    if not filters:
+        return "", []
+    return " WHERE " + " AND ".join(c for c, _ in filters), [p for _, params in filters for p in params]
+
+
+def filter_time(df, start=None, end=None):
+    # `start` inclusive, `end` exclusive.
+    if start is not None:
+        df = df[df['timestamp'] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df['timestamp'] < pd.Timestamp(end)]
+    return df
+
+
+RATINGS = [1, 2, 3, 4, 5]
+
+
+WORD = re.compile(r'[^\W_]+')
+
+
+def search_terms(text):
+    # Lower-cased words of a search box entry; each is matched as a word
+    # prefix in review and summary.
+    return WORD.findall(str(text or '').lower())
+
+
+def search_texts(frame):
+    # What a keyword search looks at in each row.
+    return frame['review'].astype(object) + ' ' + frame['summary'].astype(object)
+
+
+def split_words(texts):
+    # Every word of every text, split like search_terms(), and its row.
+    if pa is None:
+        lists = [search_terms(text) for text in texts]
+        rows = np.repeat(np.arange(len(lists)), [len(words) for words in lists])
+        return rows, pd.Series(list(chain.from_iterable(lists)), dtype=object)
+    lists = pc.split_pattern_regex(pc.utf8_lower(pa.array(texts, type=pa.large_string())), r'[^\pL\pN]+')
+    words = pc.list_flatten(lists)
+    keep = pc.greater(pc.utf8_length(words), 0)
+    rows = pc.list_parent_indices(lists).filter(keep).to_numpy()
+    return rows, pd.Series(pd.arrays.ArrowStringArray(words.filter(keep)))
+
+
+class TermIndex:
+    # In-process inverted index over review and summary for the backends
+    # without FTS5: each distinct lower-cased word maps to the rows holding
+    # it. Words are kept sorted, so the words starting with a search term
+    # own one contiguous run of postings. Rows appended or edited after the
+    # build are indexed in dicts of their own (edited rows are masked out of
+    # the sorted postings) until `full()`, when the owner rebuilds it.
+    # find() may repeat a row; callers use the positions as a mask.
+    def __init__(self, texts):
+        rows, words = split_words(texts)
+        codes, words = words.factorize(sort=True)
+        self.words = np.asarray(words, dtype=object)
+        self.postings = rows[np.argsort(codes)].astype(np.int32)
+        self.starts = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(words)))])
+        self.stale = np.zeros(len(texts), dtype=bool)
+        self.recent = {}
+        self.recent_words = {}
+
+    def add(self, positions, texts):
+        # (Re-)index rows appended or edited since the build.
+        for position, text in zip(positions, texts):
+            position = int(position)
+            for word in self.recent_words.pop(position, ()):
+                self.recent[word].discard(position)
+            if position < len(self.stale):
+                self.stale[position] = True
+            self.recent_words[position] = set(search_terms(text))
+            for word in self.recent_words[position]:
+                self.recent.setdefault(word, set()).add(position)
+
+    def full(self):
+        return len(self.recent_words) > max(len(self.stale) // 8, 10_000)
+
+    def find(self, term):
+        # Positions of the rows with a word starting with `term`.
+        lo, hi = np.searchsorted(self.words, [term, term + chr(0x10ffff)])
+        found = self.postings[self.starts[lo]:self.starts[hi]]
+        found = found[~self.stale[found]]
+        recent = [p for word, positions in self.recent.items() if word.startswith(term) for p in positions]
+        return np.concatenate([found, np.array(recent, dtype=found.dtype)]) if recent else found
+
+
+def day_counts(df):
+    # {"YYYY-MM-DD": [1-star count, ..., 5-star count]} from typed
+    # timestamp/rating columns, in the same shape the rollups store.
+    if len(df) == 0:
+        return {}
+    table = pd.crosstab(df['timestamp'].dt.floor('D'), df['rating']).reindex(columns=RATINGS, fill_value=0)
+    return {day.strftime('%Y-%m-%d'): [int(c) for c in counts] for day, counts in zip(table.index, table.to_numpy())}
+
+
+def rollup_frame(days):
+    # Days x ratings count frame, indexed by day.
+    frame = pd.DataFrame.from_dict(days, orient='index', columns=RATINGS, dtype='int64')
+    frame.index = pd.to_datetime(frame.index, format='%Y-%m-%d')
+    return frame.sort_index()
+
+
+def read_rollup(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_rollup(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(data, separators=(',', ':')))
+    os.replace(tmp_path, path)
+
+
+class FeedbackStore:
+    # Subclasses provide load(), version() and _apply_changes(); load_cached()
+    # keeps one typed frame (see CONVERTERS) per store, shared by every
+    # Streamlit session. load() stays raw, in the on-disk representation.
+    # search() totals above count_limit may be reported as count_limit + 1.
+    count_limit = 1_000
+    def __init__(self):
+        self._cache_lock = threading.Lock()
+        self._cached = None
+        self._cached_version = None
+        self._newest_first = None
+        self._rollup = None
+
+    def update_row(self, feedback_id, **fields):
+        return self.update_rows([(feedback_id, fields)]) == 1
+
+    def update_analysis(self, feedback_id, summary, actions):
+        return self.update_row(feedback_id, summary=summary, actions=json.dumps(actions))
+
+    def update_analyses(self, results):
+        # Bulk form for batch jobs: [(feedback_id, summary, actions), ...]
+        # written in one locked write. Returns the number of rows updated.
+        return self.update_rows([
+            (feedback_id, {'summary': summary, 'actions': json.dumps(actions)})
+            for feedback_id, summary, actions in results
+        ])
+
+    def get(self, feedback_id):
+        # One typed row as a dict, or None.
+        frame = self.load_cached()
+        rows = np.flatnonzero(frame['id'].to_numpy() == int(feedback_id))
+        return frame.iloc[rows[0]].to_dict() if len(rows) else None
+
+    def load_columns(self, columns, start=None, end=None):
+        # Typed subset of the feedback for analytics. Backends that can skip
+        # unread columns and out-of-range rows on disk override this.
+        needed = columns if 'timestamp' in columns else columns + ['timestamp']
+        return filter_time(self.load_cached()[needed], start, end)[columns].reset_index(drop=True)
+
+    def rollup(self, start=None, end=None):
+        # Review counts per day and rating for [start, end), maintained on
+        # every insert, so the overview reads a few counters instead of every
+        # review. The frame is rebuilt only when the store version changes.
+        version = self.version()
+        if self._rollup is None or self._rollup[0] != version:
+            self._rollup = (version, rollup_frame(self._rollup_days()))
+        frame = self._rollup[1]
+        if start is not None:
+            frame = frame[frame.index >= pd.Timestamp(start).floor('D')]
+        if end is not None:
+            frame = frame[frame.index < pd.Timestamp(end)]
+        return frame
+
+    def recompute_rollup(self):
+        return day_counts(self.load_columns(['timestamp', 'rating']))
+
+    def check_rollup(self):
+        # Consistency check: days whose stored counts differ from a full
+        # recompute (an empty list means the rollup is exact).
+        stored, actual = self._rollup_days(), self.recompute_rollup()
+        empty = [0] * len(RATINGS)
+        return sorted(day for day in set(stored) | set(actual) if stored.get(day, empty) != actual.get(day, empty))
+
+    def _rollup_days(self):
+        # File-backed stores keep {"rows", "days"} at rollup_path and bump it
+        # on append. If its row count disagrees with the store (a crash
+        # between the two writes, a rating update) it is rebuilt once.
+        with self.lock:
+            rows = self.count()
+            data = read_rollup(self.rollup_path)
+            if data is None or data['rows'] != rows:
+                data = {'rows': rows, 'days': self.recompute_rollup()}
+                write_rollup(self.rollup_path, data)
+            return data['days']
+
+    def _bump_rollup(self, entry, rows):
+        # Called under the write lock after inserting `entry`; `rows` is the
+        # new row count.
+        data = read_rollup(self.rollup_path)
+        if data is None or data['rows'] != rows - 1:
+            return
+        counts = data['days'].setdefault(str(entry['timestamp'])[:10], [0] * len(RATINGS))
+        if int(entry['rating']) in RATINGS:
+            counts[int(entry['rating']) - 1] += 1
+        data['rows'] = rows
+        write_rollup(self.rollup_path, data)
+
+    def _drop_rollup(self, updates):
+        # Updates that move a row to another day or rating invalidate the
+        # stored counts; the next read rebuilds them.
+        if any({'timestamp', 'rating'} & set(fields) for _, fields in updates):
+            if os.path.exists(self.rollup_path):
+                os.remove(self.rollup_path)
+
+    def _newest_first_order(self, frame):
+        # Row positions newest first, computed once per cached frame.
+        with self._cache_lock:
+            if self._newest_first is None or self._newest_first[0] is not frame:
+                order = np.lexsort((frame['id'].to_numpy(), frame['timestamp'].to_numpy()))[::-1]
+                self._newest_first = (frame, order)
+            return self._newest_first[1]
+
+    def load_page(self, offset, limit):
+        # Newest-first slice of the typed feedback for the admin list.
+        frame = self.load_cached()
+        order = self._newest_first_order(frame)
+        return frame.iloc[order[offset:offset + limit]].reset_index(drop=True)
+
+    def search(self, query='', ratings=None, start=None, end=None, analyzed=None, offset=0, limit=10):
+        # Newest-first page of the rows matching every given filter, and the
+        # number of matches. This version filters the cached frame with
+        # vectorized masks and looks keywords up in its TermIndex; SQLite
+        # answers from its indexes and FTS5.
+        frame = self.load_cached()
+        terms = search_terms(query)
+        found = []
+        if terms:
+            # The frame and its index must come from the same refresh.
+            with self._cache_lock:
+                frame = self._cached.frame
+                found = [self._cached.find(term) for term in terms]
+        mask = np.ones(len(frame), dtype=bool)
+        if ratings:
+            mask &= frame['rating'].isin(ratings).to_numpy()
+        if start is not None:
+            mask &= (frame['timestamp'] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (frame['timestamp'] < pd.Timestamp(end)).to_numpy()
+        if analyzed is not None:
+            mask &= (frame['summary'] != '').to_numpy() == analyzed
+        for positions in found:
+            matched = np.zeros(len(frame), dtype=bool)
+            matched[positions] = True
+            mask &= matched
+        order = self._newest_first_order(frame)
+        matches = order[mask[order]]
+        return frame.iloc[matches[offset:offset + limit]].reset_index(drop=True), len(matches)
+
+    def load_cached(self):
+        # Treat the returned frame as read-only: it is shared across sessions.
+        with self._cache_lock:
+            version = self.version()
+            if self._cached is not None and version == self._cached_version:
+                return self._cached.frame
+            rows = None
+            if self._cached is not None:
+                rows = self._apply_changes(self._cached, self._cached_version, version)
+            if rows is None:
+                rows = TypedRows(to_typed(self.load()))
+            self._cached = rows
+            self._cached_version = version
+            return rows.frame
+
+
+class CSVStore(FeedbackStore):
+    # Append-only CSV: every submission writes exactly one new line instead of
+    # re-reading and re-writing the whole file. Row updates go to an
+    # append-only journal next to it and are folded back in by compact().
+    name = "csv"
+    compact_ratio = 0.25
+
+    def __init__(self, path=DATA_FILE, rollup=True):
+        super().__init__()
+        self.path = path
+        self.journal_path = path + ".updates.jsonl"
+        self.rollup_path = path + ".rollup.json" if rollup else None
+        self.lock = WriteLock(path)
+        self._ids = None
+        self._last_id = 0
+        self._seen_size = None
+
+    def _size(self, path=None):
+        path = path or self.path
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def _read_csv(self):
+        if not os.path.exists(self.path):
+            return empty_frame()
+        try:
+            df = pd.read_csv(self.path)
+        except Exception:
+            return empty_frame()
+        for col in COLUMNS:
+            if col not in df.columns:
+                df[col] = ''
+        return df[COLUMNS].fillna({'ai_response': '', 'summary': '', 'actions': ''})
+
+    def load(self):
+        return apply_journal(self._read_csv(), read_journal(self.journal_path))
+
+    def version(self):
+        # (inode, size) of the CSV and of the journal. Compaction replaces
+        # both files, which changes the inodes and forces a full reload.
+        token = []
+        for path in (self.path, self.journal_path):
+            try:
+                st = os.stat(path)
+                token += [st.st_ino, st.st_size]
+            except FileNotFoundError:
+                token += [None, 0]
+        return tuple(token)
+
+    def _apply_changes(self, rows, old, new):
+        csv_ino, csv_size, journal_ino, journal_size = old
+        new_csv_ino, new_csv_size, new_journal_ino, new_journal_size = new
+        if csv_ino not in (None, new_csv_ino) or new_csv_size < csv_size:
+            return None
+        if journal_ino not in (None, new_journal_ino) or new_journal_size < journal_size:
+            return None
+        if journal_ino is None:
+            journal_size = 0
+
+        # Parse only the bytes appended since the cached version.
+        tail = read_range(self.path, csv_size, new_csv_size)
+        if tail and not tail.endswith(b"\n"):
+            return None  # caught a writer mid-row; take the slow path once
+        if tail:
+            if csv_size == 0:
+                tail_rows = pd.read_csv(io.BytesIO(tail)).reindex(columns=COLUMNS)
+            else:
+                tail_rows = pd.read_csv(io.BytesIO(tail), header=None, names=COLUMNS)
+            rows.merge(to_typed(tail_rows))
+
+        records = read_journal(self.journal_path, journal_size, new_journal_size, strict=True)
+        return None if records is None else merge_journal(rows, records)
+
+    def _known_ids(self):
+        # Cached id set; re-read only when another process changed the file.
+        if self._ids is None or self._size() != self._seen_size:
+            ids = self._read_csv()['id']
+            self._ids = set(int(i) for i in ids)
+            self._last_id = max(self._ids) if self._ids else 0
+            self._seen_size = self._size()
+        return self._ids
+
+    def append(self, entry):
+        with self.lock:
+            self._known_ids()
+            entry = dict(entry, id=new_id(self._last_id) if entry['id'] <= self._last_id else entry['id'])
+            self._last_id = entry['id']
+
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+                writer.writerow(COLUMNS)
+            writer.writerow([entry.get(col, '') for col in COLUMNS])
+            # One write() per row so a reader never sees half a record.
+            with open(self.path, 'a', newline='', encoding='utf-8') as f:
+                f.write(buf.getvalue())
+            self._ids.add(entry['id'])
+            self._seen_size = self._size()
+            if self.rollup_path:
+                self._bump_rollup(entry, len(self._ids))
+        return entry['id']
+
+    def update_rows(self, updates):
+        for _, fields in updates:
+            check_fields(fields)
+        with self.lock:
+            known = self._known_ids()
+            lines = [
+                json.dumps(dict(fields, id=int(feedback_id))) + "\n"
+                for feedback_id, fields in updates if int(feedback_id) in known
+            ]
+            if lines:
+                with open(self.journal_path, 'a', encoding='utf-8') as f:
+                    f.write("".join(lines))
+                if self.rollup_path:
+                    self._drop_rollup(updates)
+                if self._size(self.journal_path) > self.compact_ratio * self._size() + 64 * 1024:
+                    self.compact()
+        return len(lines)
+
+    def compact(self):
+        # Fold the update journal into the CSV. The journal only grows to a
+        # fraction of the CSV before this runs, so updates stay O(1) amortized.
+        with self.lock:
+            df = self.load()
+            tmp_path = self.path + ".tmp"
+            df.to_csv(tmp_path, index=False)
+            os.replace(tmp_path, self.path)
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._seen_size = self._size()
+
+    def count(self):
+        with self.lock:
+            return len(self._known_ids())
+
+
+class SQLiteStore(FeedbackStore):
+    # Embedded SQLite table in WAL mode: inserts touch one row and readers are
+    # never blocked by a writer.
+    name = "sqlite"
+
+    def __init__(self, path=DB_FILE):
+        super().__init__()
+        self.path = path
+        self.lock = WriteLock(path)
+        self._local = threading.local()
+        self._init_schema()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS feedback (
+                    id INTEGER PRIMARY KEY,
+                    timestamp TEXT NOT NULL,
+                    rating INTEGER NOT NULL,
+                    review TEXT NOT NULL,
+                    ai_response TEXT NOT NULL DEFAULT '',
+                    summary TEXT NOT NULL DEFAULT '',
+                    actions TEXT NOT NULL DEFAULT ''
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            # `seq` is the store version at which a row last changed, so a
+            # cache can fetch just the rows written since it was filled.
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(feedback)")]
+            if 'seq' not in columns:
+                conn.execute("ALTER TABLE feedback ADD COLUMN seq INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS feedback_seq ON feedback (seq)")
+            # Covers the analytics query, so it never touches review text.
+            conn.execute("CREATE INDEX IF NOT EXISTS feedback_timestamp_rating ON feedback (timestamp, rating)")
+            conn.execute("CREATE INDEX IF NOT EXISTS feedback_timestamp_id ON feedback (timestamp, id)")
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', '0')")
+            self._init_rollup(conn)
+            self._init_search(conn)
+
+    def _init_rollup(self, conn):
+        # Per-day, per-rating counts kept exact by triggers, in the same
+        # transaction as the write that changes them.
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rollup'").fetchone()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rollup (
+                day TEXT NOT NULL,
+                rating INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (day, rating)
+            ) WITHOUT ROWID
+        """)
+        bump = """
+            INSERT INTO rollup (day, rating, count) VALUES (substr(NEW.timestamp, 1, 10), NEW.rating, 1)
+            ON CONFLICT (day, rating) DO UPDATE SET count = count + 1;
+        """
+        drop = """
+            UPDATE rollup SET count = count - 1 WHERE day = substr(OLD.timestamp, 1, 10) AND rating = OLD.rating;
+        """
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS rollup_insert AFTER INSERT ON feedback BEGIN {bump} END")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS rollup_update AFTER UPDATE OF timestamp, rating ON feedback BEGIN {drop} {bump} END")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS rollup_delete AFTER DELETE ON feedback BEGIN {drop} END")
+        if not exists:
+            # Databases created before the rollup: count what is already there.
+            conn.execute("""
+                INSERT INTO rollup (day, rating, count)
+                SELECT substr(timestamp, 1, 10), rating, COUNT(*) FROM feedback GROUP BY 1, 2
+            """)
+
+    def _init_search(self, conn):
+        # FTS5 index over review and summary, kept in step with the feedback
+        # table by triggers (external content: the text is stored once).
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'feedback_fts'").fetchone()
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS feedback_fts USING fts5(
+                review, summary, content='feedback', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 0'
+            )
+        """)
+        add = "INSERT INTO feedback_fts (rowid, review, summary) VALUES (NEW.id, NEW.review, NEW.summary);"
+        remove = ("INSERT INTO feedback_fts (feedback_fts, rowid, review, summary) "
+                  "VALUES ('delete', OLD.id, OLD.review, OLD.summary);")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS fts_insert AFTER INSERT ON feedback BEGIN {add} END")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS fts_update AFTER UPDATE OF review, summary ON feedback BEGIN {remove} {add} END")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS fts_delete AFTER DELETE ON feedback BEGIN {remove} END")
+        # Pending rows are few; a partial index keeps "not analyzed" filters
+        # and counts off the main table.
+        conn.execute("CREATE INDEX IF NOT EXISTS feedback_pending ON feedback (timestamp, rating) WHERE summary = ''")
+        if not exists:
+            conn.execute("INSERT INTO feedback_fts (feedback_fts) VALUES ('rebuild')")
+        # meta 'time_order' is '1' while id order is also (timestamp, id)
+        # order, which holds for submissions (ids are millisecond submission
+        # times) but not always for imported data. A write that breaks it
+        # clears the flag; each check is two index seeks.
+        conn.execute("""
+            INSERT OR IGNORE INTO meta (key, value)
+            SELECT 'time_order', CASE WHEN EXISTS (
+                SELECT 1 FROM (SELECT timestamp, LAG(timestamp) OVER (ORDER BY id) AS previous FROM feedback)
+                WHERE timestamp < previous
+            ) THEN '0' ELSE '1' END
+        """)
+        broken = """
+            (SELECT value FROM meta WHERE key = 'time_order') = '1' AND (
+                EXISTS (SELECT 1 FROM feedback WHERE id > NEW.id AND +timestamp < NEW.timestamp)
+                OR EXISTS (SELECT 1 FROM feedback WHERE timestamp > NEW.timestamp AND +id < NEW.id)
+            )
+        """
+        clear = "UPDATE meta SET value = '0' WHERE key = 'time_order';"
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS time_order_insert AFTER INSERT ON feedback WHEN {broken} BEGIN {clear} END")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS time_order_update AFTER UPDATE OF timestamp ON feedback WHEN {broken} BEGIN {clear} END")
+
+    def _bump_version(self, conn):
+        conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'version'")
+        return int(conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0])
+
+    def version(self):
+        return int(self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0])
+
+    def _apply_changes(self, rows, old, new):
+        # "+id" keeps the planner on feedback_seq; a plain ORDER BY id walks
+        # the whole table in rowid order instead.
+        changed = pd.read_sql_query(
+            f"SELECT {', '.join(COLUMNS)} FROM feedback WHERE seq > ? ORDER BY +id",
+            self._conn(), params=(old,)
+        )
+        return rows.merge(to_typed(changed)) if len(changed) else rows
+
+    def import_csv(self, csv_path):
+        # One-time migration of the legacy CSV; recorded in `meta` so later
+        # starts skip it even if the CSV is still on disk.
+        conn = self._conn()
+        key = f"imported:{os.path.abspath(csv_path)}"
+        with self.lock:
+            if conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+                return 0
+            if not os.path.exists(csv_path):
+                return 0
+            return self._import_rows(conn, key, csv_path)
+
+    def _import_rows(self, conn, key, csv_path):
+        df = CSVStore(csv_path).load()
+        rows = [
+            (int(r.id), str(r.timestamp), int(r.rating), str(r.review),
+             str(r.ai_response), str(r.summary), str(r.actions))
+            for r in df.itertuples(index=False)
+        ]
+        with conn:
+            seq = self._bump_version(conn)
+            conn.executemany(
+                f"INSERT OR IGNORE INTO feedback ({', '.join(COLUMNS)}, seq) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [row + (seq,) for row in rows]
+            )
+            conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (key, str(len(rows))))
+        return len(rows)
+
+    def load(self):
+        return pd.read_sql_query(f"SELECT {', '.join(COLUMNS)} FROM feedback ORDER BY id", self._conn())
+
+    def append(self, entry):
+        conn = self._conn()
+        with self.lock, conn:
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM feedback").fetchone()[0]
+            entry = dict(entry, id=new_id(last_id) if entry['id'] <= last_id else entry['id'])
+            seq = self._bump_version(conn)
+            conn.execute(
+                f"INSERT INTO feedback ({', '.join(COLUMNS)}, seq) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                tuple(entry.get(col, '') for col in COLUMNS) + (seq,)
+            )
+        return entry['id']
+
+    def update_rows(self, updates):
+        for _, fields in updates:
+            check_fields(fields)
+        conn = self._conn()
+        with self.lock, conn:
+            seq = self._bump_version(conn)
+            # rowcount, not total_changes: the rollup and FTS triggers write
+            # rows of their own.
+            updated = 0
+            for feedback_id, fields in updates:
+                updated += conn.execute(
+                    f"UPDATE feedback SET {', '.join(f'{col} = ?' for col in fields)}, seq = ? WHERE id = ?",
+                    (*fields.values(), seq, int(feedback_id))
+                ).rowcount
+            if updated == 0:
+                conn.rollback()
+        return updated
+
+    def load_columns(self, columns, start=None, end=None):
+        check_fields([c for c in columns if c != 'id'])
+        where, params = [], []
+        if start is not None:
+            where.append("timestamp >= ?")
+            params.append(pd.Timestamp(start).isoformat())
+        if end is not None:
+            where.append("timestamp < ?")
+            params.append(pd.Timestamp(end).isoformat())
+        query = f"SELECT {', '.join(columns)} FROM feedback"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        df = pd.read_sql_query(query + " ORDER BY timestamp", self._conn(), params=params)
+        return pd.DataFrame({col: CONVERTERS[col](df[col]) for col in columns})
+
+    def load_page(self, offset, limit):
+        # Walks feedback_timestamp_id backwards, so only the requested page
+        # (plus the skipped offset) is read.
+        return to_typed(pd.read_sql_query(
+            f"SELECT {', '.join(COLUMNS)} FROM feedback ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+            self._conn(), params=(limit, offset)
+        ))
+
+    @staticmethod
+    def _filters(ratings=None, start=None, end=None, analyzed=None):
+        # search() filters as SQL conditions: [(condition, params), ...]
+        filters = []
+        if ratings:
+            filters.append((f"feedback.rating IN ({', '.join('?' * len(ratings))})", [int(r) for r in ratings]))
+        if start is not None:
+            filters.append(("feedback.timestamp >= ?", [pd.Timestamp(start).isoformat()]))
+        if end is not None:
+            filters.append(("feedback.timestamp < ?", [pd.Timestamp(end).isoformat()]))
+        if analyzed is not None:
+            filters.append(("feedback.summary != ''" if analyzed else "feedback.summary = ''", []))
+        return filters
+
+    def _count(self, filters):
+        clause, params = where_clause(filters)
+        return self._conn().execute(f"SELECT COUNT(*) FROM feedback{clause}", params).fetchone()[0]
+
+    def search(self, query='', ratings=None, start=None, end=None, analyzed=None, offset=0, limit=10):
+        conn = self._conn()
+        terms = search_terms(query)
+        if not terms:
+            clause, params = where_clause(self._filters(ratings, start, end, analyzed))
+            page = pd.read_sql_query(
+                f"SELECT {', '.join(COLUMNS)} FROM feedback{clause} ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+                conn, params=params + [limit, offset]
+            )
+            return to_typed(page), self._count_matching(ratings, start, end, analyzed)
+
+        # FTS5 drives text queries. While ids follow timestamps (see
+        # 'time_order'), FTS5 rowid order is newest first and a page stops
+        # after `limit` matches; otherwise every match is sorted by timestamp
+        # like any other listing. A date range also narrows the rowids to the
+        # ids found in that range, which FTS5 can seek to instead of walking
+        # every match of a common word.
+        filters = [("feedback_fts MATCH ?", [" ".join(f'"{term}"*' for term in terms)])]
+        if start is not None or end is not None:
+            clause, params = where_clause(self._filters(start=start, end=end))
+            low, high = conn.execute(f"SELECT MIN(id), MAX(id) FROM feedback{clause}", params).fetchone()
+            if low is None:
+                return to_typed(empty_frame()), 0
+            filters.append(("feedback_fts.rowid BETWEEN ? AND ?", [low, high]))
+        clause, params = where_clause(filters + self._filters(ratings, start, end, analyzed))
+        source = f"FROM feedback_fts JOIN feedback ON feedback.id = feedback_fts.rowid{clause}"
+        time_order = conn.execute("SELECT value FROM meta WHERE key = 'time_order'").fetchone()[0] == '1'
+        order = "feedback_fts.rowid DESC" if time_order else "feedback.timestamp DESC, feedback.id DESC"
+        page = pd.read_sql_query(
+            f"SELECT {', '.join('feedback.' + col for col in COLUMNS)} {source} ORDER BY {order} LIMIT ? OFFSET ?",
+            conn, params=params + [limit, offset]
+        )
+        # A common word can match most of the table: stop counting past
+        # count_limit.
+        total = conn.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 {source} LIMIT ?)", params + [self.count_limit + 1]
+        ).fetchone()[0]
+        return to_typed(page), total
+
+    def _count_matching(self, ratings, start, end, analyzed):
+        # Counts for whole-day ranges come from the rollup; pending rows from
+        # the partial feedback_pending index.
+        if analyzed is False:
+            return self._count(self._filters(ratings, start, end, False))
+        if all(t is None or pd.Timestamp(t) == pd.Timestamp(t).floor('D') for t in (start, end)):
+            total = int(self.rollup(start, end)[list(ratings or RATINGS)].to_numpy().sum())
+        else:
+            total = self._count(self._filters(ratings, start, end))
+        if analyzed:
+            total -= self._count(self._filters(ratings, start, end, False))
+        return total
+
+    def _rollup_days(self):
+        days = {}
+        for day, rating, count in self._conn().execute("SELECT day, rating, count FROM rollup WHERE count > 0"):
+            if rating in RATINGS:
+                days.setdefault(day, [0] * len(RATINGS))[rating - 1] = count
+        return days
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM feedback").fetchone()[0]
+
+    def get(self, feedback_id):
+        df = pd.read_sql_query(f"SELECT {', '.join(COLUMNS)} FROM feedback WHERE id = ?",
+                               self._conn(), params=(int(feedback_id),))
+        return to_typed(df).iloc[0].to_dict() if len(df) else None
+
+
+class ParquetStore(FeedbackStore):
+    # Columnar store for large histories: immutable Parquet parts sorted by
+    # timestamp, a small append-only CSV delta for fresh submissions and an
+    # update journal. Analytics read only the columns they ask for and let
+    # row-group statistics skip data outside the requested date range.
+    name = "parquet"
+    flush_rows = 10_000
+    row_group_rows = 50_000
+    compact_ratio = 0.25
+
+    def __init__(self, path=PARQUET_DIR):
+        super().__init__()
+        self.path = path
+        self.parts_path = os.path.join(path, "parts")
+        self.journal_path = os.path.join(path, "updates.jsonl")
+        self.rollup_path = os.path.join(path, "rollup.json")
+        os.makedirs(self.parts_path, exist_ok=True)
+        self.lock = WriteLock(path)
+        self.delta = CSVStore(os.path.join(path, "delta.csv"), rollup=False)
+        self._part_ids = None
+        self._part_ids_version = None
+
+    def _parts(self):
+        # Parts are written under a dot-name and renamed into place, so a
+        # reader never opens a half-written file.
+        return sorted(
+            os.path.join(self.parts_path, name) for name in os.listdir(self.parts_path)
+            if name.endswith(".parquet") and not name.startswith(".")
+        )
+
+    def _parts_version(self):
+        return os.stat(self.parts_path).st_mtime_ns
+
+    def _dataset(self, parts=None):
+        parts = self._parts() if parts is None else parts
+        return ds.dataset(parts, format="parquet", schema=PARQUET_SCHEMA) if parts else None
+
+    @staticmethod
+    def _to_pandas(table):
+        return table.to_pandas(coerce_temporal_nanoseconds=True)
+
+    def _write_part(self, df):
+        df = pd.DataFrame({
+            'id': df['id'].astype('int64'),
+            'timestamp': pd.to_datetime(df['timestamp'], format='ISO8601'),
+            'rating': df['rating'].astype('int8'),
+            **{col: df[col].fillna('').astype(str) for col in ['review', 'ai_response', 'summary', 'actions']},
+        }).sort_values('timestamp', kind='stable')
+        name = f"part-{time.time_ns():020d}-{os.getpid()}.parquet"
+        tmp_path = os.path.join(self.parts_path, "." + name)
+        table = pa.Table.from_pandas(df, schema=PARQUET_SCHEMA, preserve_index=False)
+        pq.write_table(table, tmp_path, row_group_size=self.row_group_rows)
+        os.replace(tmp_path, os.path.join(self.parts_path, name))
+        return name
+
+    def _read_delta(self):
+        df = self.delta.load()
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+        return df
+
+    def load(self):
+        frames = []
+        dataset = self._dataset()
+        if dataset is not None:
+            frames.append(self._to_pandas(dataset.to_table()))
+        delta = self._read_delta()
+        if len(delta):
+            frames.append(delta)
+        if not frames:
+            return empty_frame()
+        df = pd.concat(frames, ignore_index=True)
+        # A compaction in progress can briefly leave a row in two parts.
+        df = df.drop_duplicates('id', keep='last').sort_values('id').reset_index(drop=True)
+        return apply_journal(df[COLUMNS], read_journal(self.journal_path))
+
+    def version(self):
+        try:
+            st = os.stat(self.journal_path)
+            journal = (st.st_ino, st.st_size)
+        except FileNotFoundError:
+            journal = (None, 0)
+        return (self._parts_version(), self.delta.version()) + journal
+
+    def _apply_changes(self, rows, old, new):
+        # A flush or compaction rewrites parts: reload. Otherwise only the
+        # delta tail and the journal tail are new.
+        if old[0] != new[0]:
+            return None
+        journal_ino, journal_size = old[2:]
+        new_journal_ino, new_journal_size = new[2:]
+        if journal_ino not in (None, new_journal_ino) or new_journal_size < journal_size:
+            return None
+        if old[1] != new[1]:
+            rows = self.delta._apply_changes(rows, old[1], new[1])
+            if rows is None:
+                return None
+        if journal_ino is None:
+            journal_size = 0
+        records = read_journal(self.journal_path, journal_size, new_journal_size, strict=True)
+        return None if records is None else merge_journal(rows, records)
+
+    def _known_part_ids(self):
+        version = self._parts_version()
+        if self._part_ids is None or version != self._part_ids_version:
+            dataset = self._dataset()
+            ids = dataset.to_table(columns=['id']).column('id').to_pylist() if dataset is not None else []
+            self._part_ids = set(ids)
+            self._part_ids_version = version
+        return self._part_ids
+
+    def import_csv(self, csv_path):
+        marker = os.path.join(self.path, "imported")
+        with self.lock:
+            if os.path.exists(marker) or not os.path.exists(csv_path):
+                return 0
+            df = CSVStore(csv_path).load()
+            if len(df):
+                self._write_part(df)
+            with open(marker, 'w') as f:
+                f.write(os.path.abspath(csv_path))
+        return len(df)
+
+    def append(self, entry):
+        with self.lock:
+            part_ids = self._known_part_ids()
+            last_id = max(max(part_ids, default=0), max(self.delta._known_ids(), default=0))
+            entry = dict(entry, id=new_id(last_id) if entry['id'] <= last_id else entry['id'])
+            feedback_id = self.delta.append(entry)
+            self._bump_rollup(entry, self.count())
+            if self.delta.count() >= self.flush_rows:
+                self.flush()
+        return feedback_id
+
+    def update_rows(self, updates):
+        for _, fields in updates:
+            check_fields(fields)
+        with self.lock:
+            part_ids, delta_ids = self._known_part_ids(), self.delta._known_ids()
+            lines = [
+                json.dumps(dict(fields, id=int(feedback_id))) + "\n"
+                for feedback_id, fields in updates
+                if int(feedback_id) in part_ids or int(feedback_id) in delta_ids
+            ]
+            if lines:
+                with open(self.journal_path, 'a', encoding='utf-8') as f:
+                    f.write("".join(lines))
+                self._drop_rollup(updates)
+                data_size = sum(os.path.getsize(p) for p in self._parts()) + self.delta._size()
+                if os.path.getsize(self.journal_path) > self.compact_ratio * data_size + 64 * 1024:
+                    self.compact()
+        return len(lines)
+
+    def _clear_delta(self):
+        for path in (self.delta.path, self.delta.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def flush(self):
+        # Move the CSV delta into a new Parquet part.
+        with self.lock:
+            df = self.delta.load()
+            if len(df):
+                self._write_part(df)
+            self._clear_delta()
+
+    def compact(self):
+        # Rewrite everything (parts, delta and journal) as one sorted file
+        # with fixed-size row groups.
+        with self.lock:
+            df = self.load()
+            old_parts = self._parts()
+            if len(df):
+                self._write_part(df)
+            for path in old_parts:
+                os.remove(path)
+            self._clear_delta()
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+
+    def load_columns(self, columns, start=None, end=None):
+        check_fields([c for c in columns if c != 'id'])
+        journal = read_journal(self.journal_path)
+        if any(set(record) & set(columns) - {'id'} for record in journal):
+            return super().load_columns(columns, start, end)
+
+        frames = []
+        dataset = self._dataset()
+        if dataset is not None:
+            expr = None
+            if start is not None:
+                expr = ds.field('timestamp') >= pa.scalar(pd.Timestamp(start), type=pa.timestamp('us'))
+            if end is not None:
+                upper = ds.field('timestamp') < pa.scalar(pd.Timestamp(end), type=pa.timestamp('us'))
+                expr = upper if expr is None else expr & upper
+            frames.append(self._to_pandas(dataset.to_table(columns=columns, filter=expr)))
+        delta = filter_time(self._read_delta(), start, end)
+        if len(delta):
+            frames.append(delta[columns])
+        if not frames:
+            return to_typed(empty_frame())[columns]
+        df = pd.concat(frames, ignore_index=True)
+        return pd.DataFrame({col: CONVERTERS[col](df[col]) for col in columns})
+
+    def count(self):
+        with self.lock:
+            return len(self._known_part_ids()) + self.delta.count()
+
+
+BACKENDS = {
+    'csv': CSVStore,
+    'sqlite': SQLiteStore,
+}
+if pa is not None:
+    PARQUET_SCHEMA = pa.schema([
+        ('id', pa.int64()),
+        ('timestamp', pa.timestamp('us')),
+        ('rating', pa.int8()),
+        ('review', pa.string()),
+        ('ai_response', pa.string()),
+        ('summary', pa.string()),
+        ('actions', pa.string()),
+    ])
+    BACKENDS['parquet'] = ParquetStore
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(backend=None, path=None):
+    # Backend is chosen with FEEDBACK_BACKEND (sqlite by default) and its file
+    # with FEEDBACK_PATH; one store instance is shared by every dashboard and
+    # session in the process.
+    backend = backend or os.environ.get("FEEDBACK_BACKEND", "sqlite")
+    path = path or os.environ.get("FEEDBACK_PATH")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown feedback backend: {backend}")
+    with _stores_lock:
+        key = (backend, path)
+        if key not in _stores:
+            store = BACKENDS[backend](path) if path else BACKENDS[backend]()
+            if hasattr(store, 'import_csv'):
+                store.import_csv(DATA_FILE)
+            _stores[key] = store
+        return _stores[key]
@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from storage import RATINGS
+
+GRANULARITIES = ['hour', 'day', 'week', 'month']
+
+# 1970-01-01 was a Thursday; weeks start on the Monday four days later.
+_WEEK_OFFSET = np.timedelta64(4, 'D')
+
+
+def bucket_starts(times, granularity):
+    # Start of the bucket each datetime64 value falls in, by truncating the
+    # numpy unit: no Python objects per row.
+    times = np.asarray(times, dtype='datetime64[ns]')
+    if granularity == 'hour':
+        return times.astype('datetime64[h]')
+    if granularity == 'day':
+        return times.astype('datetime64[D]')
+    if granularity == 'week':
+        days = times.astype('datetime64[D]') - _WEEK_OFFSET
+        return (days - days.astype('int64') % 7) + _WEEK_OFFSET
+    if granularity == 'month':
+        return times.astype('datetime64[M]')
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def bucket_counts(times, ratings, granularity, weights=None):
+    # Buckets x ratings count frame with every bucket between the first and
+    # last present (empty ones as zeros), indexed by bucket start.
+    times = np.asarray(times, dtype='datetime64[ns]')
+    ratings = np.asarray(ratings, dtype='int64')
+    keep = ~np.isnat(times) & (ratings >= RATINGS[0]) & (ratings <= RATINGS[-1])
+    if not keep.any():
+        return pd.DataFrame(columns=RATINGS, dtype='int64', index=pd.DatetimeIndex([], name='period'))
+    starts = bucket_starts(times[keep], granularity)
+    step = 7 if granularity == 'week' else 1
+    codes = starts.astype('int64')
+    first = codes.min()
+    slots = (codes - first) // step
+    n = len(RATINGS)
+    flat = np.bincount(
+        slots * n + (ratings[keep] - RATINGS[0]),
+        weights=None if weights is None else np.asarray(weights)[keep],
+        minlength=(slots.max() + 1) * n
+    ).astype('int64').reshape(-1, n)
+    index = (first + np.arange(len(flat)) * step).astype(starts.dtype).astype('datetime64[ns]')
+    return pd.DataFrame(flat, index=pd.DatetimeIndex(index, name='period'), columns=RATINGS)
+
+
+def compute_timeline(store, granularity='day', start=None, end=None):
+    if granularity == 'hour':
+        # Only hourly buckets need individual rows.
+        df = store.load_columns(['timestamp', 'rating'], start, end)
+        return bucket_counts(df['timestamp'].to_numpy(), df['rating'].to_numpy(), granularity)
+    rollup = store.rollup(start, end)
+    times = np.repeat(rollup.index.to_numpy(), len(RATINGS))
+    ratings = np.tile(RATINGS, len(rollup))
+    return bucket_counts(times, ratings, granularity, weights=rollup.to_numpy().ravel())
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+CACHE_SIZE = 32
+
+
+def timeline(store, granularity='day', start=None, end=None):
+    # Submissions per bucket and rating, cached until the store version
+    # changes. Treat the returned frame as read-only.
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    key = (id(store), granularity, start, end)
+    version = store.version()
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None and hit[0] == version:
+            _cache.move_to_end(key)
+            return hit[1]
+    frame = compute_timeline(store, granularity, start, end)
+    with _cache_lock:
+        _cache[key] = (version, frame)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return frame
@@ -0,0 +1,315 @@
+import os
+import re
+import threading
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from storage import get_store
+
+# Recurring topics across the reviews: TF-IDF vectors built with numpy, grouped
+# by spherical mini-batch k-means. New reviews are assigned to the nearest
+# topic and nudge its centroid; the whole set is re-clustered once it has
+# grown by REFIT_SHARE since the last fit.
+TOPICS = int(os.environ.get("TOPICS_K", 8))
+REFIT_SHARE = float(os.environ.get("TOPICS_REFIT_SHARE", 0.2))
+# Vocabulary: the most common terms found in at least MIN_DF reviews and in
+# at most MAX_DF of them.
+MAX_TERMS = 5000
+MIN_DF = 3
+MAX_DF = 0.5
+BATCH = 2048
+EPOCHS = 3
+# Rows per chunk when scoring reviews against the centroids.
+CHUNK = 20_000
+# Trends compare the last TREND_DAYS with the TREND_DAYS before them.
+TREND_DAYS = 30
+EXAMPLES = 3
+
+STOPWORDS = frozenset("""
+a about after again all also am an and any are as at be because been before being but by can could did do
+does doing don't down during each even ever every for from get got had has have having he her here hers him
+his how i i'm i've if in into is it it's its just let me more most much my no nor not now of off on once only
+or other our out over own really same she should so some still such than that the their them then there these
+they this those through to too under until up us very was we we're were what when where which while who why will
+with would you your yours ve ll re
+""".split())
+
+
+def tokenize(text):
+    # Words of three or more letters that are not stopwords, plus each pair
+    # of neighbouring ones ("not shown" -> "shown image").
+    words = [word for word in re.findall(r"[a-z][a-z']+", str(text).lower())
+             if len(word) > 2 and word not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def encode(texts, term_ids, grow=False):
+    # (review index, term id) for every token; unknown tokens are dropped,
+    # or given new ids when `grow`.
+    docs = [tokenize(text) for text in texts]
+    lengths = np.fromiter(map(len, docs), dtype=np.int64, count=len(docs))
+    tokens = chain.from_iterable(docs)
+    if grow:
+        cols = [term_ids.setdefault(token, len(term_ids)) for token in tokens]
+    else:
+        cols = [term_ids.get(token, -1) for token in tokens]
+    rows = np.repeat(np.arange(len(docs)), lengths)
+    cols = np.array(cols, dtype=np.int64)
+    return rows[cols >= 0], cols[cols >= 0]
+
+
+def unique_counts(keys):
+    # np.unique(keys, return_counts=True) by sorting, which is quicker than
+    # numpy's hash-based unique for these wide keys.
+    keys = np.sort(keys)
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]])) if len(keys) else np.array([], dtype=np.int64)
+    return keys[starts], np.diff(np.append(starts, len(keys)))
+
+
+class Matrix:
+    # Sparse rows in CSR form: row i holds indices/values[indptr[i]:indptr[i + 1]].
+    def __init__(self, indptr, indices, values):
+        self.indptr = indptr
+        self.indices = indices
+        self.values = values
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def rows(self, begin, end):
+        lo, hi = self.indptr[begin], self.indptr[end]
+        return Matrix(self.indptr[begin:end + 1] - lo, self.indices[lo:hi], self.values[lo:hi])
+
+    def take(self, order):
+        lengths = np.diff(self.indptr)[order]
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        positions = np.repeat(self.indptr[order] - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return Matrix(indptr, self.indices[positions], self.values[positions])
+
+
+def tfidf(rows, cols, n_rows, idf):
+    # Sublinear term frequency times idf, each row scaled to unit length.
+    terms = len(idf)
+    pairs, tf = unique_counts(rows * terms + cols)
+    rows, cols = pairs // terms, pairs % terms
+    values = ((1 + np.log(tf)) * idf[cols]).astype(np.float32)
+    norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=n_rows)).astype(np.float32)
+    values /= norms[rows]
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n_rows))])
+    return Matrix(indptr, cols, values)
+
+
+def similarities(matrix, centroids):
+    # Cosine similarity of every row to every centroid, (rows, topics).
+    out = np.zeros((len(matrix), len(centroids)), dtype=np.float32)
+    for begin in range(0, len(matrix), CHUNK):
+        chunk = matrix.rows(begin, min(begin + CHUNK, len(matrix)))
+        filled = np.flatnonzero(np.diff(chunk.indptr))
+        if not len(filled):
+            continue
+        products = centroids[:, chunk.indices].T * chunk.values[:, None]
+        out[begin + filled] = np.add.reduceat(products, chunk.indptr[filled], axis=0)
+    return out
+
+
+def normalize_rows(centroids):
+    norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+    return centroids / np.where(norms > 0, norms, 1)
+
+
+class TopicModel:
+    def __init__(self, topics=TOPICS, seed=0):
+        self.topics = topics
+        self.rng = np.random.default_rng(seed)
+        self.term_ids = {}
+        self.terms = []
+        self.idf = None
+        self.centroids = None
+        self.counts = None
+
+    def vectorize(self, texts):
+        rows, cols = encode(texts, self.term_ids)
+        return tfidf(rows, cols, len(texts), self.idf)
+
+    def _update(self, batch, labels):
+        # One mini-batch step: each centroid moves towards the mean of its
+        # new members by their share of everything it has absorbed so far.
+        # Rows with no vocabulary terms (topic -1) are left out.
+        if (labels < 0).any():
+            batch, labels = batch.take(np.flatnonzero(labels >= 0)), labels[labels >= 0]
+        terms = len(self.terms)
+        entry_labels = np.repeat(labels, np.diff(batch.indptr))
+        sums = np.bincount(entry_labels * terms + batch.indices, weights=batch.values,
+                           minlength=self.topics * terms).reshape(self.topics, terms)
+        new = np.bincount(labels, minlength=self.topics)
+        self.counts += new
+        rate = np.divide(new, self.counts, out=np.zeros(self.topics), where=self.counts > 0)
+        means = sums / np.maximum(new, 1)[:, None]
+        self.centroids = normalize_rows(self.centroids * (1 - rate)[:, None] + means * rate[:, None]).astype(np.float32)
+
+    def _seed(self, matrix):
+        # k-means++ on a sample: each next centroid is a row picked with
+        # probability growing with its distance to the ones chosen so far.
+        sample = matrix.take(self.rng.choice(len(matrix), min(len(matrix), 10 * BATCH), replace=False))
+        dense = lambda i: np.bincount(sample.indices[sample.indptr[i]:sample.indptr[i + 1]],
+                                      weights=sample.values[sample.indptr[i]:sample.indptr[i + 1]],
+                                      minlength=len(self.terms))
+        chosen = [dense(self.rng.integers(len(sample)))]
+        for _ in range(1, self.topics):
+            nearest = similarities(sample, np.array(chosen, dtype=np.float32)).max(axis=1)
+            weights = np.clip(1 - nearest, 0, None) ** 2
+            pick = self.rng.choice(len(sample), p=weights / weights.sum()) if weights.sum() > 0 else self.rng.integers(len(sample))
+            chosen.append(dense(pick))
+        self.centroids = normalize_rows(np.array(chosen, dtype=np.float32))
+        self.counts = np.zeros(self.topics, dtype=np.int64)
+
+    def fit(self, texts):
+        # Builds the vocabulary and clusters `texts`; returns each one's
+        # topic and its similarity to that topic.
+        term_ids = {}
+        rows, cols = encode(texts, term_ids, grow=True)
+        df = np.bincount(unique_counts(rows * len(term_ids) + cols)[0] % max(len(term_ids), 1), minlength=len(term_ids))
+        # A handful of reviews keeps every term.
+        small = len(texts) < 100
+        allowed = np.flatnonzero((df >= (1 if small else MIN_DF)) & (df <= (len(texts) if small else MAX_DF * len(texts))))
+        keep = allowed[np.argsort(-df[allowed], kind='stable')[:MAX_TERMS]]
+        names = np.array(list(term_ids))
+        self.terms = list(names[keep])
+        self.term_ids = {term: i for i, term in enumerate(self.terms)}
+        self.idf = (np.log((1 + len(texts)) / (1 + df[keep])) + 1).astype(np.float32)
+        remap = np.full(len(term_ids), -1)
+        remap[keep] = np.arange(len(keep))
+        known = remap[cols] >= 0
+        matrix = tfidf(rows[known], remap[cols[known]], len(texts), self.idf)
+        self.topics = max(1, min(self.topics, len(texts)))
+        if not len(self.terms):
+            self.centroids = np.zeros((self.topics, 0), dtype=np.float32)
+            self.counts = np.zeros(self.topics, dtype=np.int64)
+            return np.full(len(texts), -1), np.zeros(len(texts), dtype=np.float32)
+        self._seed(matrix)
+        shuffled = matrix.take(self.rng.permutation(len(matrix)))
+        for _ in range(EPOCHS):
+            for begin in range(0, len(shuffled), BATCH):
+                batch = shuffled.rows(begin, min(begin + BATCH, len(shuffled)))
+                self._update(batch, similarities(batch, self.centroids).argmax(axis=1))
+        return self.assign(matrix)
+
+    def assign(self, matrix):
+        # Nearest topic of each row and the similarity to it; -1 for rows
+        # that share no terms with any topic.
+        scores = similarities(matrix, self.centroids)
+        labels = scores.argmax(axis=1)
+        best = scores[np.arange(len(labels)), labels]
+        return np.where(best > 0, labels, -1), best
+
+    def partial_fit(self, texts):
+        # Assigns new reviews with the current vocabulary and moves the
+        # centroids towards them.
+        matrix = self.vectorize(texts)
+        labels, scores = self.assign(matrix)
+        if len(self.terms):
+            self._update(matrix, labels)
+        return labels, scores
+
+    def label(self, topic, terms=3):
+        # The topic's heaviest terms, skipping words already in a chosen pair.
+        if topic < 0:
+            return "(other)"
+        chosen = []
+        for i in np.argsort(-self.centroids[topic]):
+            term = self.terms[i]
+            if self.centroids[topic, i] <= 0 or len(chosen) == terms:
+                break
+            if not any(term in other.split() or other in term.split() for other in chosen):
+                chosen.append(term)
+        return " · ".join(chosen) or "(no common terms)"
+
+
+class TopicState:
+    # The model and the reviews it has seen for one store and rating filter.
+    def __init__(self):
+        self.model = None
+        self.frame = None
+        self.fitted_rows = 0
+        self.rows = -1
+        self.summary = None
+        self.lock = threading.Lock()
+
+
+_states = {}
+_states_lock = threading.Lock()
+
+
+def refresh(state, store, ratings):
+    # Reads only the reviews stored since the last call; re-clusters
+    # everything when they add up to REFIT_SHARE of what was fitted.
+    columns = ['id', 'timestamp', 'rating', 'review']
+    if state.frame is None or not len(state.frame):
+        new = store.load_columns(columns)
+    else:
+        new = store.load_columns(columns, start=state.frame['timestamp'].max())
+        new = new[new['id'] > state.frame['id'].max()]
+    if ratings:
+        new = new[new['rating'].isin(ratings)]
+    new = new.reset_index(drop=True)
+    refit = state.model is None or len(state.frame) + len(new) > state.fitted_rows * (1 + REFIT_SHARE)
+    if refit:
+        frame = new if state.frame is None else pd.concat([state.frame[columns], new], ignore_index=True)
+        state.model = TopicModel()
+        labels, scores = state.model.fit(frame['review'].astype(str).tolist())
+        state.frame = frame.assign(topic=labels, score=scores)
+        state.fitted_rows = len(frame)
+    elif len(new):
+        labels, scores = state.model.partial_fit(new['review'].astype(str).tolist())
+        state.frame = pd.concat([state.frame, new.assign(topic=labels, score=scores)], ignore_index=True)
+
+
+def summarize(state):
+    # One row per topic, largest first.
+    frame, model = state.frame, state.model
+    if frame is None or not len(frame):
+        return pd.DataFrame(columns=['topic', 'label', 'size', 'share', 'avg_rating', 'recent', 'previous', 'examples'])
+    newest = frame['timestamp'].max()
+    recent = frame['timestamp'] > newest - pd.Timedelta(days=TREND_DAYS)
+    previous = ~recent & (frame['timestamp'] > newest - pd.Timedelta(days=2 * TREND_DAYS))
+    grouped = frame.assign(recent=recent, previous=previous).groupby('topic')
+    table = grouped.agg(size=('id', 'size'), avg_rating=('rating', 'mean'),
+                        recent=('recent', 'sum'), previous=('previous', 'sum'))
+    # The reviews closest to each centroid, one per distinct text.
+    closest = (frame.sort_values('score', ascending=False).groupby('topic').head(10 * EXAMPLES)
+               .assign(review=lambda df: df['review'].astype(str)).drop_duplicates(['topic', 'review']))
+    examples = closest.groupby('topic')['review'].agg(lambda reviews: reviews.head(EXAMPLES).tolist())
+    table = table.assign(
+        topic=table.index,
+        label=[model.label(topic) for topic in table.index],
+        share=table['size'] / len(frame),
+        examples=examples.reindex(table.index),
+    )
+    return table[['topic', 'label', 'size', 'share', 'avg_rating', 'recent', 'previous', 'examples']] \
+        .sort_values('size', ascending=False, ignore_index=True)
+
+
+def weekly_counts(state, topics):
+    # Reviews per week for each of `topics`, one column per topic.
+    frame = state.frame[state.frame['topic'].isin(topics)]
+    weeks = frame['timestamp'].dt.to_period('W').dt.start_time
+    return pd.crosstab(weeks, frame['topic']).reindex(columns=topics, fill_value=0)
+
+
+def top_issues(store=None, ratings=(1, 2, 3)):
+    # (summary frame, state) for the reviews with the given ratings (all
+    # when None). Only new reviews are read and clustered between calls;
+    # an unchanged review count returns the last result.
+    store = store or get_store()
+    key = (id(store), tuple(ratings) if ratings else None)
+    with _states_lock:
+        state = _states.setdefault(key, TopicState())
+    with state.lock:
+        rows = store.count()
+        if rows != state.rows:
+            refresh(state, store, ratings)
+            state.rows = rows
+            state.summary = summarize(state)
+        return state.summary, state
@@ -1,23 +1,29 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
+from concurrent.futures import TimeoutError
 import os
-import requests
+import queue
+from storage import get_store
+from inference import get_client, submit_background
+from dedupe import get_index, prior_row
+from metrics import count, timed
 
-DATA_FILE = "feedback_data.csv"
-HF_API_URL = "https://api-inference.huggingface.co/models/Qwen/Qwen2-7B-Instruct"
-HF_TOKEN = st.secrets.get("HF_TOKEN", "") 
+try:
+    HF_TOKEN = st.secrets.get("HF_TOKEN", "")
+except FileNotFoundError:
+    # No secrets.toml, e.g. imported by the load test: use the environment.
+    HF_TOKEN = os.environ.get("HF_TOKEN", "")
+# How long a submit waits for the model (for its first token when
+# streaming) before showing the templated reply.
+RESPONSE_BUDGET = float(os.environ.get("RESPONSE_BUDGET_SECONDS", 2))
+# Stream the reply onto the page token by token instead (STREAM_RESPONSES=0 to turn off).
+STREAM_RESPONSES = os.environ.get("STREAM_RESPONSES", "1") != "0"
 
 def load_data():
-    if os.path.exists(DATA_FILE):
-        try:
-            return pd.read_csv(DATA_FILE)
-        except:
-            return pd.DataFrame(columns=['id', 'timestamp', 'rating', 'review', 'ai_response'])
-    return pd.DataFrame(columns=['id', 'timestamp', 'rating', 'review', 'ai_response'])
+    with timed("user.load"):
+        return get_store().load_cached()
 
 def save_feedback(rating, review, ai_response):
-    df = load_data()
     new_entry = {
         'id': int(datetime.now().timestamp() * 1000),
         'timestamp': datetime.now().isoformat(),
@@ -27,53 +33,117 @@ def save_feedback(rating, review, ai_response):
         'summary': '',
         'actions': ''
     }
-    df = pd.concat([df, pd.DataFrame([new_entry])], ignore_index=True)
-    df.to_csv(DATA_FILE, index=False)
-    return True
+    with timed("user.save"):
+        feedback_id = get_store().append(new_entry)
+    with timed("user.dedupe"):
+        get_index().add(feedback_id, rating, review)
+    return feedback_id
+
+def fallback_response(rating):
+    if rating >= 4:
+        return "Thank you so much for your wonderful feedback! We're thrilled to hear you had a great experience with us. We look forward to serving you again!"
+    elif rating == 3:
+        return "Thank you for your feedback. We appreciate you taking the time to share your experience. We're always working to improve!"
+    else:
+        return "We sincerely apologize for not meeting your expectations. Your feedback is invaluable to us, and we're committed to making things right."
+
+def response_prompt(rating, review):
+    if rating >= 4:
+        context = "You are responding to positive feedback. Be warm and grateful (2-3 sentences)."
+    elif rating == 3:
+        context = "You are responding to neutral feedback. Be understanding (2-3 sentences)."
+    else:
+        context = "You are responding to negative feedback. Be apologetic and solution-focused (2-3 sentences)."
+    
+    prompt = f"{context}\n\nCustomer gave {rating}/5 stars: \"{review}\"\n\nYour response:"
+    
+    parameters = {
+        "max_new_tokens": 100,
+        "temperature": 0.7,
+        "top_p": 0.9,
+        "return_full_text": False
+    }
+    
+    return prompt, parameters
+
+def is_valid_response(text):
+    return len(text) > 20
 
 def generate_ai_response(rating, review):
     try:
-        if rating >= 4:
-            context = "You are responding to positive feedback. Be warm and grateful (2-3 sentences)."
-        elif rating == 3:
-            context = "You are responding to neutral feedback. Be understanding (2-3 sentences)."
-        else:
-            context = "You are responding to negative feedback. Be apologetic and solution-focused (2-3 sentences)."
-        
-        prompt = f"{context}\n\nCustomer gave {rating}/5 stars: \"{review}\"\n\nYour response:"
-        
-        headers = {"Authorization": f"Bearer {HF_TOKEN}"}
-        payload = {
-            "inputs": prompt,
-            "parameters": {
-                "max_new_tokens": 100,
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "return_full_text": False
-            }
-        }
-        
-        response = requests.post(HF_API_URL, headers=headers, json=payload, timeout=30)
-        
-        if response.status_code == 200:
-            result = response.json()
-            if isinstance(result, list) and len(result) > 0:
-                ai_text = result[0].get("generated_text", "").strip()
-                if len(ai_text) > 20:
-                    return ai_text
-        
-        raise Exception("API response invalid")
+        # Too-short replies raise and are never cached.
+        with timed("user.generate"):
+            return get_client(HF_TOKEN).generate(*response_prompt(rating, review), validate=is_valid_response)
     
     except Exception as e:
         print(f"AI Error: {e}")
-        if rating >= 4:
-            return "Thank you so much for your wonderful feedback! We're thrilled to hear you had a great experience with us. We look forward to serving you again!"
-        elif rating == 3:
-            return "Thank you for your feedback. We appreciate you taking the time to share your experience. We're always working to improve!"
-        else:
-            return "We sincerely apologize for not meeting your expectations. Your feedback is invaluable to us, and we're committed to making things right."
+        count("llm_fallbacks", kind="reply")
+        return fallback_response(rating)
+
+def stream_ai_response(rating, review, reply):
+    # Yields the reply as the model writes it. reply['text'] ends up as the
+    # generated text, or the templated one if the stream fails or the
+    # finished reply is too short.
+    reply['text'] = fallback_response(rating)
+    try:
+        parts = []
+        for token in get_client(HF_TOKEN).stream(*response_prompt(rating, review), validate=is_valid_response):
+            parts.append(token)
+            yield token
+        reply['text'] = "".join(parts)
+    except Exception as e:
+        print(f"AI Error: {e}")
+        count("llm_fallbacks", kind="reply")
+
+def reused_response(feedback_id, rating):
+    # A near-duplicate of an earlier review (same rating, text the same give
+    # or take a few words) gets the reply that one got, without a model call.
+    # Returns None when there is no earlier reply worth repeating.
+    prior = prior_row(get_store(), feedback_id)
+    if prior is None or prior['ai_response'] == fallback_response(rating):
+        return None
+    count("llm_calls_saved", kind="reply")
+    with timed("user.save_response"):
+        get_store().update_row(feedback_id, ai_response=prior['ai_response'])
+    return prior['ai_response']
+
+def attach_ai_response(feedback_id, rating, review, tokens=None):
+    # Runs on an inference worker: the review is already stored with the
+    # templated reply, so only a real model answer needs writing back.
+    # Given a `tokens` queue, the reply is streamed onto it piece by piece,
+    # then None, whether or not the page is still reading.
+    if tokens is None:
+        reused = reused_response(feedback_id, rating)
+        if reused is not None:
+            return reused
+        ai_response = generate_ai_response(rating, review)
+    else:
+        try:
+            ai_response = reused_response(feedback_id, rating)
+            if ai_response is not None:
+                tokens.put(ai_response)
+                return ai_response
+            reply = {}
+            for token in stream_ai_response(rating, review, reply):
+                tokens.put(token)
+            ai_response = reply['text']
+        finally:
+            tokens.put(None)
+    if ai_response != fallback_response(rating):
+        with timed("user.save_response"):
+            get_store().update_row(feedback_id, ai_response=ai_response)
+    return ai_response
+
+def submit_feedback(rating, review, budget=RESPONSE_BUDGET):
+    feedback_id = save_feedback(rating, review, fallback_response(rating))
+    future = submit_background(attach_ai_response, feedback_id, rating, review)
+    try:
+        return future.result(timeout=budget), None
+    except TimeoutError:
+        return fallback_response(rating), future
 
-st.markdown("""
+# Emitted by main() on every run; the module body only runs on first import.
+STYLES = """
 <style>
     .main {
         background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
@@ -133,9 +203,62 @@ st.markdown("""
         opacity: 0.9;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+def stream_response(feedback_id, rating, review):
+    # The reply streams in on an inference worker, which also writes it
+    # back. If its first token comes within RESPONSE_BUDGET it is written
+    # out as it arrives, then settles on the same markup a finished reply
+    # gets (the templated reply if the stream failed). Otherwise returns
+    # False and the worker is left pending like a non-streamed submit.
+    tokens = queue.Queue()
+    future = submit_background(attach_ai_response, feedback_id, rating, review, tokens)
+    try:
+        first = tokens.get(timeout=RESPONSE_BUDGET)
+    except queue.Empty:
+        st.session_state.pending_response = future
+        return False
+    
+    def pieces():
+        token = first
+        while token is not None:
+            yield token
+            token = tokens.get()
+    
+    placeholder = st.empty()
+    with timed("user.stream"), placeholder:
+        st.write_stream(pieces())
+    st.session_state.ai_response = future.result()
+    placeholder.markdown(f"*{st.session_state.ai_response}*")
+    return True
+
+def show_response():
+    request = st.session_state.get('stream_request')
+    if request is not None:
+        st.session_state.stream_request = None
+        if stream_response(*request):
+            return
+    
+    # While the model is still answering, poll once a second and swap the
+    # templated reply for the generated one when it lands.
+    pending = st.session_state.get('pending_response')
+    
+    @st.fragment(run_every=1 if pending is not None else None)
+    def response_box():
+        future = st.session_state.get('pending_response')
+        if future is not None and future.done():
+            st.session_state.ai_response = future.result()
+            st.session_state.pending_response = None
+            st.rerun()
+        st.markdown(f"*{st.session_state.ai_response}*")
+        if st.session_state.get('pending_response') is not None:
+            st.caption("✨ Personalizing our response...")
+    
+    response_box()
 
 def main():
+    st.markdown(STYLES, unsafe_allow_html=True)
+    
     st.markdown("<h1>⭐ Share Your Experience with us</h1>", unsafe_allow_html=True)
     st.markdown("<p class='subtitle'>We value your feedback and strive to improve</p>", unsafe_allow_html=True)
     
@@ -143,6 +266,8 @@ def main():
         st.session_state.submitted = False
     if 'ai_response' not in st.session_state:
         st.session_state.ai_response = ""
+    if 'pending_response' not in st.session_state:
+        st.session_state.pending_response = None
     
     with st.container():
         st.markdown("<div class='feedback-card'>", unsafe_allow_html=True)
@@ -181,23 +306,32 @@ def main():
     if submit_button:
         if len(review.strip()) < 10:
             st.error("⚠️ Please write at least 10 characters in your review")
+        elif STREAM_RESPONSES:
+            # Stored with the templated reply, which stays if the stream fails.
+            feedback_id = save_feedback(rating, review, fallback_response(rating))
+            st.session_state.submitted = True
+            st.session_state.ai_response = fallback_response(rating)
+            st.session_state.pending_response = None
+            st.session_state.stream_request = (feedback_id, rating, review)
         else:
             with st.spinner("✨ Generating AI response..."):
-                ai_response = generate_ai_response(rating, review)
-                save_feedback(rating, review, ai_response)
+                ai_response, pending = submit_feedback(rating, review)
                 st.session_state.submitted = True
                 st.session_state.ai_response = ai_response
+                st.session_state.pending_response = pending
     
     if st.session_state.submitted:
         st.markdown("<div class='success-box'>", unsafe_allow_html=True)
         st.markdown("### ✅ Thank you for your feedback!")
         st.markdown(f"**Our Response:**")
-        st.markdown(f"*{st.session_state.ai_response}*")
+        show_response()
         st.markdown("</div>", unsafe_allow_html=True)
         
         if st.button("📝 Submit Another Review"):
             st.session_state.submitted = False
             st.session_state.ai_response = ""
+            st.session_state.pending_response = None
+            st.session_state.stream_request = None
             st.rerun()
     
     st.markdown("---")